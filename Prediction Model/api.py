@@ -1,16 +1,14 @@
-
+import sys
+import pathlib
 from fastapi import FastAPI
 from pydantic import BaseModel
 import joblib
-import pandas as pd
 
-model = joblib.load("fire_prediction_model.pkl")
-selected_features = [
-    'max_temp_c', 'min_temp_c', 'avg_temp_c', 'heating_deg_days_c',
-    'cooling_deg_days_c', 'precip_mm', 'avg_humidity',
-    'avg_wind_speed_knots', 'avg_dew_point_f', 'avg_visibility_km',
-    'avg_sea_level_pressure_mb', 'temp_range_c', 'heat_index', 'drought_indicator'
-]
+# Share the NumPy feature assembly with the main app
+sys.path.append(str(pathlib.Path(__file__).parent.parent.absolute()))
+from prediction_service import prepare_model_for_arrays, predict_one
+
+model = prepare_model_for_arrays(joblib.load("fire_prediction_model.pkl"))
 
 app = FastAPI()
 
@@ -29,19 +27,7 @@ class FireRequest(BaseModel):
 
 @app.post("/predict")
 def predict_fire_prob(req: FireRequest):
-    temp_range = req.max_temp_c - req.min_temp_c
-    heat_index = req.avg_temp_c * (1 + 0.01 * req.avg_humidity)
-    drought_indicator = int(req.precip_mm < 5 and req.avg_temp_c > 25)
-
-    input_data = {
-        **req.dict(),
-        "temp_range_c": temp_range,
-        "heat_index": heat_index,
-        "drought_indicator": drought_indicator
-    }
-
-    input_df = pd.DataFrame([input_data])[selected_features]
-    fire_prob = model.predict_proba(input_df)[0, 1]
+    fire_prob = predict_one(model, req)
 
     return {
         "fire_probability": round(float(fire_prob), 4)
@@ -1,12 +1,27 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from pydantic import BaseModel
 import torch
-import pickle
 from PIL import Image
 import io
 import os
+import logging
 from torchvision import transforms
 import pathlib
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+try:
+    from Satellite_pic_predict.model_backends import EAGER_PATH, MODEL_BACKEND, MODEL_INT8, load_backend, model_version
+    from Satellite_pic_predict.model_config import SATELLITE_BATCH_SIZE
+except ModuleNotFoundError:
+    # 直接运行 SatelliteImageAPI.py 时
+    from model_backends import EAGER_PATH, MODEL_BACKEND, MODEL_INT8, load_backend, model_version
+    from model_config import SATELLITE_BATCH_SIZE
+
+# 日志写入 app.py 配置的 fire_prediction 日志
+logger = logging.getLogger("fire_prediction.satellite")
 
 app = FastAPI()
 
@@ -14,20 +29,25 @@ app = FastAPI()
 BASE_DIR = pathlib.Path(__file__).parent.absolute()
 
 # 定义模型路径 - 使用绝对路径
-MODEL_PATH = os.path.join(BASE_DIR, "efficientnet_model.pkl")
+MODEL_PATH = EAGER_PATH
 
 # 类别名称
 RISK_CATEGORIES = ["Non-burnable", "Low", "Moderate", "High"]
 
+# 批量推理：并行解码/预处理图像的线程数（每次前向传播的图像数量 SATELLITE_BATCH_SIZE 见 model_config.py）
+SATELLITE_DECODE_WORKERS = int(os.getenv("SATELLITE_DECODE_WORKERS", str(min(8, os.cpu_count() or 1))))
+# 推理线程内 torch 使用的 CPU 线程数（默认一半核心，给事件循环和其他请求留出余量）
+SATELLITE_TORCH_THREADS = int(os.getenv("SATELLITE_TORCH_THREADS", str(max(1, (os.cpu_count() or 1) // 2))))
+# 排队（已接收但尚未完成）的图像上限，超过后新的请求会被拒绝（HTTP 429）
+SATELLITE_QUEUE_MAX_IMAGES = int(os.getenv("SATELLITE_QUEUE_MAX_IMAGES", "256"))
+
 # 检查是否可用CUDA
 if torch.cuda.is_available():
     device = torch.device("cuda")
-    print(f"CUDA is available. Using GPU: {torch.cuda.get_device_name(0)}")
+    logger.info(f"CUDA is available. Using GPU: {torch.cuda.get_device_name(0)}")
 else:
     device = torch.device("cpu")
-    print("CUDA is not available. Using CPU.")
-
-print(f"Using device: {device}")
+    logger.info("CUDA is not available. Using CPU.")
 
 # 图像转换
 img_transform = transforms.Compose([
@@ -36,38 +56,15 @@ img_transform = transforms.Compose([
     transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
 ])
 
-# 加载模型 - 使用与test_models.py相同的方法
+# 加载模型：按 SATELLITE_MODEL_BACKEND / SATELLITE_MODEL_INT8 选择 eager、TorchScript 或 ONNX Runtime 后端
 def load_model():
-    print(f"Attempting to load model: {MODEL_PATH}")
-    
-    try:
-        # 尝试使用pickle加载
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-        print(f"Successfully loaded model using pickle")
-        
-        # 确保模型在正确的设备上
-        model = model.to(device)
-        model.eval()
-        return model
-    except Exception as pickle_error:
-        print(f"Failed to load with pickle: {pickle_error}")
-        
-        try:
-            # 尝试使用torch.load加载
-            model = torch.load(MODEL_PATH, map_location=device, weights_only=False)
-            print(f"Successfully loaded model using torch.load")
-            
-            # 确保模型在正确的设备上
-            model = model.to(device)
-            model.eval()
-            return model
-        except Exception as torch_error:
-            print(f"Failed to load with torch.load: {torch_error}")
-            raise RuntimeError(f"Could not load model: {torch_error}")
+    return load_backend(MODEL_BACKEND, MODEL_INT8, device, threads=SATELLITE_TORCH_THREADS)
 
 # 加载模型
 model = load_model()
+# 模型版本，用作分类结果缓存键的一部分（可用 SATELLITE_MODEL_VERSION 手动指定）
+MODEL_VERSION = model_version(model)
+logger.info(f"Satellite model version: {MODEL_VERSION}")
 
 class ImagePrediction(BaseModel):
     predicted_class: str
@@ -77,10 +74,143 @@ class ImagePrediction(BaseModel):
 def read_root():
     return {"message": "Satellite Image Fire Risk Prediction API is running"}
 
+class InferenceQueueFull(RuntimeError):
+    """推理队列已满，请求被拒绝（调用方应稍后重试）"""
+
+def decode_image(image_bytes):
+    """把图像字节解码并预处理为 (3, 224, 224) 张量"""
+    try:
+        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    except Exception:
+        raise ValueError("Invalid image file")
+    return img_transform(img)
+
+def _timed_decode(image_bytes):
+    start = time.perf_counter()
+    try:
+        return decode_image(image_bytes), time.perf_counter() - start
+    except ValueError as e:
+        return e, time.perf_counter() - start
+
+def predict_tensor_batch(tensors):
+    """对一批预处理后的张量执行一次前向传播，返回 ImagePrediction 列表"""
+    x = torch.stack(tensors).to(device)
+    with torch.inference_mode():
+        outputs = model(x)
+        probs = torch.nn.functional.softmax(outputs, dim=1)
+        conf, idx = torch.max(probs, 1)
+    return [
+        ImagePrediction(predicted_class=RISK_CATEGORIES[i], confidence=round(c, 4))
+        for i, c in zip(idx.tolist(), conf.tolist())
+    ]
+
+def _init_inference_thread():
+    # 在推理线程启动时设置 torch 的线程数，而不是在导入本模块时修改整个进程的设置
+    torch.set_num_threads(SATELLITE_TORCH_THREADS)
+
+def _timed_predict(tensors, submitted):
+    start = time.perf_counter()
+    predictions = predict_tensor_batch(tensors)
+    return predictions, start - submitted, time.perf_counter() - start
+
+class InferencePool:
+    """
+    CPU 推理执行器：图像解码和预处理在线程池中并行执行，模型推理在一个专用线程中按批次依次执行，
+    事件循环不会被阻塞。
+    
+    排队的图像数有上限（max_pending）：超过上限时抛出 InferenceQueueFull，而不是让请求无限等待；
+    队列为空时，超过上限的单个大批量请求仍然会被接受。
+    """
+
+    def __init__(self, max_pending=SATELLITE_QUEUE_MAX_IMAGES, decode_workers=SATELLITE_DECODE_WORKERS):
+        self.max_pending = max_pending
+        self.pending = 0
+        self._decode_executor = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="satellite-decode")
+        self._inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="satellite-inference",
+                                                      initializer=_init_inference_thread)
+        self.completed = 0
+        self.rejected = 0
+        self.batches = 0
+        self._stage_totals = {"decode": 0.0, "queue": 0.0, "inference": 0.0}
+
+    def _admit(self, count):
+        # Only touched from the event loop, so no lock is needed
+        if self.pending and self.pending + count > self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(f"Inference queue is full ({self.pending} images pending)")
+        self.pending += count
+
+    async def predict_many(self, images, batch_size=None):
+        """
+        批量预测多张图像
+        
+        Returns:
+            (results, timing)：results 与输入顺序一致，每项为 ImagePrediction，无法解码的图像为 ValueError；
+            timing 为各阶段耗时（毫秒）：decode（解码的累计耗时）、queue（批次等待推理线程的累计时间）、
+            inference（前向传播的累计耗时）和 total
+        """
+        batch_size = max(1, batch_size or SATELLITE_BATCH_SIZE)
+        self._admit(len(images))
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        stages = {"decode": 0.0, "queue": 0.0, "inference": 0.0}
+        try:
+            decoding = [loop.run_in_executor(self._decode_executor, _timed_decode, data) for data in images]
+            results = []
+            for first in range(0, len(decoding), batch_size):
+                decoded = await asyncio.gather(*decoding[first:first + batch_size])
+                stages["decode"] += sum(elapsed for _, elapsed in decoded)
+                valid = [i for i, (item, _) in enumerate(decoded) if not isinstance(item, ValueError)]
+                by_index = {}
+                if valid:
+                    predictions, waited, inferred = await loop.run_in_executor(
+                        self._inference_executor, _timed_predict, [decoded[i][0] for i in valid], time.perf_counter()
+                    )
+                    stages["queue"] += waited
+                    stages["inference"] += inferred
+                    self.batches += 1
+                    by_index = dict(zip(valid, predictions))
+                results.extend(by_index.get(i, item) for i, (item, _) in enumerate(decoded))
+        finally:
+            self.pending -= len(images)
+
+        self.completed += len(images)
+        for stage, elapsed in stages.items():
+            self._stage_totals[stage] += elapsed
+        timing = {stage: round(elapsed * 1000, 3) for stage, elapsed in stages.items()}
+        timing["total"] = round((time.perf_counter() - start) * 1000, 3)
+        return results, timing
+
+    async def predict(self, image_bytes):
+        """预测单张图像，返回 (ImagePrediction, timing)；无法解码时抛出 ValueError"""
+        results, timing = await self.predict_many([image_bytes], batch_size=1)
+        if isinstance(results[0], ValueError):
+            raise results[0]
+        return results[0], timing
+
+    def stats(self):
+        return {
+            "pending_images": self.pending,
+            "max_pending_images": self.max_pending,
+            "completed_images": self.completed,
+            "batches": self.batches,
+            "rejected_requests": self.rejected,
+            "backend": getattr(model, "name", None),
+            "model_version": MODEL_VERSION,
+            "int8": MODEL_INT8,
+            "torch_threads": SATELLITE_TORCH_THREADS,
+            "avg_ms_per_image": {
+                stage: round(total * 1000 / self.completed, 3) if self.completed else None
+                for stage, total in self._stage_totals.items()
+            }
+        }
+
+inference_pool = InferencePool()
+
 # 直接从字节数据预测的函数 - 可以被导入
 async def predict_image_from_bytes(image_bytes):
     """
-    从图像字节数据预测火灾风险
+    从图像字节数据预测火灾风险（在推理线程池中执行，不阻塞事件循环）
     
     Args:
         image_bytes: 图像的二进制数据
@@ -88,69 +218,46 @@ async def predict_image_from_bytes(image_bytes):
     Returns:
         ImagePrediction: 包含预测类别和置信度的对象
     """
-    print(f"predict_image_from_bytes function called")
-    
-    try:
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        print(f"Successfully opened image, size: {img.size}")
-    except Exception as e:
-        print(f"Error opening image: {e}")
-        raise ValueError("Invalid image file")
+    prediction, _ = await inference_pool.predict(image_bytes)
+    return prediction
+
+async def predict_images_from_bytes(images, batch_size=None):
+    """
+    批量预测多张图像的火灾风险
     
-    # 转换图像并移动到相应设备
-    x = img_transform(img).unsqueeze(0).to(device)
-    print(f"Image transformed and moved to device: {device}")
+    图像在线程池中并行解码和预处理，按 batch_size 堆叠成批次，每个批次执行一次
+    torch.inference_mode() 前向传播；前一批次推理时后面的图像继续解码。
     
-    try:
-        with torch.no_grad():
-            # 如果使用CUDA，设置计时器
-            if device.type == 'cuda':
-                start = torch.cuda.Event(enable_timing=True)
-                end = torch.cuda.Event(enable_timing=True)
-                start.record()
-            
-            # 执行模型推理
-            print("Running model inference...")
-            outputs = model(x)
-            probs = torch.nn.functional.softmax(outputs, dim=1)
-            conf, idx = torch.max(probs, 1)
-            
-            # 如果使用CUDA，计算推理时间
-            if device.type == 'cuda':
-                end.record()
-                torch.cuda.synchronize()
-                inference_time = start.elapsed_time(end)
-                print(f"Inference time: {inference_time:.2f} ms")
-        
-        # 获取预测结果
-        predicted_class = RISK_CATEGORIES[idx.item()]
-        confidence = round(conf.item(), 4)
-        
-        print(f"Prediction result - Class: {predicted_class}, Confidence: {confidence}")
-        
-        # 返回预测结果
-        result = ImagePrediction(
-            predicted_class=predicted_class,
-            confidence=confidence
-        )
-        
-        print(f"Returning result: {result}")
-        return result
+    Args:
+        images: 图像二进制数据的列表
+        batch_size: 每批图像数量（默认 SATELLITE_BATCH_SIZE）
         
-    except Exception as e:
-        print(f"Error during prediction: {e}")
-        raise ValueError(f"Error during prediction: {str(e)}")
+    Returns:
+        与输入顺序一致的列表：每项为 ImagePrediction，无法解码的图像为 ValueError
+    """
+    results, _ = await inference_pool.predict_many(images, batch_size)
+    return results
 
 @app.post("/predict_image")
 async def predict_image(file: UploadFile = File(...)):
-    print(f"predict_image function called with file: {file.filename}")
-    
     # 读取上传的文件
     contents = await file.read()
     
     # 使用共享的预测函数
     return await predict_image_from_bytes(contents)
 
+@app.post("/predict_images")
+async def predict_images(files: List[UploadFile] = File(...)):
+    contents = [await file.read() for file in files]
+    results = await predict_images_from_bytes(contents)
+    response = []
+    for file, result in zip(files, results):
+        if isinstance(result, ImagePrediction):
+            response.append({"filename": file.filename, "predicted_class": result.predicted_class, "confidence": result.confidence})
+        else:
+            response.append({"filename": file.filename, "error": str(result)})
+    return response
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+把 efficientnet_model.pkl 导出为优化的 CPU 推理格式
+
+在本目录下写出（由 model_backends.load_backend 按 SATELLITE_MODEL_BACKEND / SATELLITE_MODEL_INT8 加载）：
+- efficientnet_model.ts.pt        TorchScript（trace + freeze，channels_last）
+- efficientnet_model.onnx         ONNX（批次维度可变），用 ONNX Runtime 执行，需要 onnx 和 onnxruntime
+- efficientnet_model.int8.*       使用 --int8 时的量化版本：
+    dynamic  只量化全连接层的权重，不需要校准数据
+    static   卷积和全连接层都量化为 int8，用 test_models.py 的示例图像校准激活值范围
+
+在项目根目录运行：
+    python Satellite_pic_predict/export_model.py [--format torchscript onnx] [--int8 dynamic|static]
+然后用 test_optimized_models.py 检查导出模型与原始模型的预测是否一致。
+"""
+import os
+import copy
+import logging
+import argparse
+
+import torch
+
+from model_backends import EAGER_PATH, INPUT_SHAPE, artifact_path, load_eager_model
+from test_models import get_image_files, preprocess_image
+
+CPU = torch.device("cpu")
+
+
+def calibration_batch(limit):
+    """示例图像预处理后的 (n, 3, 224, 224) 张量，没有示例图像时返回 None"""
+    tensors = []
+    for img_path in get_image_files()[:limit]:
+        img_tensor, success = preprocess_image(img_path)
+        if success:
+            tensors.append(img_tensor.cpu())
+    return torch.cat(tensors) if tensors else None
+
+
+def quantize_torch(model, mode, calibration):
+    """PyTorch int8 量化：dynamic 用 quantize_dynamic，static 用 FX 图模式量化并在示例图像上校准"""
+    if mode == "dynamic":
+        return torch.ao.quantization.quantize_dynamic(copy.deepcopy(model), {torch.nn.Linear}, dtype=torch.qint8)
+
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    engine = "x86" if "x86" in torch.backends.quantized.supported_engines else "fbgemm"
+    torch.backends.quantized.engine = engine
+    prepared = prepare_fx(copy.deepcopy(model), get_default_qconfig_mapping(engine), (calibration[:1],))
+    with torch.no_grad():
+        for batch in calibration.split(8):
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def export_torchscript(model, path, example):
+    """trace + freeze，权重和示例输入都使用 channels_last"""
+    model = model.to(memory_format=torch.channels_last).eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example.contiguous(memory_format=torch.channels_last))
+        traced = torch.jit.freeze(traced)
+    torch.jit.save(traced, path)
+
+
+def export_onnx(model, path, example):
+    torch.onnx.export(
+        model, example, path,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+        do_constant_folding=True
+    )
+
+
+def quantize_onnx(fp32_path, path, mode, calibration):
+    """ONNX Runtime int8 量化：static 使用 QDQ 格式、逐通道权重，激活值范围来自示例图像"""
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    if mode == "dynamic":
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+        return
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter([{"input": batch.numpy()} for batch in calibration.split(1)])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    quantize_static(fp32_path, path, ImageReader(), quant_format=QuantFormat.QDQ, per_channel=True,
+                    weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+
+
+def report(path):
+    print(f"已保存: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出卫星图像分类模型")
+    parser.add_argument("--format", nargs="+", choices=["torchscript", "onnx"], default=["torchscript", "onnx"],
+                        help="导出格式（默认两种都导出）")
+    parser.add_argument("--int8", choices=["dynamic", "static"], help="同时导出 int8 量化模型")
+    parser.add_argument("--calibration-images", type=int, default=64, help="静态量化使用的示例图像数")
+    args = parser.parse_args()
+    # 显示 model_backends 加载模型时的日志
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if not os.path.exists(EAGER_PATH):
+        print(f"模型文件 {EAGER_PATH} 不存在!")
+        return
+
+    # 导出只针对 CPU 推理
+    model = load_eager_model(EAGER_PATH, CPU)
+    calibration = calibration_batch(args.calibration_images)
+    if args.int8 == "static" and calibration is None:
+        print("静态量化需要示例图像来校准，请先把图像放到 test_models.py 的 IMAGE_FOLDER 中")
+        return
+    example = calibration[:1] if calibration is not None else torch.randn(1, *INPUT_SHAPE)
+
+    if "torchscript" in args.format:
+        path = artifact_path("torchscript")
+        export_torchscript(model, path, example)
+        report(path)
+        if args.int8:
+            try:
+                path = artifact_path("torchscript", int8=True)
+                export_torchscript(quantize_torch(model, args.int8, calibration), path, example)
+                report(path)
+            except Exception as e:
+                print(f"TorchScript int8 量化失败: {e}")
+
+    if "onnx" in args.format:
+        try:
+            path = artifact_path("onnx")
+            export_onnx(model, path, example)
+            report(path)
+            if args.int8:
+                int8_path = artifact_path("onnx", int8=True)
+                quantize_onnx(path, int8_path, args.int8, calibration)
+                report(int8_path)
+        except ImportError as e:
+            print(f"ONNX 导出需要 onnx 和 onnxruntime: {e}")
+
+    print("\n运行 python Satellite_pic_predict/test_optimized_models.py 检查导出模型与原始模型的一致性")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+卫星图像分类模型的推理后端
+
+- eager：原始的 efficientnet_model.pkl（pickle / torch.load），fp32，channels_last
+- torchscript：export_model.py 导出的 trace + freeze 模型（efficientnet_model.ts.pt）
+- onnx：export_model.py 导出的 ONNX 模型（efficientnet_model.onnx），用 ONNX Runtime 执行
+
+启用 int8 时加载量化后的导出文件（efficientnet_model.int8.ts.pt / efficientnet_model.int8.onnx）。
+所有后端都是可调用对象：输入 (n, 3, 224, 224) 的 float32 张量，返回 (n, 类别数) 的 logits 张量。
+"""
+import os
+import pickle
+import logging
+
+import torch
+
+try:
+    from Satellite_pic_predict.model_config import (
+        BACKEND_NAMES, EAGER_PATH, MODEL_BACKEND, MODEL_INT8, artifact_path, artifact_version
+    )
+except ModuleNotFoundError:
+    # 在本目录下直接运行脚本时
+    from model_config import BACKEND_NAMES, EAGER_PATH, MODEL_BACKEND, MODEL_INT8, artifact_path, artifact_version
+
+INPUT_SHAPE = (3, 224, 224)
+
+logger = logging.getLogger("fire_prediction.satellite.backends")
+
+
+def load_eager_model(path=EAGER_PATH, device=torch.device("cpu")):
+    """加载原始模型：先尝试 pickle，再尝试 torch.load"""
+    logger.info(f"Loading satellite model: {path}")
+
+    try:
+        # 尝试使用pickle加载
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        logger.info("Loaded satellite model using pickle")
+    except Exception as pickle_error:
+        logger.warning(f"Failed to load with pickle: {pickle_error}")
+
+        try:
+            # 尝试使用torch.load加载
+            model = torch.load(path, map_location=device, weights_only=False)
+            logger.info("Loaded satellite model using torch.load")
+        except Exception as torch_error:
+            logger.error(f"Failed to load with torch.load: {torch_error}")
+            raise RuntimeError(f"Could not load model: {torch_error}")
+
+    # 确保模型在正确的设备上
+    model = model.to(device)
+    model.eval()
+    return model
+
+
+class EagerBackend:
+    """原始 PyTorch 模块，权重转为 channels_last（CPU 上卷积更快）"""
+
+    name = "eager"
+    path = None
+
+    def __init__(self, model):
+        self.model = model.to(memory_format=torch.channels_last).eval()
+
+    @classmethod
+    def load(cls, path=EAGER_PATH, device=torch.device("cpu")):
+        backend = cls(load_eager_model(path, device))
+        backend.path = path
+        return backend
+
+    def __call__(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+class TorchScriptBackend:
+    """export_model.py 导出的 TorchScript 模型（已 freeze，输入为 channels_last）"""
+
+    name = "torchscript"
+    path = None
+
+    def __init__(self, module):
+        self.module = module
+
+    @classmethod
+    def load(cls, path, device=torch.device("cpu")):
+        backend = cls(torch.jit.load(path, map_location=device).eval())
+        backend.path = path
+        return backend
+
+    def __call__(self, x):
+        return self.module(x.contiguous(memory_format=torch.channels_last))
+
+
+class OnnxBackend:
+    """ONNX Runtime 会话（CPU），输入输出在 torch 张量和 NumPy 数组之间转换"""
+
+    name = "onnx"
+    path = None
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.output_name = session.get_outputs()[0].name
+
+    @classmethod
+    def load(cls, path, device=torch.device("cpu"), threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or torch.get_num_threads()
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        backend = cls(ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"]))
+        backend.path = path
+        return backend
+
+    def __call__(self, x):
+        inputs = x.detach().cpu().contiguous().numpy()
+        return torch.from_numpy(self.session.run([self.output_name], {self.input_name: inputs})[0])
+
+
+def model_version(backend):
+    """已加载后端的模型版本（与 model_config.configured_model_version 的计算方式相同）"""
+    return artifact_version(backend.name, backend.path)
+
+
+BACKENDS = {"eager": EagerBackend, "torchscript": TorchScriptBackend, "onnx": OnnxBackend}
+
+
+def load_backend(backend=MODEL_BACKEND, int8=MODEL_INT8, device=torch.device("cpu"), threads=None):
+    """
+    按配置加载推理后端
+
+    threads 是 ONNX Runtime 会话的线程数（默认与 torch 相同）。
+    导出的模型文件不存在或无法加载时记录原因并回退到 eager 模型。
+    """
+    if backend not in BACKEND_NAMES:
+        logger.warning(f"Unknown SATELLITE_MODEL_BACKEND '{backend}', using eager")
+        backend = "eager"
+    if backend != "eager":
+        path = artifact_path(backend, int8)
+        if not os.path.exists(path):
+            logger.warning(f"No {backend} model at {path} (run Satellite_pic_predict/export_model.py), using eager")
+        else:
+            try:
+                if backend == "onnx":
+                    loaded = OnnxBackend.load(path, device, threads)
+                else:
+                    loaded = BACKENDS[backend].load(path, device)
+                logger.info(f"Loaded {backend}{' int8' if int8 else ''} model: {path}")
+                return loaded
+            except ImportError as e:
+                logger.warning(f"{backend} backend unavailable: {e}, using eager")
+            except Exception as e:
+                logger.error(f"Could not load {backend} model {path}: {e}, using eager")
+    return EagerBackend.load(EAGER_PATH, device)
@@ -0,0 +1,73 @@
+"""
+卫星图像分类模型的配置和版本（不导入 torch）
+
+app.py 在模型加载之前就要用模型版本查分类结果缓存，所以这里只根据配置和模型文件计算版本，
+选择文件的规则与 model_backends.load_backend 相同。
+"""
+import os
+import hashlib
+import pathlib
+import threading
+
+# 模型文件都在本目录下
+MODEL_DIR = pathlib.Path(__file__).parent.absolute()
+EAGER_PATH = os.path.join(MODEL_DIR, "efficientnet_model.pkl")
+
+BACKEND_NAMES = ("eager", "torchscript", "onnx")
+# 推理后端和是否使用 int8 量化模型（导出文件不存在或无法加载时回退到 eager）
+MODEL_BACKEND = os.getenv("SATELLITE_MODEL_BACKEND", "eager").lower()
+MODEL_INT8 = os.getenv("SATELLITE_MODEL_INT8", "false").lower() in ("1", "true", "yes")
+# 手动指定的模型版本（覆盖按模型文件计算的版本）
+MODEL_VERSION_OVERRIDE = os.getenv("SATELLITE_MODEL_VERSION")
+
+# 批量推理：每次前向传播的图像数量
+SATELLITE_BATCH_SIZE = int(os.getenv("SATELLITE_BATCH_SIZE", "32"))
+
+# 模型文件的 sha256，按 (路径, 修改时间, 大小) 缓存，避免每个请求都重新读取整个文件
+_digests = {}
+_digest_lock = threading.Lock()
+
+
+def artifact_path(backend, int8=False):
+    """export_model.py 为某个后端写出的模型文件路径"""
+    suffix = {"torchscript": "ts.pt", "onnx": "onnx"}[backend]
+    return os.path.join(MODEL_DIR, f"efficientnet_model.{'int8.' if int8 else ''}{suffix}")
+
+
+def configured_artifact(backend=MODEL_BACKEND, int8=MODEL_INT8):
+    """按配置会加载的 (后端名, 模型文件)：导出文件不存在时是 eager 模型"""
+    if backend in BACKEND_NAMES and backend != "eager":
+        path = artifact_path(backend, int8)
+        if os.path.exists(path):
+            return backend, path
+    return "eager", EAGER_PATH
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        digest = _digests.get(key)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+            _digests[key] = digest
+    return digest
+
+
+def artifact_version(backend_name, path):
+    """模型版本：后端名 + 模型文件内容的 sha256 前缀（换模型文件或后端后版本随之改变）"""
+    return MODEL_VERSION_OVERRIDE or f"{backend_name}:{file_digest(path)[:16]}"
+
+
+def configured_model_version():
+    """不加载模型时按配置得到的模型版本；模型文件不存在时返回 None"""
+    if MODEL_VERSION_OVERRIDE:
+        return MODEL_VERSION_OVERRIDE
+    backend_name, path = configured_artifact()
+    if not os.path.exists(path):
+        return None
+    return artifact_version(backend_name, path)
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import logging
+
+import torch
+
+from model_backends import EAGER_PATH, BACKENDS, EagerBackend, artifact_path
+from test_models import IMAGE_FOLDER, RISK_CATEGORIES, get_image_files, preprocess_image
+
+# 测试配置：导出模型与原始（eager）模型的预测类别一致率下限
+MIN_AGREEMENT = 1.0
+MIN_AGREEMENT_INT8 = float(os.getenv("SATELLITE_INT8_MIN_AGREEMENT", "0.95"))
+VARIANTS = [("torchscript", False), ("torchscript", True), ("onnx", False), ("onnx", True)]
+CPU = torch.device("cpu")
+
+# 对每张图像执行预测，返回 (类别概率列表, 平均单张耗时毫秒)
+def run_model(model, tensors):
+    probabilities = []
+    elapsed = 0.0
+    with torch.inference_mode():
+        # 预热一次，不计入耗时
+        model(tensors[0])
+        for img_tensor in tensors:
+            start = time.perf_counter()
+            outputs = model(img_tensor)
+            elapsed += time.perf_counter() - start
+            probabilities.append(torch.nn.functional.softmax(outputs.float(), dim=1)[0])
+    return probabilities, elapsed / len(tensors) * 1000
+
+# 主测试函数：导出模型与原始模型在示例图像上的类别一致率、概率差和单张 CPU 延迟
+def test_optimized_models():
+    # 检查图像文件夹是否存在
+    if not os.path.exists(IMAGE_FOLDER):
+        print(f"图像文件夹 {IMAGE_FOLDER} 不存在!")
+        return False
+
+    tensors = []
+    names = []
+    for img_path in get_image_files():
+        img_tensor, success = preprocess_image(img_path)
+        if success:
+            tensors.append(img_tensor.cpu())
+            names.append(os.path.basename(img_path))
+    if not tensors:
+        print(f"在 {IMAGE_FOLDER} 文件夹中没有找到图像文件!")
+        return False
+    print(f"找到 {len(tensors)} 个图像文件")
+
+    reference = EagerBackend.load(EAGER_PATH, CPU)
+    expected, eager_ms = run_model(reference, tensors)
+    expected_classes = [int(p.argmax()) for p in expected]
+    print(f"\n{'eager':>18}: {eager_ms:8.2f} ms/张")
+
+    passed = True
+    for backend, int8 in VARIANTS:
+        path = artifact_path(backend, int8)
+        label = f"{backend}{' int8' if int8 else ''}"
+        if not os.path.exists(path):
+            print(f"{label:>18}: 未导出，跳过测试 ({path})")
+            continue
+        try:
+            model = BACKENDS[backend].load(path, CPU)
+            probabilities, ms = run_model(model, tensors)
+        except Exception as e:
+            print(f"{label:>18}: 加载或预测失败: {e}")
+            passed = False
+            continue
+
+        classes = [int(p.argmax()) for p in probabilities]
+        agree = sum(a == b for a, b in zip(classes, expected_classes))
+        max_diff = max(float((p - q).abs().max()) for p, q in zip(probabilities, expected))
+        ok = agree / len(tensors) >= (MIN_AGREEMENT_INT8 if int8 else MIN_AGREEMENT)
+        passed = passed and ok
+        print(f"{label:>18}: {ms:8.2f} ms/张 (eager 的 {ms / eager_ms:.2f} 倍), 类别一致 {agree}/{len(tensors)}, "
+              f"最大概率差 {max_diff:.4f} {'通过' if ok else '未通过'}")
+
+        # 显示不一致的图像
+        for name, got, want in zip(names, classes, expected_classes):
+            if got != want:
+                print(f"{'':>20}图像: {name}, 原始模型: {RISK_CATEGORIES[want]}, {label}: {RISK_CATEGORIES[got]}")
+
+    return passed
+
+if __name__ == "__main__":
+    # 显示 model_backends 加载模型时的日志
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(0 if test_optimized_models() else 1)
@@ -2,22 +2,49 @@ import os
 import sys
 import json
 import logging
-import uuid
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from fastapi import FastAPI, Request, HTTPException, Query, File, UploadFile, Form
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import joblib
-import pandas as pd
+from typing import List, Optional
 from dotenv import load_dotenv
 import base64
 import re
 import httpx
 import io
+import gzip
+import time
+import zipfile
+import asyncio
+import importlib.util
+from prediction_service import (
+    BASE_FEATURES,
+    SELECTED_FEATURES,
+    BatchParseError,
+    feature_assembler,
+    parse_batch_body,
+    predict_base,
+    predict_batch,
+    predict_matrix,
+    predict_one,
+    rule_based_probability,
+)
+from prediction_batcher import BATCHING_ENABLED, PredictionBatcher
+from inference_backends import MODEL_BACKEND, PICKLE_PATH, select_backend
+from risk_rules import rule_engine
+from geojson_cache import ETAG_SUFFIXES, choose_encoding, etag_matches, geojson_cache
+from vector_tiles import LAYERS as TILE_LAYERS, TILE_MAX_ZOOM, tile_service, tiles_available
+from fire_index import fire_index, index_available
+from fire_attributes import GROUP_KEYS
+from geoparquet_layers import geoparquet_service, parquet_available
+from model_registry import MODEL_WARMUP, model_registry
+from satellite_cache import MISSING, SATELLITE_UPLOAD_DIR, content_hash, satellite_results, store_upload
+from Satellite_pic_predict.model_config import SATELLITE_BATCH_SIZE, configured_model_version
 
 # Set up logging
 logs_dir = "logs"
@@ -48,51 +75,53 @@ try:
 except:
     logger.info("Using system environment variables")
 
-# Setup OpenAI client
-openai_available = False
-openai_client = None
+# Models and clients are loaded lazily through the registry: importing this module stays fast, and
+# they are warmed in the background on startup (MODEL_WARMUP=background) or loaded on first use
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+openai_configured = bool(OPENAI_API_KEY) and OPENAI_API_KEY != "your_openai_api_key_here"
+if not openai_configured:
+    logger.warning("OpenAI API key not found or not set. AI Analysis will not be available.")
+    logger.warning("Please add your OpenAI API key to the .env file.")
 
-# Initialize OpenAI client (if API key is available)
-try:
-    from openai import OpenAI
-    if OPENAI_API_KEY and OPENAI_API_KEY != "your_openai_api_key_here":
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        openai_available = True
-        logger.info("OpenAI client initialized successfully")
-    else:
-        logger.warning("OpenAI API key not found or not set. AI Analysis will not be available.")
-        logger.warning("Please add your OpenAI API key to the .env file.")
-except ImportError:
-    logger.error("OpenAI module not found. AI Analysis will not be available.")
-    logger.error("Install it using: pip install openai")
-    
-# Load the ML model
-model = None
-model_path = "Prediction Model/fire_prediction_model.pkl"
+def load_openai_client():
+    try:
+        from openai import OpenAI
+    except ImportError:
+        logger.error("OpenAI module not found. AI Analysis will not be available.")
+        logger.error("Install it using: pip install openai")
+        raise
+    client = OpenAI(api_key=OPENAI_API_KEY)
+    logger.info("OpenAI client initialized successfully")
+    return client
+
+# The ML model
+model_path = PICKLE_PATH
 
 # 检测是否在 Vercel 环境中运行
 is_vercel = os.environ.get('VERCEL', False) or os.environ.get('VERCEL_ENV', False)
 
-try:
-    if not is_vercel and os.path.exists(model_path):
-        logger.info(f"Found model at: {model_path}")
-        model = joblib.load(model_path)
-        logger.info("Successfully loaded prediction model") 
-    else:
-        # 在 Vercel 环境中直接使用规则引擎
-        logger.warning(f"Model not found or running in Vercel environment")
-        logger.info("Running in cloud-based prediction mode")
-except Exception as e:
-    logger.error(f"Error loading model: {e}")
+def load_fire_model():
+    logger.info(f"Found model at: {model_path}")
+    # Compiled backend (ONNX / flattened trees) when available, pickle as fallback
+    model = select_backend(MODEL_BACKEND)
+    logger.info(f"Successfully loaded prediction model ({model.name} backend)")
+    return model
+
+def load_satellite_model():
+    # Imports torch/torchvision and loads EfficientNet
+    import Satellite_pic_predict.SatelliteImageAPI as satellite_api
+    return satellite_api
+
+fire_model = model_registry.register("fire", load_fire_model, enabled=not is_vercel and os.path.exists(model_path))
+if not fire_model.enabled:
+    # 在 Vercel 环境中直接使用规则引擎
+    logger.warning(f"Model not found or running in Vercel environment")
     logger.info("Running in cloud-based prediction mode")
+openai_model = model_registry.register("openai", load_openai_client, enabled=openai_configured)
+satellite_model = model_registry.register("satellite", load_satellite_model,
+                                          enabled=importlib.util.find_spec("torch") is not None)
 
-selected_features = [
-    'max_temp_c', 'min_temp_c', 'avg_temp_c', 'heating_deg_days_c',
-    'cooling_deg_days_c', 'precip_mm', 'avg_humidity',
-    'avg_wind_speed_knots', 'avg_dew_point_f', 'avg_visibility_km',
-    'avg_sea_level_pressure_mb', 'temp_range_c', 'heat_index', 'drought_indicator'
-]
+selected_features = SELECTED_FEATURES
 
 # Initialize FastAPI app - moved to the top before any endpoints are defined
 app = FastAPI()
@@ -107,6 +136,46 @@ app.add_middleware(
     allow_headers=["*"],  # 允许所有头
 )
 
+# Micro-batcher for /api/predict, created on startup when a model is configured
+prediction_batcher = None
+
+@app.on_event("startup")
+async def start_prediction_batcher():
+    global prediction_batcher
+    if fire_model.enabled and BATCHING_ENABLED:
+        # Only used once the model is ready (see score_fire_request)
+        prediction_batcher = PredictionBatcher(lambda X: predict_matrix(fire_model.value, X))
+        await prediction_batcher.start()
+
+@app.on_event("startup")
+async def warm_models():
+    # Loaded in the background so startup is not held up; requests arriving meanwhile wait for their model
+    if MODEL_WARMUP == "background":
+        model_registry.start_warmup()
+
+# Background build of the fire perimeter index, started on startup
+fire_index_task = None
+
+@app.on_event("startup")
+async def build_fire_index():
+    # Built in the background so startup is not held up; early queries build or wait under the index lock
+    global fire_index_task
+    if index_available:
+        fire_index_task = asyncio.get_running_loop().create_task(run_in_threadpool(fire_index.load))
+
+@app.on_event("shutdown")
+async def stop_prediction_batcher():
+    if prediction_batcher is not None:
+        await prediction_batcher.stop()
+
+@app.on_event("shutdown")
+async def close_weather_client():
+    try:
+        from weather_client import close_async_client
+        await close_async_client()
+    except ImportError:
+        pass
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -133,16 +202,53 @@ class AnalysisRequest(BaseModel):
     weather_data: dict
     location: str = "Unknown location"
 
-# New functions for GeoJSON handling
-def read_geojson_file(file_path):
-    """Read GeoJSON file and return its contents"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except Exception as e:
-        logger.error(f"Error reading file {file_path}: {e}")
+class BulkWeatherRequest(BaseModel):
+    locations: List[str]
+    date: Optional[str] = None
+    concurrency: Optional[int] = None
+
+def parse_date_param(date):
+    """Parse an optional YYYY-MM-DD query/body value, raising 400 on bad input."""
+    if not date:
         return None
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        logger.error(f"Invalid date format: {date}")
+        raise HTTPException(status_code=400, detail="Date must be in YYYY-MM-DD format")
+
+def validate_bulk_locations(locations, max_locations):
+    """Strip location strings and enforce the per-request limit."""
+    if not locations:
+        raise HTTPException(status_code=400, detail="At least one location is required")
+    if len(locations) > max_locations:
+        raise HTTPException(status_code=400, detail=f"At most {max_locations} locations per request")
+    return [location.strip() for location in locations]
+
+# New functions for GeoJSON handling
+async def serve_geojson(request: Request, file_path):
+    """
+    Serve a static GeoJSON file from the in-memory cache.
+    - Bytes are serialized and compressed once per file version.
+    - Honors If-None-Match (304) and Accept-Encoding (br/gzip); each encoding has its own ETag.
+    """
+    asset = geojson_cache.lookup(file_path)
+    if asset is None:
+        asset = await run_in_threadpool(geojson_cache.load, file_path)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), asset.encoded)
+    headers = {
+        "ETag": asset.etag_for(encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(content=asset.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=asset.encoded[encoding], media_type="application/json", headers=headers)
 
 @app.get("/", response_class=HTMLResponse)
 async def get_home(request: Request):
@@ -152,89 +258,131 @@ async def get_home(request: Request):
 @app.get("/api/status")
 async def get_status():
     logger.info("API status requested")
+
+    caches = {}
+    try:
+        from weather_service import get_geocode_cache_stats, get_weather_cache_stats
+        caches["geocoding"] = get_geocode_cache_stats()
+        caches["weather"] = get_weather_cache_stats()
+    except ImportError:
+        pass
+    caches["geojson"] = geojson_cache.stats()
+    caches["tiles"] = tile_service.stats()
+    caches["satellite_results"] = satellite_results.stats()
+
+    # Only reported once the satellite model is loaded
+    satellite_inference = satellite_model.value.inference_pool.stats() if satellite_model.ready else None
+
     return {
-        "model_loaded": model is not None,
-        "openai_available": openai_available,
+        "model_loaded": fire_model.ready,
+        "model_backend": fire_model.value.name if fire_model.ready else None,
+        "openai_available": openai_model.state not in ("disabled", "failed"),
+        "models": model_registry.status(),
+        "prediction_batching": prediction_batcher is not None and prediction_batcher.running,
+        "risk_rules": rule_engine.info(),
+        "fire_index": fire_index.info(),
+        "geoparquet": geoparquet_service.info(),
+        "satellite_inference": satellite_inference,
+        "caches": caches,
         "system_info": {
             "python_version": sys.version,
             "current_directory": os.getcwd()
         }
     }
 
+async def score_fire_request(req):
+    """Fire probability for one FireRequest, from the model if loaded, otherwise from the rules."""
+    # Waits for the model on first use (or while it is warming up)
+    model = await fire_model.get()
+    # Use local model if available
+    if model is not None:
+        if prediction_batcher is not None and prediction_batcher.running:
+            # Coalesce with concurrent requests; scoring runs off the event loop
+            fire_prob = await prediction_batcher.submit(feature_assembler.assemble_one(req))
+        else:
+            fire_prob = predict_one(model, req)
+        probability = round(float(fire_prob), 4)
+        logger.info(f"Fire probability calculated using local model: {probability}")
+    else:
+        # Use rule-based prediction when model is not available (for Vercel deployment)
+        logger.info("Using rule-based prediction (model not available)")
+        probability = rule_based_probability(
+            req.avg_temp_c, req.avg_humidity, req.precip_mm, req.avg_wind_speed_knots
+        )
+        logger.info(f"Fire probability calculated using rules: {probability}")
+    return probability
+
 @app.post("/api/predict")
 async def predict_fire_prob(req: FireRequest):
     logger.info(f"Prediction requested for location: {req.location}")
     
     try:
-        # Calculate derived features
-        temp_range = req.max_temp_c - req.min_temp_c
-        heat_index = req.avg_temp_c * (1 + 0.01 * req.avg_humidity)
-        drought_indicator = int(req.precip_mm < 5 and req.avg_temp_c > 25)
-
-        input_data = {
-            **req.dict(exclude={"location"}),
-            "temp_range_c": temp_range,
-            "heat_index": heat_index,
-            "drought_indicator": drought_indicator
-        }
-
-        # Use local model if available
-        if model is not None:
-            input_df = pd.DataFrame([input_data])[selected_features]
-            fire_prob = model.predict_proba(input_df)[0, 1]
-            probability = round(float(fire_prob), 4)
-            logger.info(f"Fire probability calculated using local model: {probability}")
-        else:
-            # Use rule-based prediction when model is not available (for Vercel deployment)
-            logger.info("Using rule-based prediction (model not available)")
-            
-            # Simple rule-based prediction based on key features
-            base_prob = 0.01  # Base probability
-            
-            # Temperature factors
-            if req.avg_temp_c > 30:
-                base_prob += 0.20
-            elif req.avg_temp_c > 25:
-                base_prob += 0.10
-            elif req.avg_temp_c > 20:
-                base_prob += 0.05
-                
-            # Humidity factors
-            if req.avg_humidity < 30:
-                base_prob += 0.20
-            elif req.avg_humidity < 40:
-                base_prob += 0.10
-                
-            # Precipitation factors
-            if req.precip_mm < 1:
-                base_prob += 0.15
-            elif req.precip_mm < 5:
-                base_prob += 0.05
-                
-            # Wind factors
-            if req.avg_wind_speed_knots > 15:
-                base_prob += 0.15
-            elif req.avg_wind_speed_knots > 10:
-                base_prob += 0.10
-                
-            # Cap probability at 0.99
-            probability = min(0.99, round(base_prob, 4))
-            logger.info(f"Fire probability calculated using rules: {probability}")
+        probability = await score_fire_request(req)
 
         return {
             "fire_probability": probability,
             "location": req.location or "Unknown location",
-            "prediction_method": "model" if model is not None else "rule-based"
+            "prediction_method": "model" if fire_model.ready else "rule-based"
         }
     except Exception as e:
         logger.error(f"Error in prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
 
+@app.post("/api/predict/batch")
+async def predict_fire_prob_batch(request: Request):
+    """
+    Score many weather rows in one call.
+    - Body is a JSON array of FireRequest records, or NDJSON / CSV / Arrow IPC
+      selected by the Content-Type header.
+    - Probabilities are returned in input order.
+    """
+    start = time.perf_counter()
+    content_type = request.headers.get("content-type", "application/json")
+    body = await request.body()
+
+    try:
+        df = parse_batch_body(body, content_type)
+    except BatchParseError as e:
+        logger.error(f"Invalid batch prediction request: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    parsed = time.perf_counter()
+
+    logger.info(f"Batch prediction requested for {len(df)} rows ({content_type})")
+
+    model = await fire_model.get()
+    try:
+        probabilities = await run_in_threadpool(predict_batch, model, df)
+    except Exception as e:
+        logger.error(f"Error in batch prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Error making batch prediction: {str(e)}")
+    finished = time.perf_counter()
+
+    logger.info(f"Batch of {len(probabilities)} rows scored in {(finished - start) * 1000:.1f} ms")
+
+    return {
+        "count": len(probabilities),
+        "fire_probabilities": probabilities,
+        "prediction_method": "model" if model is not None else "rule-based",
+        "timing_ms": {
+            "parse": round((parsed - start) * 1000, 3),
+            "predict": round((finished - parsed) * 1000, 3),
+            "total": round((finished - start) * 1000, 3)
+        }
+    }
+
+@app.get("/api/predict/stats")
+async def get_prediction_stats():
+    """Micro-batcher metrics: queue depth, batch-size histogram and wait/inference times"""
+    if prediction_batcher is None:
+        return {"running": False, "enabled": BATCHING_ENABLED, "model_loaded": fire_model.ready}
+    return prediction_batcher.stats()
+
 @app.post("/api/analyze")
 async def get_ai_analysis(req: AnalysisRequest):
     logger.info(f"AI analysis requested for location: {req.location}, probability: {req.fire_probability}")
     
-    if not openai_available:
+    openai_client = await openai_model.get()
+    if openai_client is None:
         logger.warning("OpenAI not available, returning fallback response")
         # Return a fallback response when OpenAI is not available
         return JSONResponse(status_code=200, content={
@@ -371,7 +519,7 @@ async def get_weather(
         raise HTTPException(status_code=400, detail="Location cannot be empty")
     
     try:
-        from weather_service import get_weather_data
+        from weather_service import async_get_weather_data, extract_prediction_fields
         
         # Sanitize input
         location = location.strip()
@@ -387,7 +535,7 @@ async def get_weather(
                 raise HTTPException(status_code=400, detail="Date must be in YYYY-MM-DD format")
         
         logger.info(f"Calling weather service for location: {location}, date: {parsed_date}")
-        weather_data = get_weather_data(location, parsed_date)
+        weather_data = await async_get_weather_data(location, parsed_date)
         
         if not weather_data:
             logger.error("Weather service returned empty response")
@@ -399,22 +547,7 @@ async def get_weather(
             
         # Keep only the fields we need for the prediction model and ensure they're all present
         try:
-            prediction_fields = {
-                'max_temp_c': round(float(weather_data['max_temp_c']), 1),
-                'min_temp_c': round(float(weather_data['min_temp_c']), 1),
-                'avg_temp_c': round(float(weather_data['avg_temp_c']), 1),
-                'heating_deg_days_c': round(float(weather_data['heating_deg_days_c']), 1),
-                'cooling_deg_days_c': round(float(weather_data['cooling_deg_days_c']), 1),
-                'precip_mm': round(float(weather_data['precip_mm']), 1),
-                'avg_humidity': round(float(weather_data['avg_humidity']), 1),
-                'avg_wind_speed_knots': round(float(weather_data['avg_wind_speed_knots']), 1),
-                'avg_dew_point_f': round(float(weather_data['avg_dew_point_f']), 1),
-                'avg_visibility_km': round(float(weather_data['avg_visibility_km']), 1),
-                'avg_sea_level_pressure_mb': round(float(weather_data['avg_sea_level_pressure_mb']), 1)
-            }
-            
-            # Add date to response
-            prediction_fields['date'] = weather_data.get('date', date if date else datetime.now().strftime("%Y-%m-%d"))
+            prediction_fields = extract_prediction_fields(weather_data, date)
             
             logger.info(f"Weather data processed successfully for {location}, date: {date}")
             return prediction_fields
@@ -432,10 +565,201 @@ async def get_weather(
         logger.error(f"Error in weather API: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching weather data: {str(e)}")
 
+@app.post("/api/weather/bulk")
+async def get_weather_bulk(req: BulkWeatherRequest):
+    """
+    Get weather data for many locations in one call.
+    - Each location is a city name or "lat,lon".
+    - Results are streamed as NDJSON in completion order, one line per location,
+      with the location's index in the request.
+    """
+    from weather_service import (
+        BULK_WEATHER_CONCURRENCY,
+        BULK_WEATHER_MAX_LOCATIONS,
+        async_get_weather_bulk,
+        extract_prediction_fields,
+    )
+
+    locations = validate_bulk_locations(req.locations, BULK_WEATHER_MAX_LOCATIONS)
+    parsed_date = parse_date_param(req.date)
+    concurrency = min(max(1, req.concurrency or BULK_WEATHER_CONCURRENCY), 64)
+    logger.info(f"Bulk weather requested for {len(locations)} locations, date: {req.date}, concurrency: {concurrency}")
+
+    async def stream_results():
+        start = time.perf_counter()
+        failed = 0
+        async for index, location, weather_data in async_get_weather_bulk(locations, parsed_date, concurrency):
+            line = {"index": index, "location": location}
+            if not location:
+                line["error"] = "Location cannot be empty"
+            elif not weather_data or "error" in weather_data:
+                line["error"] = (weather_data or {}).get("error", "Failed to retrieve weather data")
+            else:
+                try:
+                    line["weather"] = extract_prediction_fields(weather_data, req.date)
+                except (KeyError, ValueError) as e:
+                    line["error"] = f"Weather data incomplete: {e}"
+            if "error" in line:
+                failed += 1
+            yield json.dumps(line) + "\n"
+        logger.info(f"Bulk weather finished: {len(locations)} locations, {failed} failed, "
+                    f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/api/risk")
+async def get_fire_risk(
+    location: str = Query(..., description="Location name or coordinates"),
+    date: str = Query(None, description="Optional date in YYYY-MM-DD format. If not provided, current weather is used.")
+):
+    """
+    Fetch weather for a location and score it in one request.
+    - Same inputs as /api/weather; the response carries the weather fields
+      used for scoring together with the fire probability.
+    """
+    logger.info(f"Fire risk requested for location: {location}, date: {date}")
+
+    if not location or location.strip() == "":
+        logger.error("Empty location provided")
+        raise HTTPException(status_code=400, detail="Location cannot be empty")
+
+    try:
+        from weather_service import async_get_weather_data, extract_prediction_fields
+    except ImportError:
+        logger.error("Weather service module not found")
+        raise HTTPException(status_code=500, detail="Weather service not available")
+
+    location = location.strip()
+    parsed_date = parse_date_param(date)
+
+    start = time.perf_counter()
+    weather_data = await async_get_weather_data(location, parsed_date)
+    if not weather_data or "error" in weather_data:
+        error = (weather_data or {}).get("error", "Failed to retrieve weather data")
+        logger.error(f"Error fetching weather: {error}")
+        raise HTTPException(status_code=500, detail=error)
+
+    try:
+        # Score the same rounded fields /api/weather returns, so the result matches the two-call flow
+        weather = extract_prediction_fields(weather_data, date)
+    except (KeyError, ValueError) as e:
+        logger.error(f"Incomplete weather data for {location}: {e}")
+        raise HTTPException(status_code=500, detail=f"Weather data incomplete: {e}")
+    fetched = time.perf_counter()
+
+    try:
+        probability = await score_fire_request(FireRequest(**weather, location=location))
+    except Exception as e:
+        logger.error(f"Error in risk prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Error making prediction: {str(e)}")
+    finished = time.perf_counter()
+
+    return {
+        "location": location,
+        "date": weather["date"],
+        "fire_probability": probability,
+        "prediction_method": "model" if fire_model.ready else "rule-based",
+        "weather": weather,
+        "timing_ms": {
+            "weather": round((fetched - start) * 1000, 3),
+            "predict": round((finished - fetched) * 1000, 3),
+            "total": round((finished - start) * 1000, 3)
+        }
+    }
+
+@app.post("/api/risk/batch")
+async def get_fire_risk_batch(req: BulkWeatherRequest):
+    """
+    Fetch weather for many locations and score them together.
+    - Weather is fetched concurrently (as in /api/weather/bulk) and all
+      locations are scored in a single model call.
+    - Results are returned in input order; failed locations carry an error.
+    """
+    try:
+        from weather_service import (
+            BULK_WEATHER_CONCURRENCY,
+            BULK_WEATHER_MAX_LOCATIONS,
+            async_get_weather_bulk,
+            extract_prediction_fields,
+        )
+    except ImportError:
+        logger.error("Weather service module not found")
+        raise HTTPException(status_code=500, detail="Weather service not available")
+
+    locations = validate_bulk_locations(req.locations, BULK_WEATHER_MAX_LOCATIONS)
+    parsed_date = parse_date_param(req.date)
+    concurrency = min(max(1, req.concurrency or BULK_WEATHER_CONCURRENCY), 64)
+    logger.info(f"Fire risk requested for {len(locations)} locations, date: {req.date}")
+
+    start = time.perf_counter()
+    results = [None] * len(locations)
+    async for index, location, weather_data in async_get_weather_bulk(locations, parsed_date, concurrency):
+        if not location:
+            results[index] = {"location": location, "error": "Location cannot be empty"}
+        elif not weather_data or "error" in weather_data:
+            results[index] = {"location": location,
+                              "error": (weather_data or {}).get("error", "Failed to retrieve weather data")}
+        else:
+            try:
+                results[index] = {"location": location, "weather": extract_prediction_fields(weather_data, req.date)}
+            except (KeyError, ValueError) as e:
+                results[index] = {"location": location, "error": f"Weather data incomplete: {e}"}
+    fetched = time.perf_counter()
+
+    scored = [result for result in results if "weather" in result]
+    if scored:
+        base = [[result["weather"][name] for name in BASE_FEATURES] for result in scored]
+        model = await fire_model.get()
+        try:
+            probabilities = await run_in_threadpool(predict_base, model, base)
+        except Exception as e:
+            logger.error(f"Error in batch risk prediction: {e}")
+            raise HTTPException(status_code=500, detail=f"Error making batch prediction: {str(e)}")
+        for result, probability in zip(scored, probabilities):
+            result["fire_probability"] = probability
+    finished = time.perf_counter()
+
+    logger.info(f"Fire risk for {len(locations)} locations ({len(locations) - len(scored)} failed) "
+                f"in {(finished - start) * 1000:.0f} ms")
+
+    return {
+        "count": len(results),
+        "results": results,
+        "prediction_method": "model" if fire_model.ready else "rule-based",
+        "timing_ms": {
+            "weather": round((fetched - start) * 1000, 3),
+            "predict": round((finished - fetched) * 1000, 3),
+            "total": round((finished - start) * 1000, 3)
+        }
+    }
+
+async def serve_geoparquet_bbox(layer, bbox, limit):
+    """
+    Features of a layer intersecting `bbox`, read lazily from its GeoParquet file.
+    Only the row groups overlapping the box are read; nothing is cached in memory.
+    """
+    if not parquet_available:
+        raise HTTPException(status_code=503, detail="bbox queries need the pyarrow and shapely packages")
+    box = parse_bbox_param(bbox)
+    result = await run_in_threadpool(geoparquet_service.query, layer, box, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"GeoParquet data for {layer} not found (run scripts/filter_geojson.py)")
+    body, stats = result
+    logger.info(f"{layer} bbox {bbox}: {stats['features']} features from "
+                f"{stats['row_groups']}/{stats['total_row_groups']} row groups in {stats['query_ms']} ms")
+    return Response(content=body, media_type="application/json",
+                    headers={"Server-Timing": f"query;dur={stats['query_ms']}"})
+
 @app.get("/api/geojson/fire")
-async def get_fire_geojson():
+async def get_fire_geojson(
+    request: Request,
+    bbox: str = Query(None, description="Optional min_lon,min_lat,max_lon,max_lat; served from GeoParquet"),
+    limit: int = Query(None, ge=1, description="Maximum number of features (with bbox)")
+):
     """API endpoint that provides California fire GeoJSON data"""
     logger.info("Fire GeoJSON data requested")
+    if bbox:
+        return await serve_geoparquet_bbox("fire", bbox, limit)
     
     # Use optimized GeoJSON file
     fire_geojson_path = "static/data/fires_filtered.geojson"
@@ -450,19 +774,21 @@ async def get_fire_geojson():
         raise HTTPException(status_code=404, detail="Fire GeoJSON data not found")
     
     try:
-        fire_data = read_geojson_file(fire_geojson_path)
-        if not fire_data:
-            raise HTTPException(status_code=500, detail="Failed to read fire GeoJSON data")
-            
-        return fire_data
+        return await serve_geojson(request, fire_geojson_path)
     except Exception as e:
         logger.error(f"Error serving fire GeoJSON: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing fire GeoJSON: {str(e)}")
         
 @app.get("/api/geojson/ecoregion")
-async def get_ecoregion_geojson():
+async def get_ecoregion_geojson(
+    request: Request,
+    bbox: str = Query(None, description="Optional min_lon,min_lat,max_lon,max_lat; served from GeoParquet"),
+    limit: int = Query(None, ge=1, description="Maximum number of features (with bbox)")
+):
     """API endpoint that provides ecoregion GeoJSON data (used by map.js when ecoregion layers are enabled)"""
     logger.info("Ecoregion GeoJSON data requested")
+    if bbox:
+        return await serve_geoparquet_bbox("ecoregion", bbox, limit)
     
     # Use optimized GeoJSON file
     eco_geojson_path = "static/data/ecoregions_filtered.geojson"
@@ -477,16 +803,156 @@ async def get_ecoregion_geojson():
         raise HTTPException(status_code=404, detail="Ecoregion GeoJSON data not found")
     
     try:
-        eco_data = read_geojson_file(eco_geojson_path)
-        if not eco_data:
-            raise HTTPException(status_code=500, detail="Failed to read ecoregion GeoJSON data")
-            
-        return eco_data
+        return await serve_geojson(request, eco_geojson_path)
     except Exception as e:
         logger.error(f"Error serving ecoregion GeoJSON: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing ecoregion GeoJSON: {str(e)}")
 
 
+def parse_cause_param(cause):
+    """Comma-separated CAUSE codes -> list of ints, raising 400 on bad input."""
+    if not cause:
+        return None
+    try:
+        return [int(code) for code in cause.split(",") if code.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cause must be a comma-separated list of cause codes")
+
+async def query_fire_index(run_query):
+    """Run `run_query(index)` against the fire index and return a GeoJSON FeatureCollection response."""
+    if not index_available:
+        raise HTTPException(status_code=503, detail="Fire queries need the shapely package")
+    index = fire_index.current()
+    if index is None:
+        index = await run_in_threadpool(fire_index.load)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Fire GeoJSON data not found")
+
+    start = time.perf_counter()
+    body = run_query(index)
+    elapsed = (time.perf_counter() - start) * 1000
+    return Response(content=body, media_type="application/json",
+                    headers={"Server-Timing": f"query;dur={elapsed:.3f}"})
+
+def parse_bbox_param(bbox):
+    """"min_lon,min_lat,max_lon,max_lat" -> tuple of floats, raising 400 on bad input."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    return min_lon, min_lat, max_lon, max_lat
+
+@app.get("/api/fires/query")
+async def query_fires_bbox(
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    year_from: int = Query(None, description="Earliest fire year (YEAR_)"),
+    year_to: int = Query(None, description="Latest fire year (YEAR_)"),
+    cause: str = Query(None, description="Comma-separated CAUSE codes"),
+    limit: int = Query(None, ge=1, description="Maximum number of features")
+):
+    """Historical fire perimeters intersecting a bounding box, as a GeoJSON FeatureCollection"""
+    min_lon, min_lat, max_lon, max_lat = parse_bbox_param(bbox)
+    causes = parse_cause_param(cause)
+    logger.info(f"Fire bbox query: {bbox}, years {year_from}-{year_to}, cause {cause}")
+
+    return await query_fire_index(lambda index: index.feature_collection(
+        index.query_bbox(min_lon, min_lat, max_lon, max_lat, year_from=year_from, year_to=year_to, causes=causes),
+        limit
+    ))
+
+@app.get("/api/fires/at")
+async def query_fires_at_point(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    year_from: int = Query(None, description="Earliest fire year (YEAR_)"),
+    year_to: int = Query(None, description="Latest fire year (YEAR_)"),
+    cause: str = Query(None, description="Comma-separated CAUSE codes")
+):
+    """Historical fire perimeters containing a point (has this place burned before?)"""
+    causes = parse_cause_param(cause)
+    logger.info(f"Fire point query: {lat},{lon}, years {year_from}-{year_to}, cause {cause}")
+
+    return await query_fire_index(lambda index: index.feature_collection(
+        index.query_point(lon, lat, year_from=year_from, year_to=year_to, causes=causes)
+    ))
+
+@app.get("/api/fires/stats")
+async def get_fire_stats(
+    group_by: str = Query("year", description="Comma-separated keys: year, unit, cause"),
+    year_from: int = Query(None, description="Earliest fire year (YEAR_)"),
+    year_to: int = Query(None, description="Latest fire year (YEAR_)"),
+    cause: str = Query(None, description="Comma-separated CAUSE codes"),
+    unit: str = Query(None, description="Comma-separated UNIT_ID values"),
+    bbox: str = Query(None, description="Optional min_lon,min_lat,max_lon,max_lat"),
+    bounds: bool = Query(False, description="Include each group's min_lon,min_lat,max_lon,max_lat")
+):
+    """Fire counts and total acres grouped by year, unit and/or cause"""
+    keys = [key.strip() for key in group_by.split(",") if key.strip()]
+    unknown = [key for key in keys if key not in GROUP_KEYS]
+    if unknown or len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail=f"group_by must be distinct keys from: {', '.join(GROUP_KEYS)}")
+    filters = {
+        "year_from": year_from,
+        "year_to": year_to,
+        "causes": parse_cause_param(cause),
+        "units": [u.strip() for u in unit.split(",") if u.strip()] if unit else None
+    }
+    box = parse_bbox_param(bbox) if bbox else None
+    logger.info(f"Fire stats requested: group_by={keys}, filters={filters}, bbox={bbox}")
+
+    def run_query(index):
+        groups, totals = index.attributes.group_by(keys, index.select(box, **filters),
+                                                   extents=index.bounds if bounds else None)
+        return json.dumps({"group_by": keys, "groups": groups, "total": totals}).encode("utf-8")
+
+    return await query_fire_index(run_query)
+
+@app.get("/api/tiles/{layer}/{z}/{x}/{y}.mvt")
+async def get_vector_tile(request: Request, layer: str, z: int, x: int, y: int):
+    """
+    Mapbox Vector Tile for the fire perimeter ("fires") or ecoregion ("ecoregions") layer.
+    - Geometries are simplified per zoom level and tiles are cached on disk (MBTiles).
+    - Returns 204 for tiles with no features.
+    """
+    if layer not in TILE_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown tile layer: {layer}")
+    if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=400, detail="Tile coordinates out of range")
+    if not tiles_available:
+        raise HTTPException(status_code=503, detail="Vector tiles need the shapely and mapbox-vector-tile packages")
+
+    # The ETag only depends on the source version and tile address, so revalidation skips rendering
+    version = tile_service.version(layer)
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"Source data for tile layer {layer} not found")
+    encoding = choose_encoding(request.headers.get("accept-encoding"), {"gzip"})
+    headers = {
+        "ETag": f'"{layer}-{version}-{z}-{x}-{y}{ETAG_SUFFIXES[encoding]}"',
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        data = await run_in_threadpool(tile_service.get_tile, layer, z, x, y)
+    except Exception as e:
+        logger.error(f"Error rendering tile {layer}/{z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error rendering tile: {str(e)}")
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Source data for tile layer {layer} not found")
+    if not data:
+        return Response(status_code=204, headers=headers)
+
+    media_type = "application/vnd.mapbox-vector-tile"
+    if encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=data, media_type=media_type, headers=headers)
+    return Response(content=gzip.decompress(data), media_type=media_type, headers=headers)
+
+
 @app.post("/api/satellite/upload")
 async def upload_satellite_image(file: UploadFile = File(...)):
     """Upload satellite image file"""
@@ -500,85 +966,251 @@ async def upload_satellite_image(file: UploadFile = File(...)):
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="Only image files are accepted")
             
-        # Generate unique file ID
-        file_id = str(uuid.uuid4())
-        
-        # Create upload directory
-        upload_dir = "static/uploads/satellite"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Save file
-        file_path = os.path.join(upload_dir, f"{file_id}.jpg")
+        # The file ID is the SHA-256 of the content, so the same image is stored only once
         content = await file.read()
-        
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        file_id, stored = await run_in_threadpool(store_upload, content)
             
-        logger.info(f"Satellite image uploaded successfully, file ID: {file_id}")
+        logger.info(f"Satellite image uploaded successfully, file ID: {file_id}"
+                    f"{'' if stored else ' (already stored)'}")
         
         return {
             "status": "success",
             "file_id": file_id,
+            "deduplicated": not stored,
             "message": "File uploaded successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading satellite image: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
 
+# Seconds clients are asked to wait when the satellite inference queue is full
+SATELLITE_RETRY_AFTER = int(os.getenv("SATELLITE_RETRY_AFTER", "5"))
+
+async def get_satellite_api():
+    """The loaded SatelliteImageAPI module (waits while the model loads), raising 503 when it is unavailable."""
+    satellite_api = await satellite_model.get()
+    if satellite_api is None:
+        error = satellite_model.error or "torch is not installed"
+        logger.error(f"Satellite model unavailable: {error}")
+        raise HTTPException(status_code=503, detail=f"Satellite model unavailable: {error}")
+    return satellite_api
+
+async def satellite_model_version():
+    """
+    Model version for result cache keys, known without loading the model: the loaded
+    model's version, or before that the configured model file's (None if it is missing).
+    """
+    if satellite_model.ready:
+        return satellite_model.value.MODEL_VERSION
+    return await run_in_threadpool(configured_model_version)
+
+def parse_upload_id(file_id):
+    """Validate an upload ID (the image's SHA-256, see store_upload), raising 400 when malformed."""
+    file_id = file_id.strip().lower()
+    if not re.fullmatch(r"[0-9a-f]{64}", file_id):
+        raise HTTPException(status_code=400, detail=f"Invalid file ID: {file_id}")
+    return file_id
+
+def upload_path(file_id):
+    return os.path.join(SATELLITE_UPLOAD_DIR, f"{file_id}.jpg")
+
+def read_upload(file_id):
+    with open(upload_path(file_id), "rb") as image_file:
+        return image_file.read()
+
+def satellite_model_error(error):
+    """HTTPException for an error raised by the satellite inference pool: 429 when its queue is full."""
+    if isinstance(error, satellite_model.value.InferenceQueueFull):
+        logger.warning(f"Satellite inference rejected: {str(error)}")
+        return HTTPException(status_code=429, detail=str(error), headers={"Retry-After": str(SATELLITE_RETRY_AFTER)})
+    logger.error(f"Model prediction error: {str(error)}")
+    return HTTPException(status_code=500, detail=f"Error in model prediction: {str(error)}")
+
 @app.post("/api/satellite/analyze")
 async def analyze_satellite_image(file_id: str = Form(...), location: str = Form(None)):
     """Analyze uploaded satellite image for fire risk"""
     logger.info(f"Satellite image analysis request received, file ID: {file_id}")
-    print(f"Starting analysis for file_id: {file_id}")
     
     try:
-        # Get the image file path
-        file_path = os.path.join("static/uploads/satellite", f"{file_id}.jpg")
+        # The file ID is the image's SHA-256, so it is also the result cache key
+        image_hash = parse_upload_id(file_id)
+        file_path = upload_path(image_hash)
         if not os.path.exists(file_path):
             logger.error(f"Image file not found: {file_path}")
-            print(f"Error: Image file not found at {file_path}")
             raise HTTPException(status_code=404, detail="Image file not found")
         
-        print(f"Image file found at: {file_path}")
-            
-        # Read the image file
-        with open(file_path, "rb") as image_file:
-            image_content = image_file.read()
-        
+        start = time.perf_counter()
+        version = await satellite_model_version()
+        cached = satellite_results.get(image_hash, version) if version else MISSING
+        if cached is not MISSING:
+            # Known image: answered without reading the file or loading the model
+            logger.info(f"Analysis served from cache. Predicted class: {cached['predicted_class']}")
+            return {**cached, "cached": True,
+                    "timing_ms": {"total": round((time.perf_counter() - start) * 1000, 3)}}
+
+        satellite_api = await get_satellite_api()
+        image_content = await run_in_threadpool(read_upload, image_hash)
         try:
-            # Import the prediction function from SatelliteImageAPI
-            from Satellite_pic_predict.SatelliteImageAPI import predict_image_from_bytes
-            
-            # Call the prediction function directly with image content
-            prediction = await predict_image_from_bytes(image_content)
+            # Decode and inference run on the pool's threads, not on the event loop;
+            # concurrent analyses of the same image share one model call
+            prediction, timing = await satellite_results.flights.run(
+                (satellite_api.MODEL_VERSION, image_hash),
+                lambda: satellite_api.inference_pool.predict(image_content)
+            )
             
             # Log the prediction result
-            print(f"Prediction result: {prediction}")
-            logger.info(f"Analysis completed. Predicted class: {prediction.predicted_class}, Confidence: {prediction.confidence}")
+            logger.info(f"Analysis completed. Predicted class: {prediction.predicted_class}, Confidence: {prediction.confidence}, timing (ms): {timing}")
             
             # 将Pydantic模型转换为字典并返回
             result = {
                 "predicted_class": prediction.predicted_class,
                 "confidence": prediction.confidence
             }
-            
-            # 打印结果，确保格式正确
-            print(f"Returning JSON result: {result}")
+            satellite_results.set(image_hash, satellite_api.MODEL_VERSION, result)
             
             # Return the prediction result
-            return result
+            return {**result, "cached": False, "timing_ms": timing}
             
         except Exception as model_error:
-            print(f"Model prediction error: {str(model_error)}")
-            logger.error(f"Model prediction error: {str(model_error)}")
-            raise HTTPException(status_code=500, detail=f"Error in model prediction: {str(model_error)}")
+            raise satellite_model_error(model_error)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error analyzing satellite image: {str(e)}")
         logger.error(f"Error analyzing satellite image: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
+# Limits for /api/satellite/analyze/batch
+SATELLITE_BATCH_MAX_IMAGES = int(os.getenv("SATELLITE_BATCH_MAX_IMAGES", "1000"))
+SATELLITE_ZIP_MAX_BYTES = int(os.getenv("SATELLITE_ZIP_MAX_BYTES", str(512 * 1024 * 1024)))
+SATELLITE_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+def read_zip_images(data, max_images):
+    """(name, bytes) for each image in a zip archive, in archive order, raising 400 on bad or oversized archives."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="archive must be a zip file")
+    with archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not os.path.basename(info.filename).startswith(".")
+            and not info.filename.startswith("__MACOSX/")
+            and info.filename.lower().endswith(SATELLITE_IMAGE_EXTENSIONS)
+        ]
+        if len(entries) > max_images:
+            raise HTTPException(status_code=400, detail=f"At most {max_images} images per request")
+        # Checked before extracting anything, so a zip bomb is refused up front
+        if sum(info.file_size for info in entries) > SATELLITE_ZIP_MAX_BYTES:
+            raise HTTPException(status_code=400, detail=f"Archive expands to more than {SATELLITE_ZIP_MAX_BYTES} bytes")
+        return [(info.filename, archive.read(info)) for info in entries]
+
+def find_uploaded_images(file_ids, max_images):
+    """Validated IDs of previously uploaded images, raising 400/404 on bad or unknown IDs (nothing is read)."""
+    if len(file_ids) > max_images:
+        raise HTTPException(status_code=400, detail=f"At most {max_images} images per request")
+    found = []
+    for file_id in file_ids:
+        file_id = parse_upload_id(file_id)
+        if not os.path.exists(upload_path(file_id)):
+            raise HTTPException(status_code=404, detail=f"Image file not found: {file_id}")
+        found.append(file_id)
+    return found
+
+@app.post("/api/satellite/analyze/batch")
+async def analyze_satellite_images_batch(
+    file_ids: List[str] = Form(None),
+    archive: UploadFile = File(None),
+    batch_size: int = Form(None),
+    location: str = Form(None)
+):
+    """
+    Classify many satellite images in one request.
+    - Images are uploaded file IDs (repeated or comma-separated `file_ids`) and/or a zip `archive` of tiles.
+    - Images are decoded concurrently and classified in batches of `batch_size` (default SATELLITE_BATCH_SIZE),
+      one forward pass per batch.
+    """
+    ids = [file_id.strip() for value in (file_ids or []) for file_id in value.split(",") if file_id.strip()]
+    if not ids and archive is None:
+        raise HTTPException(status_code=400, detail="Provide file_ids and/or a zip archive of images")
+    if batch_size is not None and batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be positive")
+
+    # Uploaded images are keyed by their ID (the SHA-256); archive images are hashed here
+    hashes = await run_in_threadpool(find_uploaded_images, ids, SATELLITE_BATCH_MAX_IMAGES)
+    sources = [{"file_id": file_id} for file_id in hashes]
+    archived = {}
+    start = time.perf_counter()
+    if archive is not None:
+        data = await archive.read()
+        entries = await run_in_threadpool(read_zip_images, data, SATELLITE_BATCH_MAX_IMAGES - len(hashes))
+        entry_hashes = await run_in_threadpool(lambda: [content_hash(content) for _, content in entries])
+        for (name, content), image_hash in zip(entries, entry_hashes):
+            sources.append({"name": name})
+            hashes.append(image_hash)
+            archived[image_hash] = content
+    if not hashes:
+        raise HTTPException(status_code=400, detail="No images found in the request")
+    logger.info(f"Satellite batch analysis request: {len(hashes)} images, location {location}")
+
+    # Only images without a cached result go to the model, each distinct image once;
+    # when every image is cached the model is never loaded
+    version = await satellite_model_version()
+    cached = {}
+    pending = []
+    for image_hash in dict.fromkeys(hashes):
+        result = satellite_results.get(image_hash, version) if version else MISSING
+        if result is MISSING:
+            pending.append(image_hash)
+        else:
+            cached[image_hash] = result
+
+    timing = {"decode": 0.0, "queue": 0.0, "inference": 0.0}
+    computed = {}
+    if pending:
+        satellite_api = await get_satellite_api()
+        contents = await run_in_threadpool(
+            lambda: [archived[image_hash] if image_hash in archived else read_upload(image_hash) for image_hash in pending]
+        )
+        try:
+            predictions, timing = await satellite_api.inference_pool.predict_many(contents, batch_size)
+        except Exception as e:
+            raise satellite_model_error(e)
+        for image_hash, prediction in zip(pending, predictions):
+            if isinstance(prediction, satellite_api.ImagePrediction):
+                computed[image_hash] = {"predicted_class": prediction.predicted_class, "confidence": prediction.confidence}
+                satellite_results.set(image_hash, satellite_api.MODEL_VERSION, computed[image_hash])
+            else:
+                computed[image_hash] = {"error": str(prediction)}
+    timing["total"] = round((time.perf_counter() - start) * 1000, 3)
+
+    results = []
+    summary = {}
+    for source, image_hash in zip(sources, hashes):
+        result = cached.get(image_hash) or computed[image_hash]
+        results.append({**source, **result, "cached": image_hash in cached})
+        if "predicted_class" in result:
+            summary[result["predicted_class"]] = summary.get(result["predicted_class"], 0) + 1
+    logger.info(f"Satellite batch analysis completed: {len(hashes)} images ({len(cached)} cached, "
+                f"{len(pending)} classified) in {timing['total']:.0f} ms, classes {summary}")
+
+    return {
+        "count": len(results),
+        "batch_size": batch_size or SATELLITE_BATCH_SIZE,
+        "location": location,
+        "summary": summary,
+        "cache_hits": sum(result["cached"] for result in results),
+        "results": results,
+        "timing_ms": {
+            **timing,
+            "per_image": round(timing["total"] / len(results), 3)
+        }
+    }
+
 # Add test endpoint to verify API is working properly
 @app.get("/api/test")
 async def test_api():
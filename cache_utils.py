@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.cache")
+
+# Returned by TTLCache.get when a key is absent or expired (None is a valid cached value)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+
+    `None` can be cached (used for negative results); absent or expired keys
+    return MISSING. Safe to share between the event loop and worker threads.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def remaining_ttl(self, key):
+        """Seconds left before `key` expires, or None if it is not cached."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            return max(0.0, entry[1] - time.monotonic())
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return MISSING if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+class SingleFlight:
+    """
+    De-duplicate concurrent async calls by key.
+
+    The first caller for a key starts the work. Callers that arrive while it
+    is still running await the same task instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key, factory):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+
+class SQLiteCacheStore:
+    """
+    Persistent key/value backing store for a TTLCache, in a single SQLite file.
+
+    Values are JSON-encoded and carry a wall-clock expiry, so entries survive
+    restarts but still age out.
+    """
+
+    def __init__(self, path, table="cache"):
+        self.path = path
+        self.table = table
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """Return (value, seconds_left), or MISSING if absent or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return MISSING
+        value, expires_at = row
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            self.delete(key)
+            return MISSING
+        return json.loads(value), remaining
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl)
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
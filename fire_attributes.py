@@ -0,0 +1,156 @@
+import numpy as np
+
+# Perimeter properties kept in the columnar store
+STRING_COLUMNS = ["FIRE_NAME", "ALARM_DATE", "CONT_DATE", "UNIT_ID"]
+
+# group_by names accepted by FireAttributes.group_by
+GROUP_KEYS = ["year", "unit", "cause"]
+
+
+def _as_int(value, default=-1):
+    """Integer property value (YEAR_ and CAUSE come as int, float or string), or `default`."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class DictColumn:
+    """Dictionary-encoded string column: int32 codes into sorted distinct values (-1 = missing)."""
+
+    def __init__(self, values):
+        present = np.array([v is not None and v != "" for v in values], dtype=bool)
+        strings = np.array([str(v) for v, ok in zip(values, present) if ok], dtype=object)
+        self.codes = np.full(len(values), -1, dtype=np.int32)
+        if len(strings):
+            self.categories, inverse = np.unique(strings, return_inverse=True)
+            self.codes[present] = inverse
+        else:
+            self.categories = np.array([], dtype=object)
+
+    def code_of(self, value):
+        """Code for `value`, or None if it never occurs."""
+        i = int(np.searchsorted(self.categories, value))
+        if i < len(self.categories) and self.categories[i] == value:
+            return i
+        return None
+
+    def value(self, code):
+        return None if code < 0 else str(self.categories[code])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(len(v) for v in self.categories)
+
+
+def _acres(props):
+    acres = props.get("ACRES")
+    return acres if acres is not None else props.get("GIS_ACRES")
+
+
+class FireAttributes:
+    """
+    Fire perimeter properties stored column-wise in NumPy arrays.
+
+    Numeric properties are plain arrays (-1 / NaN for missing values); string
+    properties are dictionary-encoded. Filters and group-bys run over whole
+    columns instead of walking feature dicts.
+    """
+
+    def __init__(self, properties):
+        self.objectid = np.array([_as_int(p.get("OBJECTID")) for p in properties], dtype=np.int64)
+        self.year = np.array([_as_int(p.get("YEAR_")) for p in properties], dtype=np.int32)
+        self.cause = np.array([_as_int(p.get("CAUSE")) for p in properties], dtype=np.int32)
+        # Filtered files carry ACRES, the raw CAL FIRE export GIS_ACRES (older filtered files have ACRES: null)
+        self.acres = np.array([_as_float(_acres(p)) for p in properties], dtype=np.float64)
+        self.strings = {name: DictColumn([p.get(name) for p in properties]) for name in STRING_COLUMNS}
+
+    def __len__(self):
+        return len(self.year)
+
+    @property
+    def nbytes(self):
+        numeric = self.objectid.nbytes + self.year.nbytes + self.cause.nbytes + self.acres.nbytes
+        return numeric + sum(column.nbytes for column in self.strings.values())
+
+    def mask(self, indices=None, year_from=None, year_to=None, causes=None, units=None):
+        """
+        Boolean mask over `indices` (or all rows) of the rows passing every filter.
+
+        `causes` is a list of CAUSE codes and `units` a list of UNIT_ID values.
+        """
+        rows = slice(None) if indices is None else indices
+        n = len(self) if indices is None else len(indices)
+        mask = np.ones(n, dtype=bool)
+        if year_from is not None:
+            mask &= self.year[rows] >= year_from
+        if year_to is not None:
+            mask &= self.year[rows] <= year_to
+        if causes:
+            mask &= np.isin(self.cause[rows], causes)
+        if units:
+            unit_column = self.strings["UNIT_ID"]
+            codes = [code for code in (unit_column.code_of(unit) for unit in units) if code is not None]
+            mask &= np.isin(unit_column.codes[rows], codes)
+        return mask
+
+    def _key_column(self, key, rows):
+        """(per-row group ids, decoded value of each group id) for one group key."""
+        if key in ("year", "cause"):
+            values, inverse = np.unique(self.year[rows] if key == "year" else self.cause[rows], return_inverse=True)
+            return inverse, [None if v < 0 else v for v in values.tolist()]
+        if key == "unit":
+            column = self.strings["UNIT_ID"]
+            values, inverse = np.unique(column.codes[rows], return_inverse=True)
+            return inverse, [column.value(code) for code in values.tolist()]
+        raise ValueError(f"Unsupported group key: {key} (expected one of {', '.join(GROUP_KEYS)})")
+
+    def group_by(self, keys, rows, extents=None):
+        """
+        Fire count and summed acres per distinct combination of `keys` over `rows`.
+
+        `rows` is an array of row indices. Groups are returned sorted by key.
+        With `extents` (an (n, 4) array of per-row min_lon, min_lat, max_lon,
+        max_lat), each group also gets the "bounds" enclosing its rows.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        acres = np.nan_to_num(self.acres[rows])
+        totals = {"count": int(len(rows)), "acres": round(float(acres.sum()), 2)}
+        if not keys or len(rows) == 0:
+            return [], totals
+
+        columns = [self._key_column(key, rows) for key in keys]
+        sizes = [len(values) for _, values in columns]
+        combined = np.ravel_multi_index([inverse for inverse, _ in columns], sizes)
+        groups, group_of_row = np.unique(combined, return_inverse=True)
+        counts = np.bincount(group_of_row, minlength=len(groups)).tolist()
+        sums = np.round(np.bincount(group_of_row, weights=acres, minlength=len(groups)), 2).tolist()
+        if extents is not None:
+            boxes = np.asarray(extents)[rows]
+            lower = np.full((len(groups), 2), np.inf)
+            upper = np.full((len(groups), 2), -np.inf)
+            np.minimum.at(lower, group_of_row, boxes[:, :2])
+            np.maximum.at(upper, group_of_row, boxes[:, 2:])
+            bounds = np.round(np.hstack([lower, upper]), 5).tolist()
+
+        # Decode each key for all groups at once, then zip into records
+        decoded = [
+            [values[i] for i in ids.tolist()]
+            for ids, (_, values) in zip(np.unravel_index(groups, sizes), columns)
+        ]
+        results = []
+        for g, group_values in enumerate(zip(*decoded)):
+            entry = dict(zip(keys, group_values))
+            entry["count"] = counts[g]
+            entry["acres"] = sums[g]
+            if extents is not None:
+                entry["bounds"] = bounds[g]
+            results.append(entry)
+        return results, totals
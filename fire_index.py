@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+from fire_attributes import FireAttributes
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.fires")
+
+# shapely is only needed for the spatial queries
+try:
+    import shapely
+    index_available = True
+except ImportError:
+    shapely = None
+    index_available = False
+
+# Same perimeter files /api/geojson/fire serves, first existing one wins
+FIRE_SOURCES = [
+    os.getenv("FIRE_GEOJSON_PATH", "static/data/fires_filtered.geojson"),
+    "FireGeoData/California_Fire_Perimeters_(all).geojson"
+]
+# How often (seconds) the source file's mtime is checked for changes
+RELOAD_INTERVAL = float(os.getenv("FIRE_INDEX_RELOAD_INTERVAL", "5"))
+
+
+def resolve_fire_source():
+    """Path of the first existing fire perimeter file, or None."""
+    for path in FIRE_SOURCES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class FireIndex:
+    """
+    STR-tree over fire perimeter geometries (lon/lat), plus a columnar store of their properties.
+
+    Each feature is kept as its pre-serialized GeoJSON bytes, so a query
+    result is assembled by joining bytes rather than re-encoding dicts.
+    """
+
+    def __init__(self, path):
+        start = time.perf_counter()
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        features = [feature for feature in data.get("features", []) if feature.get("geometry")]
+        del data
+
+        # Serialize each feature once; GEOS reads the geometry straight from the same bytes
+        encoded = [json.dumps(feature, ensure_ascii=False, separators=(",", ":")) for feature in features]
+        geoms = shapely.from_geojson(encoded, on_invalid="ignore")
+        present = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms)
+        features = [feature for feature, ok in zip(features, present) if ok]
+        self.features = [text.encode("utf-8") for text, ok in zip(encoded, present) if ok]
+        del encoded
+        self.geometries = geoms[present]
+        # Prepared geometries make repeated intersects/contains tests much cheaper
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+        # Per-perimeter min_lon, min_lat, max_lon, max_lat, for group bounds in /api/fires/stats
+        self.bounds = shapely.bounds(self.geometries)
+
+        self.attributes = FireAttributes([feature.get("properties") or {} for feature in features])
+
+        self.build_ms = (time.perf_counter() - start) * 1000
+        self.memory_bytes = self._estimate_memory()
+        logger.info(f"Fire index built from {path}: {len(self)} perimeters in {self.build_ms:.0f} ms, "
+                    f"~{self.memory_bytes / (1024 * 1024):.1f} MB")
+
+    def __len__(self):
+        return len(self.features)
+
+    def _estimate_memory(self):
+        """Rough resident size: serialized features, coordinates (16 bytes each) and attribute columns."""
+        coords = int(shapely.get_num_coordinates(self.geometries).sum())
+        return sum(len(b) for b in self.features) + coords * 16 + self.bounds.nbytes + self.attributes.nbytes
+
+    def _filter(self, indices, **filters):
+        if len(indices) == 0:
+            return indices
+        return np.sort(indices[self.attributes.mask(indices, **filters)])
+
+    def select(self, bbox=None, **filters):
+        """Indices (file order) of all perimeters, or those intersecting `bbox`, passing the attribute filters."""
+        if bbox is not None:
+            return self.query_bbox(*bbox, **filters)
+        return np.flatnonzero(self.attributes.mask(**filters))
+
+    def query_bbox(self, min_lon, min_lat, max_lon, max_lat, **filters):
+        """Indices (file order) of perimeters intersecting the bounding box."""
+        indices = self.tree.query(shapely.box(min_lon, min_lat, max_lon, max_lat), predicate="intersects")
+        return self._filter(indices, **filters)
+
+    def query_point(self, lon, lat, **filters):
+        """Indices (file order) of perimeters containing (or touching) the point."""
+        indices = self.tree.query(shapely.Point(lon, lat), predicate="intersects")
+        return self._filter(indices, **filters)
+
+    def feature_collection(self, indices, limit=None):
+        """GeoJSON FeatureCollection bytes for `indices`."""
+        if limit is not None:
+            indices = indices[:limit]
+        return (b'{"type":"FeatureCollection","features":['
+                + b",".join(self.features[i] for i in indices)
+                + b"]}")
+
+    def info(self):
+        return {
+            "source": self.path,
+            "features": len(self),
+            "build_ms": round(self.build_ms, 1),
+            "memory_mb": round(self.memory_bytes / (1024 * 1024), 1)
+        }
+
+
+class FireIndexService:
+    """Builds the fire index on first use (or at startup) and rebuilds it when the source file changes."""
+
+    def __init__(self, reload_interval=RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The built index if it is up to date, else None (the caller should load())."""
+        index = self._index
+        if index is None:
+            return None
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return index
+        path = resolve_fire_source()
+        if path != index.path or path is None or os.path.getmtime(path) != index.mtime:
+            return None
+        self._checked_at = now
+        return index
+
+    def load(self):
+        """Build (or rebuild) the index. Blocking; returns None when no source file exists."""
+        with self._lock:
+            index = self.current()
+            if index is not None:
+                return index
+            path = resolve_fire_source()
+            if path is None:
+                logger.warning("No fire perimeter file found, fire index not built")
+                return None
+            self._index = FireIndex(path)
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def info(self):
+        return None if self._index is None else self._index.info()
+
+
+fire_index = FireIndexService()
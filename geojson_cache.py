@@ -0,0 +1,151 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import logging
+import threading
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.geojson")
+
+# brotli is optional; without it only gzip and identity are served
+try:
+    import brotli
+    brotli_available = True
+except ImportError:
+    brotli = None
+    brotli_available = False
+
+# Suffix of the ETag for each content coding, so every representation has its own strong validator
+ETAG_SUFFIXES = {None: "", "gzip": "-gz", "br": "-br"}
+
+# How often (seconds) a cached file's mtime is checked for changes
+RELOAD_INTERVAL = float(os.getenv("GEOJSON_RELOAD_INTERVAL", "1"))
+GZIP_LEVEL = int(os.getenv("GEOJSON_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("GEOJSON_BROTLI_QUALITY", "9"))
+
+
+class GeoJSONAsset:
+    """One GeoJSON file, serialized once, with its precompressed variants and ETag."""
+
+    def __init__(self, path, mtime, body):
+        self.path = path
+        self.mtime = mtime
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = self.etag_for(None)
+        self.encoded = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+        if brotli_available:
+            self.encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+        self.checked_at = time.monotonic()
+
+    def etag_for(self, encoding):
+        """Strong ETag of the identity body (encoding None) or of one precompressed variant."""
+        return f'"{self.digest}{ETAG_SUFFIXES[encoding]}"'
+
+    def info(self):
+        return {
+            "path": self.path,
+            "etag": self.etag,
+            "bytes": len(self.body),
+            "encoded_bytes": {name: len(data) for name, data in self.encoded.items()}
+        }
+
+
+class GeoJSONCache:
+    """
+    In-memory cache of static GeoJSON files, keyed by path.
+
+    Each file is parsed once to validate it and re-serialized compactly (the
+    same bytes FastAPI's JSONResponse produced), then gzip/brotli variants are
+    built up front. A file is reloaded when its mtime changes; the check runs
+    at most every `reload_interval` seconds.
+    """
+
+    def __init__(self, reload_interval=RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def lookup(self, path):
+        """Return the cached asset if it is still current, else None (the caller should load())."""
+        asset = self._assets.get(path)
+        if asset is None:
+            return None
+        now = time.monotonic()
+        if now - asset.checked_at < self.reload_interval:
+            return asset
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if mtime != asset.mtime:
+            return None
+        asset.checked_at = now
+        return asset
+
+    def load(self, path):
+        """Read, validate and precompress `path`. Blocking; run it off the event loop."""
+        with self._lock:
+            asset = self.lookup(path)
+            if asset is not None:
+                return asset
+
+            start = time.perf_counter()
+            mtime = os.path.getmtime(path)
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+            del data
+            asset = GeoJSONAsset(path, mtime, body)
+            self._assets[path] = asset
+            self.loads += 1
+
+        sizes = ", ".join(f"{name} {len(data) / 1024:.0f} KB" for name, data in asset.encoded.items())
+        logger.info(f"Cached GeoJSON {path}: {len(body) / 1024:.0f} KB ({sizes}) "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return asset
+
+    def stats(self):
+        return {"loads": self.loads, "files": [asset.info() for asset in self._assets.values()]}
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding, available):
+    """Pick the best precompressed variant the client accepts: br, then gzip, else identity (None)."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for name in ("br", "gzip"):
+        if name in available and accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+geojson_cache = GeoJSONCache()
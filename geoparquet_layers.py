@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.geoparquet")
+
+# pyarrow and shapely are only needed for bbox queries against GeoParquet files
+try:
+    import pyarrow.parquet as pq
+    import shapely
+    parquet_available = True
+except ImportError:
+    pq = None
+    shapely = None
+    parquet_available = False
+
+# GeoParquet files written next to the GeoJSON layers by the data scripts, first existing one wins
+LAYERS = {
+    "fire": [
+        "static/data/fires_filtered.parquet",
+        "static/data/fires_optimized.parquet"
+    ],
+    "ecoregion": [
+        "static/data/ecoregions_filtered.parquet",
+        "static/data/ecoregions_optimized.parquet"
+    ]
+}
+
+# Columns written by scripts/geoparquet.py that are not feature properties
+RESERVED_COLUMNS = ("fid", "geometry", "bbox")
+
+
+def resolve_layer(layer):
+    """Path of the first existing GeoParquet file for `layer`, or None."""
+    for path in LAYERS[layer]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _column_index(metadata, path):
+    schema = metadata.schema
+    for i in range(len(schema)):
+        if schema.column(i).path == path:
+            return i
+    raise ValueError(f"GeoParquet file has no column {path}")
+
+
+class GeoParquetLayer:
+    """
+    Bounding-box reader over one GeoParquet file.
+
+    Only the footer is read up front: each row group's extent comes from the
+    min/max statistics of the bbox covering columns. A query reads just the
+    row groups overlapping the box, narrows them with the per-row bbox, and
+    tests the remaining geometries exactly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.metadata = pq.read_metadata(path)
+        self.properties = [name for name in self.metadata.schema.to_arrow_schema().names
+                           if name not in RESERVED_COLUMNS]
+
+        columns = [_column_index(self.metadata, f"bbox.{key}") for key in ("xmin", "ymin", "xmax", "ymax")]
+        extents = np.full((self.metadata.num_row_groups, 4), np.nan)
+        for rg in range(self.metadata.num_row_groups):
+            row_group = self.metadata.row_group(rg)
+            for k, column in enumerate(columns):
+                stats = row_group.column(column).statistics
+                if stats is not None and stats.has_min_max:
+                    # Lower bound of the mins, upper bound of the maxes
+                    extents[rg, k] = stats.min if k < 2 else stats.max
+        self.extents = extents
+        logger.info(f"GeoParquet layer {path}: {self.metadata.num_rows} features in "
+                    f"{self.metadata.num_row_groups} row groups")
+
+    def row_groups(self, min_lon, min_lat, max_lon, max_lat):
+        """Row groups whose extent may overlap the box (groups without statistics are always read)."""
+        e = self.extents
+        overlap = ~((e[:, 0] > max_lon) | (e[:, 2] < min_lon) | (e[:, 1] > max_lat) | (e[:, 3] < min_lat))
+        return np.flatnonzero(overlap | np.isnan(e).any(axis=1)).tolist()
+
+    def query(self, min_lon, min_lat, max_lon, max_lat, limit=None):
+        """
+        GeoJSON FeatureCollection bytes of the features intersecting the box, in
+        source order. Returns (body, stats) where stats counts what was read.
+        """
+        groups = self.row_groups(min_lon, min_lat, max_lon, max_lat)
+        features = []
+        scanned = 0
+        if groups:
+            table = pq.ParquetFile(self.path, metadata=self.metadata).read_row_groups(groups)
+            scanned = table.num_rows
+            bbox = table.column("bbox").combine_chunks()
+            xmin, ymin, xmax, ymax = (bbox.field(key).to_numpy(zero_copy_only=False)
+                                      for key in ("xmin", "ymin", "xmax", "ymax"))
+            # NaN (no geometry) compares False and drops out here
+            near = (xmin <= max_lon) & (xmax >= min_lon) & (ymin <= max_lat) & (ymax >= min_lat)
+            rows = np.flatnonzero(near)
+
+            geoms = shapely.from_wkb(table.column("geometry").take(rows).to_numpy(zero_copy_only=False))
+            exact = shapely.intersects(geoms, shapely.box(min_lon, min_lat, max_lon, max_lat))
+            hits, hit_geoms = rows[exact], geoms[exact]
+
+            fids = table.column("fid").to_numpy()[hits]
+            order = np.argsort(fids, kind="stable")
+            if limit is not None:
+                order = order[:limit]
+            subset = table.select(self.properties).take(hits[order]).to_pylist()
+            geometries = shapely.to_geojson(hit_geoms[order])
+            features = [
+                f'{{"type":"Feature","properties":{json.dumps(props, ensure_ascii=False, separators=(",", ":"))},'
+                f'"geometry":{geometry}}}'
+                for props, geometry in zip(subset, geometries)
+            ]
+
+        body = ('{"type":"FeatureCollection","features":[' + ",".join(features) + "]}").encode("utf-8")
+        return body, {"row_groups": len(groups), "total_row_groups": self.metadata.num_row_groups,
+                      "rows_scanned": scanned, "features": len(features)}
+
+    def info(self):
+        return {
+            "source": self.path,
+            "features": self.metadata.num_rows,
+            "row_groups": self.metadata.num_row_groups
+        }
+
+
+class GeoParquetService:
+    """Opens GeoParquet layers on first use and reopens them when the file changes."""
+
+    def __init__(self):
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    def layer(self, name):
+        """The opened layer, or None when no GeoParquet file exists for it. Blocking (reads the footer)."""
+        path = resolve_layer(name)
+        if path is None:
+            return None
+        layer = self._layers.get(name)
+        if layer is None or layer.path != path or layer.mtime != os.path.getmtime(path):
+            with self._lock:
+                layer = self._layers.get(name)
+                if layer is None or layer.path != path or layer.mtime != os.path.getmtime(path):
+                    layer = GeoParquetLayer(path)
+                    self._layers[name] = layer
+        return layer
+
+    def query(self, name, bbox, limit=None):
+        """(body, stats) for a bbox query, or None when the layer has no GeoParquet file."""
+        layer = self.layer(name)
+        if layer is None:
+            return None
+        start = time.perf_counter()
+        body, stats = layer.query(*bbox, limit=limit)
+        stats["query_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return body, stats
+
+    def info(self):
+        return {"available": parquet_available, "layers": {name: layer.info() for name, layer in self._layers.items()}}
+
+
+geoparquet_service = GeoParquetService()
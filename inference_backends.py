@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.inference")
+
+# Backend selection: auto picks the fastest artifact that passes the parity check
+BACKEND_NAMES = ("auto", "onnx", "flat", "pickle")
+MODEL_BACKEND = os.getenv("FIRE_MODEL_BACKEND", "auto").lower()
+PARITY_ATOL = float(os.getenv("FIRE_MODEL_PARITY_ATOL", "1e-5"))
+
+# Artifacts written by scripts/export_fire_model.py next to the pickle
+MODEL_DIR = "Prediction Model"
+PICKLE_PATH = os.path.join(MODEL_DIR, "fire_prediction_model.pkl")
+FLAT_PATH = os.path.join(MODEL_DIR, "fire_prediction_model.flat.npz")
+ONNX_PATH = os.path.join(MODEL_DIR, "fire_prediction_model.onnx")
+PROBE_PATH = os.path.join(MODEL_DIR, "fire_prediction_model.probe.npz")
+
+
+class ParityError(RuntimeError):
+    """Raised when a compiled backend disagrees with the reference model."""
+
+
+class InferenceBackend(ABC):
+    """Common interface: predict_proba(X) on an (n, n_features) float64 array returns (n, 2)."""
+
+    name = "base"
+
+    @abstractmethod
+    def predict_proba(self, X):
+        """Class probabilities, shape (n, 2)."""
+
+
+class PickleBackend(InferenceBackend):
+    """The original joblib pipeline (imputer + scaler + XGBClassifier)."""
+
+    name = "pickle"
+
+    def __init__(self, model):
+        self.model = model
+
+    @classmethod
+    def load(cls, path=PICKLE_PATH):
+        import joblib
+        from prediction_service import prepare_model_for_arrays
+
+        return cls(prepare_model_for_arrays(joblib.load(path)))
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+
+class Preprocessor:
+    """Imputer + StandardScaler, same float64 arithmetic as sklearn, cast to float32 for the trees."""
+
+    def __init__(self, impute, mean, scale):
+        self.impute = np.asarray(impute, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    def to_dict(self):
+        return {"impute": self.impute.tolist(), "mean": self.mean.tolist(), "scale": self.scale.tolist()}
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64, copy=True)
+        nan_mask = np.isnan(X)
+        if nan_mask.any():
+            X[nan_mask] = np.broadcast_to(self.impute, X.shape)[nan_mask]
+        X -= self.mean
+        X /= self.scale
+        # XGBoost evaluates splits on float32 features
+        return X.astype(np.float32)
+
+
+class FlatTreeBackend(InferenceBackend):
+    """
+    Array-of-nodes evaluator for the exported pipeline, pure NumPy.
+
+    All trees are concatenated into flat node arrays with global child ids.
+    Leaves point to themselves, so walking every row through every tree is
+    `max_depth` rounds of gathers with no per-tree Python loop.
+    """
+
+    name = "flat"
+
+    def __init__(self, arrays):
+        self.preprocessor = Preprocessor(arrays["impute"], arrays["mean"], arrays["scale"])
+        self.roots = arrays["roots"].astype(np.intp)
+        self.left = arrays["left"].astype(np.intp)
+        self.right = arrays["right"].astype(np.intp)
+        self.feature = arrays["feature"].astype(np.intp)
+        self.threshold = arrays["threshold"].astype(np.float32)
+        self.default_left = arrays["default_left"].astype(bool)
+        self.value = arrays["value"].astype(np.float32)
+        self.base_margin = np.float32(arrays["base_margin"])
+        self.max_depth = int(arrays["max_depth"])
+
+    @classmethod
+    def load(cls, path=FLAT_PATH):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def margin(self, Xs):
+        n = Xs.shape[0]
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, self.roots.size))
+        for _ in range(self.max_depth):
+            x = Xs[rows, self.feature[node]]
+            go_left = x < self.threshold[node]
+            go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].sum(axis=1, dtype=np.float64).astype(np.float32) + self.base_margin
+
+    def predict_proba(self, X):
+        margin = self.margin(self.preprocessor.transform(X))
+        p = np.float32(1.0) / (np.float32(1.0) + np.exp(-margin))
+        return np.column_stack([np.float32(1.0) - p, p])
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX Runtime session for the XGBoost classifier.
+
+    Only the trees live in the graph. Imputer/scaler parameters are stored in
+    the model metadata and applied in float64 NumPy, because running the
+    scaler in float32 inside the graph flips a few splits.
+    """
+
+    name = "onnx"
+
+    def __init__(self, session):
+        self.session = session
+        metadata = session.get_modelmeta().custom_metadata_map
+        if "preprocessing" not in metadata:
+            raise ValueError("ONNX model has no preprocessing metadata, re-run scripts/export_fire_model.py")
+        self.preprocessor = Preprocessor(**json.loads(metadata["preprocessing"]))
+        self.input_name = session.get_inputs()[0].name
+        outputs = [o.name for o in session.get_outputs()]
+        self.output_name = "probabilities" if "probabilities" in outputs else outputs[-1]
+
+    @classmethod
+    def load(cls, path=ONNX_PATH):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        # Single-row requests: one thread per call keeps CPU per prediction low
+        options.intra_op_num_threads = int(os.getenv("FIRE_MODEL_ONNX_THREADS", "1"))
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return cls(ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"]))
+
+    def predict_proba(self, X):
+        X = self.preprocessor.transform(X)
+        return self.session.run([self.output_name], {self.input_name: X})[0]
+
+
+def pipeline_preprocessor(model):
+    """Extract imputer statistics and scaler parameters from the fitted pipeline."""
+    preprocessor = dict(dict(model.steps)["preprocessor"].steps)
+    imputer, scaler = preprocessor["imputer"], preprocessor["scaler"]
+    n_features = len(imputer.statistics_)
+    return Preprocessor(
+        imputer.statistics_,
+        scaler.mean_ if scaler.with_mean else np.zeros(n_features),
+        scaler.scale_ if scaler.with_std else np.ones(n_features)
+    )
+
+
+def flatten_pipeline(model):
+    """
+    Convert the fitted imputer + scaler + XGBClassifier pipeline into flat arrays.
+
+    The returned dict can be saved with np.savez and loaded by FlatTreeBackend.
+    """
+    preprocessor = pipeline_preprocessor(model)
+    classifier = dict(model.steps)["classifier"]
+
+    config = json.loads(classifier.get_booster().save_raw("json"))
+    learner = config["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Unsupported booster: {learner['gradient_booster']['name']}")
+
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    roots, left, right, feature, threshold, default_left, value = [], [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+    for tree in trees:
+        if any(int(t) != 0 for t in tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported")
+        lc = np.asarray(tree["left_children"], dtype=np.int64)
+        rc = np.asarray(tree["right_children"], dtype=np.int64)
+        n = lc.size
+        ids = np.arange(n)
+        is_leaf = lc == -1
+
+        roots.append(offset)
+        left.append(np.where(is_leaf, ids, lc) + offset)
+        right.append(np.where(is_leaf, ids, rc) + offset)
+        feature.append(np.where(is_leaf, 0, np.asarray(tree["split_indices"], dtype=np.int64)))
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        threshold.append(np.where(is_leaf, np.float32(0), conditions))
+        default_left.append(np.asarray(tree["default_left"], dtype=bool))
+        # For leaves XGBoost stores the leaf weight in split_conditions
+        value.append(np.where(is_leaf, conditions, np.float32(0)))
+
+        depth = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            if not is_leaf[i]:
+                depth[lc[i]] = depth[i] + 1
+                depth[rc[i]] = depth[i] + 1
+        max_depth = max(max_depth, int(depth.max()))
+        offset += n
+
+    return {
+        "impute": preprocessor.impute,
+        "mean": preprocessor.mean,
+        "scale": preprocessor.scale,
+        "roots": np.asarray(roots, dtype=np.int32),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value),
+        "base_margin": np.float32(np.log(base_score / (1.0 - base_score))),
+        "max_depth": np.int32(max_depth)
+    }
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_matches_pickle(probe_path=PROBE_PATH, pickle_path=PICKLE_PATH):
+    """True when the probe was exported from the current pickle (its recorded sha256 matches)."""
+    with np.load(probe_path) as data:
+        recorded = str(data["pickle_sha256"]) if "pickle_sha256" in data.files else None
+    return recorded is not None and os.path.exists(pickle_path) and recorded == file_sha256(pickle_path)
+
+
+def check_parity(backend, X, expected, atol=PARITY_ATOL):
+    """Return the max absolute probability difference; raise ParityError above `atol`."""
+    got = np.asarray(backend.predict_proba(X))[:, 1].astype(np.float64)
+    diff = float(np.max(np.abs(got - np.asarray(expected, dtype=np.float64)))) if len(got) else 0.0
+    if diff > atol:
+        raise ParityError(f"{backend.name} backend differs from reference by {diff:.3g} (tolerance {atol:g})")
+    return diff
+
+
+def _load_probe(pickle_backend):
+    """Probe rows and reference probabilities, from the export step or the pickle itself."""
+    if os.path.exists(PROBE_PATH):
+        with np.load(PROBE_PATH) as data:
+            return data["X"], data["expected"]
+    if pickle_backend is None:
+        return None, None
+    from prediction_service import SELECTED_FEATURES
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(256, len(SELECTED_FEATURES))) * 10 + 15
+    return X, pickle_backend.predict_proba(X)[:, 1]
+
+
+def select_backend(preference=MODEL_BACKEND):
+    """
+    Choose the inference backend at startup.
+
+    Compiled backends are only used when their artifact exists and matches the
+    reference probabilities; otherwise we fall back to the pickle.
+    """
+    if preference not in BACKEND_NAMES:
+        logger.warning(f"Unknown FIRE_MODEL_BACKEND '{preference}', using auto")
+        preference = "auto"
+
+    if preference == "pickle":
+        return PickleBackend.load()
+
+    # Compiled artifacts exported from an older pickle would still pass their own probe
+    if os.path.exists(PROBE_PATH) and not probe_matches_pickle():
+        logger.warning(f"{PROBE_PATH} was not exported from the current {PICKLE_PATH} "
+                       f"(re-run scripts/export_fire_model.py), using pickle inference backend")
+        return PickleBackend.load()
+
+    candidates = {
+        "onnx": (OnnxBackend, ONNX_PATH),
+        "flat": (FlatTreeBackend, FLAT_PATH)
+    }
+    order = ["onnx", "flat"] if preference == "auto" else [preference]
+
+    pickle_backend = None
+    if not os.path.exists(PROBE_PATH) and os.path.exists(PICKLE_PATH):
+        pickle_backend = PickleBackend.load()
+
+    probe_X, probe_expected = _load_probe(pickle_backend)
+
+    for name in order:
+        backend_cls, path = candidates[name]
+        if not os.path.exists(path):
+            logger.info(f"No {name} model artifact at {path}")
+            continue
+        try:
+            start = time.perf_counter()
+            backend = backend_cls.load(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            if probe_X is None:
+                logger.warning(f"No parity reference available, skipping {name} backend")
+                continue
+            diff = check_parity(backend, probe_X, probe_expected)
+            logger.info(f"Using {name} inference backend (loaded in {load_ms:.1f} ms, parity max diff {diff:.2g})")
+            return backend
+        except ImportError as e:
+            logger.warning(f"{name} backend unavailable: {e}")
+        except Exception as e:
+            logger.error(f"Could not use {name} backend: {e}")
+
+    logger.info("Using pickle inference backend")
+    return pickle_backend or PickleBackend.load()
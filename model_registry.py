@@ -0,0 +1,107 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+from starlette.concurrency import run_in_threadpool
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.models")
+
+# "background": start loading every model on startup; "lazy": load each one on first use
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background").lower()
+
+
+class ManagedModel:
+    """
+    One lazily loaded model (or client) and its lifecycle.
+
+    States: disabled (never loaded), unloaded, loading, ready, failed. The
+    loader runs at most once at a time; callers arriving while it runs wait
+    for the same load. A failed load is not retried until unload().
+    """
+
+    def __init__(self, name, loader, enabled=True):
+        self.name = name
+        self.loader = loader
+        self.enabled = enabled
+        self.state = "unloaded" if enabled else "disabled"
+        self.value = None
+        self.error = None
+        self.load_ms = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def load(self):
+        """The loaded model, loading it first if needed (blocking). None when disabled or the load failed."""
+        if self.state in ("ready", "failed", "disabled"):
+            return self.value
+        with self._lock:
+            if self.state == "unloaded":
+                self.state = "loading"
+                start = time.perf_counter()
+                try:
+                    self.value = self.loader()
+                    self.state = "ready"
+                    logger.info(f"Model {self.name} ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+                except Exception as e:
+                    self.value = None
+                    self.error = str(e)
+                    self.state = "failed"
+                    logger.error(f"Error loading model {self.name}: {e}")
+                self.load_ms = round((time.perf_counter() - start) * 1000, 3)
+        return self.value
+
+    async def get(self):
+        """Like load(), but the loading itself runs off the event loop."""
+        if self.state in ("ready", "failed", "disabled"):
+            return self.value
+        return await run_in_threadpool(self.load)
+
+    def unload(self):
+        """Drop the loaded model (or a failed load) so the next use loads it again."""
+        with self._lock:
+            if self.enabled:
+                self.value = None
+                self.error = None
+                self.load_ms = None
+                self.state = "unloaded"
+
+    def status(self):
+        return {"state": self.state, "ready": self.ready, "load_ms": self.load_ms, "error": self.error}
+
+
+class ModelRegistry:
+    """Named ManagedModels, warmed in the background on startup or loaded on first use."""
+
+    def __init__(self):
+        self._models = {}
+        self._warmup_task = None
+
+    def register(self, name, loader, enabled=True):
+        model = ManagedModel(name, loader, enabled)
+        self._models[name] = model
+        return model
+
+    def __getitem__(self, name):
+        return self._models[name]
+
+    async def warm(self):
+        """Load every enabled model concurrently; failures are recorded per model."""
+        await asyncio.gather(*(model.get() for model in self._models.values() if model.enabled))
+
+    def start_warmup(self):
+        """Start warm() as a background task (requests arriving meanwhile wait for their model)."""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.get_running_loop().create_task(self.warm())
+        return self._warmup_task
+
+    def status(self):
+        return {name: model.status() for name, model in self._models.items()}
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.batcher")
+
+# Defaults, overridable through environment variables
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2"))
+BATCHING_ENABLED = os.getenv("PREDICT_BATCHING_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Number of recent wait/inference samples kept for percentile reporting
+STATS_WINDOW = 2048
+
+
+class PredictionBatcher:
+    """
+    Dynamic micro-batcher in front of a vectorized predict function.
+
+    Concurrent callers submit single feature rows. A collector task gathers
+    them for up to `max_wait_ms` or `max_batch_size` rows, runs one
+    `predict_fn` call on the stacked matrix in a worker thread, and resolves
+    each caller's future. While a batch is being scored the next one keeps
+    filling, so batch size grows with load instead of latency.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._task = None
+
+        # Metrics
+        self._batch_sizes = {}
+        self._wait_ms = deque(maxlen=STATS_WINDOW)
+        self._inference_ms = deque(maxlen=STATS_WINDOW)
+        self._rows_total = 0
+        self._batches_total = 0
+        self._errors_total = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the collector task on the running event loop."""
+        if self.running:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict-batch")
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._collect_loop())
+        logger.info(f"Prediction batcher started (max_batch_size={self.max_batch_size}, "
+                    f"max_wait_ms={self.max_wait * 1000:g})")
+
+    async def stop(self):
+        """Stop the collector and fail any requests still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Prediction batcher stopped"))
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        logger.info("Prediction batcher stopped")
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its probability."""
+        if not self.running:
+            raise RuntimeError("Prediction batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        # The caller may reuse its buffer, so keep our own copy of the row
+        self._queue.put_nowait((np.array(row, dtype=np.float64, copy=True).ravel(), future, time.perf_counter()))
+        return await future
+
+    async def _collect_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued without yielding to the loop
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._run_batch(loop, batch)
+
+    async def _run_batch(self, loop, batch):
+        dispatched = time.perf_counter()
+        X = np.stack([row for row, _, _ in batch])
+
+        try:
+            probs = await loop.run_in_executor(self._executor, self.predict_fn, X)
+        except Exception as e:
+            self._errors_total += 1
+            logger.error(f"Batched prediction failed for {len(batch)} rows: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        for (_, future, queued), prob in zip(batch, probs):
+            self._wait_ms.append((dispatched - queued) * 1000)
+            if not future.done():
+                future.set_result(float(prob))
+
+        size = len(batch)
+        bucket = 1 << (size - 1).bit_length()  # power-of-two histogram buckets
+        self._batch_sizes[bucket] = self._batch_sizes.get(bucket, 0) + 1
+        self._inference_ms.append((finished - dispatched) * 1000)
+        self._rows_total += size
+        self._batches_total += 1
+
+    def stats(self):
+        """Queue depth, batch-size histogram and wait/inference timings."""
+
+        def percentiles(samples):
+            if not samples:
+                return {"p50": None, "p99": None, "max": None}
+            arr = np.fromiter(samples, dtype=float)
+            return {
+                "p50": round(float(np.percentile(arr, 50)), 3),
+                "p99": round(float(np.percentile(arr, 99)), 3),
+                "max": round(float(arr.max()), 3)
+            }
+
+        return {
+            "running": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_total": self._batches_total,
+            "rows_total": self._rows_total,
+            "errors_total": self._errors_total,
+            "avg_batch_size": round(self._rows_total / self._batches_total, 2) if self._batches_total else None,
+            "batch_size_histogram": {f"<={k}": v for k, v in sorted(self._batch_sizes.items())},
+            "wait_ms": percentiles(self._wait_ms),
+            "inference_ms": percentiles(self._inference_ms)
+        }
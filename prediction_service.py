@@ -0,0 +1,235 @@
+import io
+import json
+import logging
+import threading
+
+import numpy as np
+
+from risk_rules import rule_engine
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.prediction")
+
+# Weather fields supplied by the client (FireRequest without location)
+BASE_FEATURES = [
+    'max_temp_c', 'min_temp_c', 'avg_temp_c', 'heating_deg_days_c',
+    'cooling_deg_days_c', 'precip_mm', 'avg_humidity',
+    'avg_wind_speed_knots', 'avg_dew_point_f', 'avg_visibility_km',
+    'avg_sea_level_pressure_mb'
+]
+
+# Feature order expected by the trained model
+SELECTED_FEATURES = BASE_FEATURES + ['temp_range_c', 'heat_index', 'drought_indicator']
+
+# Upper bound on rows accepted by a single batch request
+MAX_BATCH_ROWS = 100000
+
+
+class BatchParseError(ValueError):
+    """Raised when a batch request body cannot be turned into feature rows."""
+
+
+# Column positions inside the assembled feature matrix
+_COL = {name: i for i, name in enumerate(SELECTED_FEATURES)}
+_N_BASE = len(BASE_FEATURES)
+
+
+class FeatureAssembler:
+    """
+    Build model input matrices straight from request fields, without pandas.
+
+    Columns follow SELECTED_FEATURES. Single-row buffers are preallocated per
+    thread and reused, so the returned array is only valid until the next call
+    on the same thread (predict_proba copies it, which is all we need).
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._local = threading.local()
+
+    def _row_buffer(self):
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = np.empty((1, len(SELECTED_FEATURES)), dtype=self.dtype)
+            self._local.row = buf
+        return buf
+
+    def assemble_one(self, req):
+        """Fill the reusable (1, n_features) buffer from a FireRequest-like object."""
+        buf = self._row_buffer()
+        row = buf[0]
+        for i, name in enumerate(BASE_FEATURES):
+            row[i] = getattr(req, name)
+
+        # Same arithmetic as the original dict/DataFrame path, so results are bit-identical
+        row[_COL["temp_range_c"]] = req.max_temp_c - req.min_temp_c
+        row[_COL["heat_index"]] = req.avg_temp_c * (1 + 0.01 * req.avg_humidity)
+        row[_COL["drought_indicator"]] = int(req.precip_mm < 5 and req.avg_temp_c > 25)
+        return buf
+
+    def assemble_many(self, base, out=None):
+        """
+        Build an (n, n_features) matrix from an (n, len(BASE_FEATURES)) array of weather values.
+
+        Pass `out` to reuse a caller-owned buffer of the right shape.
+        """
+        base = np.asarray(base, dtype=np.float64)
+        n = base.shape[0]
+        if out is None:
+            out = np.empty((n, len(SELECTED_FEATURES)), dtype=self.dtype)
+
+        out[:, :_N_BASE] = base
+        max_t = base[:, _COL["max_temp_c"]]
+        min_t = base[:, _COL["min_temp_c"]]
+        avg_t = base[:, _COL["avg_temp_c"]]
+        out[:, _COL["temp_range_c"]] = max_t - min_t
+        out[:, _COL["heat_index"]] = avg_t * (1 + 0.01 * base[:, _COL["avg_humidity"]])
+        out[:, _COL["drought_indicator"]] = (base[:, _COL["precip_mm"]] < 5) & (avg_t > 25)
+        return out
+
+
+feature_assembler = FeatureAssembler()
+
+
+def prepare_model_for_arrays(model):
+    """
+    Let a fitted estimator take bare NumPy arrays in SELECTED_FEATURES order.
+
+    The pipeline was fitted on a DataFrame, so sklearn warns on every ndarray
+    call. We check once that the training column order matches ours and then
+    drop the stored names.
+    """
+    estimators = [model] + [step for _, step in getattr(model, "steps", [])]
+    for est in estimators:
+        names = getattr(est, "feature_names_in_", None)
+        if names is None:
+            continue
+        if list(names) != SELECTED_FEATURES:
+            raise ValueError(f"Model was trained on columns {list(names)}, expected {SELECTED_FEATURES}")
+        try:
+            del est.feature_names_in_
+        except AttributeError:
+            pass
+    return model
+
+
+def predict_matrix(model, X):
+    """Fire probabilities for an assembled (n, n_features) matrix."""
+    return model.predict_proba(X)[:, 1]
+
+
+def predict_one(model, req):
+    """Probability of fire for a single FireRequest-like object using the NumPy feature path."""
+    X = feature_assembler.assemble_one(req)
+    return float(model.predict_proba(X)[0, 1])
+
+
+def parse_batch_body(body, content_type=None):
+    """
+    Parse a batch prediction body into a DataFrame of weather rows.
+
+    Supported formats (selected by Content-Type):
+    - application/json: array of FireRequest objects (or {"records": [...]})
+    - application/x-ndjson / application/jsonl: one FireRequest object per line
+    - text/csv: header row with FireRequest field names
+    - application/vnd.apache.arrow.stream / .file: Arrow IPC table
+    """
+    # pandas is only needed by batch requests, so it is not imported at startup
+    import pandas as pd
+
+    content_type = (content_type or "application/json").split(";")[0].strip().lower()
+
+    if not body:
+        raise BatchParseError("Request body is empty")
+
+    try:
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl",
+                            "application/x-jsonlines"):
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+            df = pd.DataFrame.from_records(records)
+        elif content_type in ("text/csv", "application/csv"):
+            df = pd.read_csv(io.BytesIO(body))
+        elif content_type in ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file"):
+            import pyarrow as pa
+
+            if content_type.endswith(".stream"):
+                table = pa.ipc.open_stream(body).read_all()
+            else:
+                table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+            df = table.to_pandas()
+        else:
+            data = json.loads(body)
+            if isinstance(data, dict):
+                data = data.get("records")
+            if not isinstance(data, list):
+                raise BatchParseError("JSON body must be an array of records")
+            df = pd.DataFrame.from_records(data)
+    except BatchParseError:
+        raise
+    except ImportError:
+        raise BatchParseError("Arrow bodies require pyarrow to be installed")
+    except Exception as e:
+        raise BatchParseError(f"Could not parse {content_type} body: {e}")
+
+    return validate_batch_frame(df)
+
+
+def validate_batch_frame(df):
+    """Check that every FireRequest field is present and numeric; returns a float frame in input order."""
+    import pandas as pd
+
+    if len(df) == 0:
+        raise BatchParseError("Batch contains no records")
+    if len(df) > MAX_BATCH_ROWS:
+        raise BatchParseError(f"Batch contains {len(df)} records, maximum is {MAX_BATCH_ROWS}")
+
+    missing = [name for name in BASE_FEATURES if name not in df.columns]
+    if missing:
+        raise BatchParseError(f"Missing required fields: {', '.join(missing)}")
+
+    features = df[BASE_FEATURES].apply(pd.to_numeric, errors="coerce").astype(float)
+    bad_rows = features.index[features.isna().any(axis=1)]
+    if len(bad_rows) > 0:
+        preview = ", ".join(str(i) for i in bad_rows[:10])
+        raise BatchParseError(f"Missing or non-numeric values in rows: {preview}")
+
+    features = features.reset_index(drop=True)
+    if "location" in df.columns:
+        features["location"] = df["location"].reset_index(drop=True)
+    return features
+
+
+def rule_based_probability(avg_temp_c, avg_humidity, precip_mm, avg_wind_speed_knots):
+    """Rule-based fire probability for one request, used when the ML model is not available."""
+    return rule_engine.score_one(
+        avg_temp_c=avg_temp_c,
+        avg_humidity=avg_humidity,
+        precip_mm=precip_mm,
+        avg_wind_speed_knots=avg_wind_speed_knots
+    )
+
+
+def predict_batch(model, df):
+    """
+    Score a validated weather frame in one call.
+
+    Returns a list of probabilities (rounded to 4 places) in input order.
+    """
+    return predict_base(model, df[BASE_FEATURES].to_numpy())
+
+
+def predict_base(model, base):
+    """
+    Score an (n, len(BASE_FEATURES)) array of weather values.
+
+    Uses the model when one is loaded and the rule table otherwise. Returns a
+    list of probabilities (rounded to 4 places) in row order.
+    """
+    base = np.asarray(base, dtype=np.float64)
+    if model is not None:
+        probs = predict_matrix(model, feature_assembler.assemble_many(base))
+        return [round(float(p), 4) for p in probs]
+
+    table = rule_engine.table
+    probs = table.score({name: base[:, _COL[name]] for name in table.features})
+    return [float(p) for p in probs]
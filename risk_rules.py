@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.rules")
+
+RULES_PATH = os.getenv("RISK_RULES_PATH", os.path.join("Prediction Model", "risk_rules.json"))
+# How often (seconds) the rule file's mtime is checked for changes
+RELOAD_INTERVAL = float(os.getenv("RISK_RULES_RELOAD_INTERVAL", "1"))
+
+# Built-in rule table, used when the rule file is missing or invalid
+DEFAULT_RULES = {
+    "version": 1,
+    "base_probability": 0.01,
+    "max_probability": 0.99,
+    "rules": [
+        {"feature": "avg_temp_c", "op": ">", "thresholds": [20, 25, 30], "weights": [0.05, 0.10, 0.20]},
+        {"feature": "avg_humidity", "op": "<", "thresholds": [30, 40], "weights": [0.20, 0.10]},
+        {"feature": "precip_mm", "op": "<", "thresholds": [1, 5], "weights": [0.15, 0.05]},
+        {"feature": "avg_wind_speed_knots", "op": ">", "thresholds": [10, 15], "weights": [0.10, 0.15]}
+    ]
+}
+
+
+class RuleTable:
+    """
+    Compiled rule set: one (thresholds, lookup) pair per feature.
+
+    Each rule is a step function over one feature. For ">" rules the weight
+    is that of the highest threshold strictly below the value; for "<" rules
+    it is that of the lowest threshold strictly above it. Both become a single
+    np.searchsorted into the ascending thresholds plus a table lookup.
+    """
+
+    def __init__(self, spec):
+        self.version = spec.get("version")
+        self.base_probability = float(spec["base_probability"])
+        self.max_probability = float(spec.get("max_probability", 0.99))
+        self.rules = []
+
+        for rule in spec["rules"]:
+            op = rule["op"]
+            thresholds = np.asarray(rule["thresholds"], dtype=np.float64)
+            weights = np.asarray(rule["weights"], dtype=np.float64)
+            if thresholds.shape != weights.shape or thresholds.ndim != 1 or thresholds.size == 0:
+                raise ValueError(f"Rule for {rule['feature']} needs matching non-empty thresholds and weights")
+            if np.any(np.diff(thresholds) <= 0):
+                raise ValueError(f"Thresholds for {rule['feature']} must be strictly ascending")
+
+            if op == ">":
+                # count of thresholds < x -> 0 means no threshold exceeded
+                lookup, side = np.concatenate([[0.0], weights]), "left"
+            elif op == "<":
+                # count of thresholds <= x -> len means no threshold undercut
+                lookup, side = np.concatenate([weights, [0.0]]), "right"
+            else:
+                raise ValueError(f"Unsupported rule operator: {op}")
+            self.rules.append((rule["feature"], thresholds, lookup, side))
+
+    @property
+    def features(self):
+        return [feature for feature, _, _, _ in self.rules]
+
+    def score(self, columns):
+        """
+        Fire probability for every row of `columns` (mapping feature -> 1-D array).
+
+        Weights are added in rule order, so results match the original if/elif chain exactly.
+        """
+        n = len(next(iter(columns.values()))) if columns else 0
+        prob = np.full(n, self.base_probability)
+        for feature, thresholds, lookup, side in self.rules:
+            x = np.asarray(columns[feature], dtype=np.float64)
+            weight = lookup[np.searchsorted(thresholds, x, side=side)]
+            # NaN compares false against every threshold, like the scalar rules
+            prob = prob + np.where(np.isnan(x), 0.0, weight)
+        return np.minimum(self.max_probability, np.round(prob, 4))
+
+
+class RiskRuleEngine:
+    """Rule table loaded from a JSON file and reloaded when the file changes."""
+
+    def __init__(self, path=RULES_PATH, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._table = RuleTable(DEFAULT_RULES)
+        self._source = "default"
+        self._mtime = None
+        self._last_check = 0.0
+        self.reload_if_changed(force=True)
+
+    @property
+    def table(self):
+        self.reload_if_changed()
+        return self._table
+
+    def reload_if_changed(self, force=False):
+        """Re-read the rule file if its mtime changed; keep the current table on errors."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if not force and mtime == self._mtime:
+            return False
+
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    table = RuleTable(json.load(f))
+            except Exception as e:
+                logger.error(f"Invalid risk rule file {self.path}, keeping previous rules: {e}")
+                self._mtime = mtime
+                return False
+            self._table = table
+            self._source = self.path
+            self._mtime = mtime
+        logger.info(f"Loaded risk rules from {self.path} (version {table.version}, {len(table.rules)} rules)")
+        return True
+
+    def score(self, columns):
+        return self.table.score(columns)
+
+    def score_one(self, **values):
+        return float(self.table.score({k: [v] for k, v in values.items()})[0])
+
+    def info(self):
+        table = self._table
+        return {"source": self._source, "version": table.version, "features": table.features}
+
+
+rule_engine = RiskRuleEngine()
@@ -0,0 +1,104 @@
+import os
+import hashlib
+import logging
+
+from cache_utils import MISSING, SingleFlight, SQLiteCacheStore, TTLCache
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.satellite_cache")
+
+# Uploaded images are stored once per content hash: <sha256>.jpg
+SATELLITE_UPLOAD_DIR = "static/uploads/satellite"
+
+# Classification results per (content hash, model version); the version changes with the model file,
+# so entries never go stale and the TTL only bounds how long unused results are kept
+SATELLITE_RESULT_CACHE_SIZE = int(os.getenv("SATELLITE_RESULT_CACHE_SIZE", "10000"))
+SATELLITE_RESULT_CACHE_TTL = float(os.getenv("SATELLITE_RESULT_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
+SATELLITE_RESULT_CACHE_PATH = os.getenv("SATELLITE_RESULT_CACHE_PATH")  # optional SQLite file, e.g. cache/satellite.sqlite
+
+
+def content_hash(data):
+    """SHA-256 hex digest of an image's bytes, used as its file ID and cache key."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def store_upload(data, upload_dir=SATELLITE_UPLOAD_DIR):
+    """
+    Store uploaded image bytes under their content hash.
+
+    Returns (file_id, stored): stored is False when the same image was
+    already uploaded and nothing was written.
+    """
+    file_id = content_hash(data)
+    os.makedirs(upload_dir, exist_ok=True)
+    file_path = os.path.join(upload_dir, f"{file_id}.jpg")
+    if os.path.exists(file_path):
+        return file_id, False
+    # Written under a temporary name first, so a concurrent reader never sees a partial file
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as buffer:
+        buffer.write(data)
+    os.replace(tmp_path, file_path)
+    return file_id, True
+
+
+class SatelliteResultCache:
+    """
+    Classification results keyed by image content hash and model version.
+
+    Results are held in a bounded LRU (TTLCache) and, when a path is given,
+    in a SQLite store that survives restarts. Concurrent analyses of the same
+    image share one model call (SingleFlight).
+    """
+
+    def __init__(self, maxsize=SATELLITE_RESULT_CACHE_SIZE, ttl=SATELLITE_RESULT_CACHE_TTL,
+                 path=SATELLITE_RESULT_CACHE_PATH):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.flights = SingleFlight()
+        self.store = None
+        if path:
+            try:
+                self.store = SQLiteCacheStore(path, table="satellite_results")
+                logger.info(f"Persistent satellite result cache at {path}")
+            except Exception as e:
+                logger.error(f"Could not open satellite result cache {path}: {e}")
+
+    @staticmethod
+    def key(image_hash, model_version):
+        return f"{model_version}/{image_hash}"
+
+    def get(self, image_hash, model_version):
+        """Cached result dict (predicted_class, confidence), or MISSING."""
+        key = self.key(image_hash, model_version)
+        cached = self.memory.get(key)
+        if cached is not MISSING or self.store is None:
+            return cached
+        try:
+            stored = self.store.get(key)
+        except Exception as e:
+            logger.error(f"Error reading satellite result cache: {e}")
+            return MISSING
+        if stored is MISSING:
+            return MISSING
+        result, remaining = stored
+        self.memory.set(key, result, ttl=remaining)
+        return result
+
+    def set(self, image_hash, model_version, result):
+        key = self.key(image_hash, model_version)
+        self.memory.set(key, result)
+        if self.store is not None:
+            try:
+                self.store.set(key, result, self.ttl)
+            except Exception as e:
+                logger.error(f"Error writing satellite result cache: {e}")
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["coalesced"] = self.flights.coalesced
+        stats["persistent_entries"] = len(self.store) if self.store is not None else None
+        return stats
+
+
+satellite_results = SatelliteResultCache()
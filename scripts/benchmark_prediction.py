@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark for the single-request prediction path.
+
+Compares the original dict -> pd.DataFrame -> predict_proba path with the
+NumPy FeatureAssembler path, checks that both give bit-identical
+probabilities, and prints per-request latency.
+
+Run from the project root:
+    python scripts/benchmark_prediction.py [iterations]
+"""
+import os
+import sys
+import time
+import random
+import warnings
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from prediction_service import BASE_FEATURES, SELECTED_FEATURES, prepare_model_for_arrays, predict_one
+
+MODEL_PATH = "Prediction Model/fire_prediction_model.pkl"
+
+
+def random_request(rng):
+    """Generate a plausible weather record."""
+    avg = rng.uniform(-5, 40)
+    humidity = rng.uniform(5, 100)
+    return SimpleNamespace(
+        max_temp_c=round(avg + rng.uniform(0, 10), 1),
+        min_temp_c=round(avg - rng.uniform(0, 10), 1),
+        avg_temp_c=round(avg, 1),
+        heating_deg_days_c=round(max(0, 18 - avg), 1),
+        cooling_deg_days_c=round(max(0, avg - 18), 1),
+        precip_mm=round(rng.choice([0, 0, rng.uniform(0, 30)]), 1),
+        avg_humidity=round(humidity, 1),
+        avg_wind_speed_knots=round(rng.uniform(0, 30), 1),
+        avg_dew_point_f=round(rng.uniform(10, 70), 1),
+        avg_visibility_km=round(rng.uniform(0.5, 20), 1),
+        avg_sea_level_pressure_mb=round(rng.uniform(995, 1030), 1),
+    )
+
+
+def legacy_predict(model, req):
+    """The original per-request path from app.py."""
+    input_data = {
+        **{name: getattr(req, name) for name in BASE_FEATURES},
+        "temp_range_c": req.max_temp_c - req.min_temp_c,
+        "heat_index": req.avg_temp_c * (1 + 0.01 * req.avg_humidity),
+        "drought_indicator": int(req.precip_mm < 5 and req.avg_temp_c > 25)
+    }
+    input_df = pd.DataFrame([input_data])[SELECTED_FEATURES]
+    return float(model.predict_proba(input_df)[0, 1])
+
+
+def time_per_call(func, model, requests_list):
+    start = time.perf_counter()
+    for req in requests_list:
+        func(model, req)
+    return (time.perf_counter() - start) / len(requests_list) * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Model not found at: {MODEL_PATH}")
+        return
+
+    warnings.filterwarnings("ignore")
+    legacy_model = joblib.load(MODEL_PATH)
+    array_model = prepare_model_for_arrays(joblib.load(MODEL_PATH))
+
+    rng = random.Random(42)
+    requests_list = [random_request(rng) for _ in range(iterations)]
+
+    # Parity check
+    mismatches = 0
+    for req in requests_list:
+        a = legacy_predict(legacy_model, req)
+        b = predict_one(array_model, req)
+        if np.float64(a).tobytes() != np.float64(b).tobytes():
+            mismatches += 1
+    print(f"Parity: {iterations - mismatches}/{iterations} bit-identical probabilities")
+
+    # Warm up both paths before timing
+    time_per_call(legacy_predict, legacy_model, requests_list[:50])
+    time_per_call(predict_one, array_model, requests_list[:50])
+
+    legacy_us = time_per_call(legacy_predict, legacy_model, requests_list)
+    numpy_us = time_per_call(predict_one, array_model, requests_list)
+
+    print(f"DataFrame path: {legacy_us:8.1f} us/request")
+    print(f"NumPy path:     {numpy_us:8.1f} us/request")
+    print(f"Speed-up:       {legacy_us / numpy_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
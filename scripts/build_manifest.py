@@ -0,0 +1,169 @@
+"""
+Incremental rebuilds for the data scripts.
+
+Each build step (e.g. "filter_fires") keeps a manifest in a SQLite file under
+BUILD_CACHE_DIR with:
+
+- the step's parameters and the sha256 of its source and output files, so a
+  step whose inputs and outputs are unchanged is skipped outright;
+- one row per source feature: its key (OBJECTID, or its position when it has
+  none), a digest of its geometry and properties, and the processed result.
+
+On a re-run only new or changed features are processed (in parallel, via
+geo_pipeline.parallel_map); results for unchanged features come from the
+manifest and are spliced back in source order, so the outputs are rewritten
+exactly as a full rebuild would write them. Rows for features that are gone
+from the source are dropped.
+"""
+import os
+import json
+import pickle
+import sqlite3
+import hashlib
+from collections import deque
+
+from geo_pipeline import parallel_map
+
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", os.path.join("cache", "build"))
+# Set to false to always rebuild everything (the manifest is left untouched)
+INCREMENTAL_BUILD = os.getenv("INCREMENTAL_BUILD", "true").lower() not in ("0", "false", "no")
+# Bump when the manifest layout or result encoding changes
+MANIFEST_VERSION = 1
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """sha256 of a file's contents, or None when it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def feature_digest(feature):
+    """Digest of a feature's geometry and properties (key order does not matter)."""
+    text = json.dumps(feature, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class IncrementalBuild:
+    """
+    Manifest for one build step. Use as a context manager: call finish() once
+    the outputs are written; leaving the block without it (e.g. on an error)
+    discards everything recorded during the run.
+    """
+
+    def __init__(self, name, params, sources, outputs, cache_dir=BUILD_CACHE_DIR, enabled=INCREMENTAL_BUILD):
+        self.name = name
+        self.params = json.dumps({"manifest": MANIFEST_VERSION, **params}, sort_keys=True, default=str)
+        self.sources = list(sources)
+        self.outputs = list(outputs)
+        self.enabled = enabled
+        self.unchanged = 0
+        self.processed = 0
+        self.removed = 0
+        self._conn = None
+        if not enabled:
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, f"{name}.sqlite"))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS features (key TEXT PRIMARY KEY, digest TEXT, result BLOB)")
+        self._meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        if self._meta.get("params") != self.params:
+            # Different parameters: nothing recorded so far can be reused
+            self._conn.execute("DELETE FROM features")
+            self._meta = {}
+        self._digests = dict(self._conn.execute("SELECT key, digest FROM features").fetchall())
+        self._seen = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is not None:
+            self._conn.rollback()
+            self._conn.close()
+            self._conn = None
+        return False
+
+    def up_to_date(self):
+        """True when parameters, sources and outputs all match the last finished build."""
+        if not self.enabled or self._meta.get("params") != self.params:
+            return False
+        recorded = json.loads(self._meta.get("files", "{}"))
+        return all(recorded.get(path) is not None and file_digest(path) == recorded[path]
+                   for path in self.sources + self.outputs)
+
+    def _key(self, feature, position, counts):
+        objectid = (feature.get("properties") or {}).get("OBJECTID")
+        if objectid is None:
+            return f"@{position}"
+        key = str(objectid)
+        # Duplicate OBJECTIDs get an occurrence suffix so every feature has its own row
+        n = counts.get(key, 0)
+        counts[key] = n + 1
+        return key if n == 0 else f"{key}#{n}"
+
+    def _cached(self, key):
+        row = self._conn.execute("SELECT result FROM features WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0])
+
+    def map(self, func, features, workers=None, with_position=False):
+        """
+        Yield func(feature) for every source feature, in order, computing it only
+        for new or changed features (with_position passes (position, feature)
+        pairs, position counting from 1, like enumerate(features, 1)).
+        """
+        if not self.enabled:
+            items = enumerate(features, 1) if with_position else features
+            yield from parallel_map(func, items, workers)
+            return
+
+        order = deque()
+        counts = {}
+
+        def changed():
+            # Queues every feature's key; only new/changed ones go on to the workers
+            for position, feature in enumerate(features, 1):
+                key = self._key(feature, position, counts)
+                digest = feature_digest(feature)
+                self._seen.add(key)
+                if self._digests.get(key) == digest:
+                    order.append((key, None))
+                else:
+                    order.append((key, digest))
+                    yield (position, feature) if with_position else feature
+
+        for result in parallel_map(func, changed(), workers):
+            key, digest = order.popleft()
+            while digest is None:
+                self.unchanged += 1
+                yield self._cached(key)
+                key, digest = order.popleft()
+            self._conn.execute("INSERT OR REPLACE INTO features (key, digest, result) VALUES (?, ?, ?)",
+                               (key, digest, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+            self.processed += 1
+            yield result
+        while order:
+            key, _ = order.popleft()
+            self.unchanged += 1
+            yield self._cached(key)
+
+    def finish(self):
+        """Record the source/output hashes, drop rows of removed features and commit."""
+        if not self.enabled:
+            print(f"[{self.name}] full rebuild (incremental builds disabled)")
+            return
+        removed = [(key,) for key in self._digests if key not in self._seen]
+        self._conn.executemany("DELETE FROM features WHERE key = ?", removed)
+        self.removed = len(removed)
+        files = {path: file_digest(path) for path in self.sources + self.outputs}
+        self._conn.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                               [("params", self.params), ("files", json.dumps(files))])
+        self._conn.commit()
+        print(f"[{self.name}] {self.processed} features processed, {self.unchanged} reused, "
+              f"{self.removed} removed")
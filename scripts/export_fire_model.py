@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Export the pickled fire prediction pipeline to fast inference formats.
+
+Writes, next to the pickle in "Prediction Model/":
+- fire_prediction_model.flat.npz   array-of-nodes model for FlatTreeBackend (NumPy only)
+- fire_prediction_model.probe.npz  probe rows + reference probabilities for the startup parity check,
+                                   with the sha256 of the pickle they were computed from
+- fire_prediction_model.onnx       (with --onnx) ONNX graph for OnnxBackend; needs onnxmltools
+
+Run from the project root:
+    python scripts/export_fire_model.py [--onnx]
+"""
+import os
+import sys
+import time
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from prediction_service import SELECTED_FEATURES
+from inference_backends import (
+    FLAT_PATH,
+    ONNX_PATH,
+    PICKLE_PATH,
+    PROBE_PATH,
+    FlatTreeBackend,
+    OnnxBackend,
+    PickleBackend,
+    check_parity,
+    file_sha256,
+    flatten_pipeline,
+    pipeline_preprocessor,
+)
+
+
+def build_probe(n=2000, seed=0):
+    """Plausible weather rows (plus a few NaN rows) covering the model's input range."""
+    rng = np.random.default_rng(seed)
+    avg = rng.uniform(-5, 40, n)
+    humidity = rng.uniform(5, 100, n)
+    precip = np.where(rng.random(n) < 0.6, 0.0, rng.uniform(0, 60, n))
+    base = np.column_stack([
+        avg + rng.uniform(0, 10, n),
+        avg - rng.uniform(0, 10, n),
+        avg,
+        np.maximum(0, 18 - avg),
+        np.maximum(0, avg - 18),
+        precip,
+        humidity,
+        rng.uniform(0, 30, n),
+        rng.uniform(10, 70, n),
+        rng.uniform(0.5, 20, n),
+        rng.uniform(995, 1030, n),
+    ]).round(1)
+
+    from prediction_service import feature_assembler
+
+    X = feature_assembler.assemble_many(base)
+    X[:10, rng.integers(0, len(SELECTED_FEATURES), 10)] = np.nan
+    return X
+
+
+def time_single_row(backend, X, repeat=500):
+    rows = [X[i:i + 1] for i in range(min(repeat, len(X)))]
+    backend.predict_proba(rows[0])
+    start = time.perf_counter()
+    for row in rows:
+        backend.predict_proba(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def export_onnx(model, path):
+    """Convert the XGBoost classifier to ONNX; preprocessing goes into the model metadata."""
+    import json
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    classifier = dict(model.steps)["classifier"]
+    onx = convert_xgboost(
+        classifier,
+        initial_types=[("input", FloatTensorType([None, len(SELECTED_FEATURES)]))],
+        target_opset=15
+    )
+    entry = onx.metadata_props.add()
+    entry.key = "preprocessing"
+    entry.value = json.dumps(pipeline_preprocessor(model).to_dict())
+    with open(path, "wb") as f:
+        f.write(onx.SerializeToString())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the fire prediction model")
+    parser.add_argument("--onnx", action="store_true", help="also export an ONNX graph")
+    args = parser.parse_args()
+
+    if not os.path.exists(PICKLE_PATH):
+        print(f"Model not found at: {PICKLE_PATH}")
+        return
+
+    warnings.filterwarnings("ignore")
+    reference = PickleBackend.load(PICKLE_PATH)
+
+    print(f"Flattening {PICKLE_PATH}...")
+    arrays = flatten_pipeline(reference.model)
+    np.savez(FLAT_PATH, **arrays)
+    print(f"Saved flat model: {FLAT_PATH} ({os.path.getsize(FLAT_PATH) / 1024:.1f} KB, "
+          f"{len(arrays['roots'])} trees, {len(arrays['left'])} nodes, max depth {int(arrays['max_depth'])})")
+
+    X = build_probe()
+    expected = reference.predict_proba(X)[:, 1]
+    np.savez(PROBE_PATH, X=X, expected=expected, pickle_sha256=np.array(file_sha256(PICKLE_PATH)))
+    print(f"Saved parity probe: {PROBE_PATH} ({len(X)} rows)")
+
+    backends = [reference, FlatTreeBackend.load(FLAT_PATH)]
+
+    if args.onnx:
+        try:
+            export_onnx(reference.model, ONNX_PATH)
+            print(f"Saved ONNX model: {ONNX_PATH}")
+            backends.append(OnnxBackend.load(ONNX_PATH))
+        except ImportError as e:
+            print(f"ONNX export needs onnxmltools and onnxruntime: {e}")
+
+    for backend in backends:
+        try:
+            diff = check_parity(backend, X, expected)
+            status = f"max diff {diff:.2g}"
+        except Exception as e:
+            status = f"FAILED: {e}"
+        print(f"{backend.name:>6}: {time_single_row(backend, X):8.1f} us/row, parity {status}")
+
+
+if __name__ == "__main__":
+    main()
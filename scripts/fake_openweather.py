@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Minimal fake OpenWeather server for local testing without an API key quota.
+
+Serves the two endpoints the app uses (/geo/1.0/direct and /data/2.5/weather)
+with deterministic data, optional latency and optional random failures.
+
+    python scripts/fake_openweather.py --port 8081 --latency-ms 50 --fail-rate 0.1
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8081 OPENWEATHER_API_KEY=test python -m uvicorn app:app
+"""
+import random
+import asyncio
+import argparse
+import hashlib
+
+from fastapi import FastAPI, HTTPException, Query, Request
+
+app = FastAPI()
+# fail_next: number of upcoming requests answered with 503 before serving normally
+settings = {"latency": 0.0, "fail_rate": 0.0, "fail_next": 0}
+counters = {"geocoding": 0, "weather": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0}
+# Client (host, port) pairs seen; one per TCP connection when served over a real socket
+connections = set()
+
+
+def reset():
+    """Restore the default settings and zero the counters."""
+    settings.update(latency=0.0, fail_rate=0.0, fail_next=0)
+    counters.update(geocoding=0, weather=0, failures=0, in_flight=0, peak_in_flight=0)
+    connections.clear()
+
+
+def _seed(*parts):
+    return int(hashlib.md5(":".join(str(p) for p in parts).encode()).hexdigest()[:8], 16)
+
+
+async def _simulate(request):
+    if request.client:
+        connections.add((request.client.host, request.client.port))
+    counters["in_flight"] += 1
+    counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+    try:
+        if settings["latency"]:
+            await asyncio.sleep(settings["latency"])
+    finally:
+        counters["in_flight"] -= 1
+    if settings["fail_next"] > 0 or (settings["fail_rate"] and random.random() < settings["fail_rate"]):
+        settings["fail_next"] = max(0, settings["fail_next"] - 1)
+        counters["failures"] += 1
+        raise HTTPException(status_code=503, detail="Simulated upstream failure")
+
+
+@app.get("/geo/1.0/direct")
+async def geocode(request: Request, q: str = Query(...), limit: int = 1, appid: str = None):
+    counters["geocoding"] += 1
+    await _simulate(request)
+    if q.strip().lower().startswith("nowhere"):
+        return []
+    rng = random.Random(_seed(q.strip().lower()))
+    return [{
+        "name": q.strip().title(),
+        "lat": round(rng.uniform(32.5, 42.0), 4),
+        "lon": round(rng.uniform(-124.4, -114.1), 4),
+        "country": "US"
+    }][:limit]
+
+
+@app.get("/data/2.5/weather")
+async def current_weather(request: Request, lat: float = Query(...), lon: float = Query(...),
+                          units: str = "metric", appid: str = None):
+    counters["weather"] += 1
+    await _simulate(request)
+    rng = random.Random(_seed(round(lat, 2), round(lon, 2)))
+    temp = rng.uniform(5, 38)
+    return {
+        "main": {
+            "temp": temp,
+            "temp_min": temp - rng.uniform(1, 6),
+            "temp_max": temp + rng.uniform(1, 6),
+            "humidity": rng.uniform(8, 95),
+            "pressure": rng.uniform(1000, 1025)
+        },
+        "wind": {"speed": rng.uniform(0, 12)},
+        "visibility": 10000
+    }
+
+
+@app.get("/_counters")
+async def get_counters():
+    """Number of upstream calls received, handy for checking cache behaviour."""
+    return {**counters, "connections": len(connections)}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenWeather server")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    args = parser.parse_args()
+    settings["latency"] = args.latency_ms / 1000
+    settings["fail_rate"] = args.fail_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
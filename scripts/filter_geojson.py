@@ -1,7 +1,12 @@
 import json
 import os
 import datetime
-import random
+from contextlib import ExitStack
+
+from geojson_stream import GeoJSONWriter, iter_features
+from geo_pipeline import parallel_map
+from build_manifest import IncrementalBuild
+from geoparquet import GeoParquetWriter, parquet_available, parquet_path
 
 def read_geojson_file(file_path):
     """读取GeoJSON文件并返回其内容"""
@@ -13,6 +18,25 @@ def read_geojson_file(file_path):
         print(f"Error reading file {file_path}: {e}")
         return None
 
+def stream_geojson_file(features, file_path):
+    """将（流式）特征逐个写入GeoJSON文件（安装了pyarrow时同时写入同名的GeoParquet文件），返回写入的特征数量（出错时返回None）"""
+    try:
+        with ExitStack() as stack:
+            writer = stack.enter_context(GeoJSONWriter(file_path))
+            parquet = stack.enter_context(GeoParquetWriter(parquet_path(file_path))) if parquet_available else None
+            for feature in features:
+                writer.write(feature)
+                if parquet is not None:
+                    parquet.write(feature)
+        print(f"Saved file: {file_path}")
+        print(f"File size: {os.path.getsize(file_path) / (1024*1024):.2f} MB")
+        if parquet is not None:
+            print(f"GeoParquet: {parquet.path} ({os.path.getsize(parquet.path) / (1024*1024):.2f} MB)")
+        return writer.count
+    except Exception as e:
+        print(f"Error saving file {file_path}: {e}")
+        return None
+
 def save_geojson_file(data, file_path):
     """保存GeoJSON数据到文件"""
     try:
@@ -23,124 +47,136 @@ def save_geojson_file(data, file_path):
     except Exception as e:
         print(f"Error saving file {file_path}: {e}")
 
-def filter_fire_data(data, max_features=None, years=None, include_counties=None):
+def slim_fire_feature(feature):
+    """精简单个火灾特征：降低几何精度，只保留必要的属性（在工作进程中运行）"""
+    props = feature.get("properties") or {}
+    
+    # 简化几何数据 - 减少精度
+    if "geometry" in feature and feature["geometry"]:
+        simplify_geometry(feature["geometry"], precision=5)  # 增加精度保留小数位数
+    
+    # 只保留必要的属性
+    essential_props = {
+        "OBJECTID": props.get("OBJECTID"),
+        "YEAR_": props.get("YEAR_"),
+        "FIRE_NAME": props.get("FIRE_NAME"),
+        "ALARM_DATE": props.get("ALARM_DATE"),
+        "CONT_DATE": props.get("CONT_DATE"),
+        "UNIT_ID": props.get("UNIT_ID"),
+        "CAUSE": props.get("CAUSE"),
+        "ACRES": props.get("ACRES") if props.get("ACRES") is not None else props.get("GIS_ACRES")  # 原始导出只有 GIS_ACRES
+    }
+    feature["properties"] = essential_props
+    return feature
+
+def filter_fire_features(features, max_features=None, years=None, include_counties=None, summary=None, workers=None,
+                         build=None):
     """
-    筛选火灾数据，保留所有特征但精简属性和几何数据
+    逐个筛选火灾特征（生成器），保留所有特征但精简属性和几何数据
     
     参数:
-        data: GeoJSON数据
+        features: 特征的可迭代对象（可以是流式读取器）
         max_features: 最大特征数量（如果为None，保留所有特征）
         years: 要包含的年份列表（如果为None，则包含所有年份）
         include_counties: 要包含的县列表（如果为None，则包含所有县）
+        summary: 可选的字典，用于收集遇到的年份和县
+        workers: 并行处理的进程数（默认每个CPU核心一个，1表示在当前进程中处理）
+        build: 可选的 IncrementalBuild，只重新处理新增或变化的特征
     """
-    if not data or "features" not in data:
-        return data
+    if summary is None:
+        summary = {}
+    all_years = summary.setdefault("years", set())
+    all_counties = summary.setdefault("counties", set())
+    summary.setdefault("input", 0)
+    summary.setdefault("output", 0)
     
-    # 收集所有可用的年份和县
-    all_years = set()
-    all_counties = set()
-    
-    for feature in data["features"]:
-        props = feature.get("properties", {})
-        year = props.get("YEAR_")
-        county = props.get("UNIT_ID")
-        
-        if year:
-            all_years.add(year)
-        if county:
-            all_counties.add(county)
-    
-    print(f"Original data contains {len(data['features'])} features")
-    print(f"Years range from {min(all_years) if all_years else 'unknown'} to {max(all_years) if all_years else 'unknown'}")
-    print(f"Found {len(all_counties)} unique counties")
-    
-    filtered_features = []
-    
-    # 如果没有指定年份，使用所有年份
-    if not years:
-        years = list(all_years)
-    
-    # 确保counties是列表或None
-    counties_to_include = include_counties if include_counties else list(all_counties)
-    
-    # 处理所有特征
-    for feature in data["features"]:
-        props = feature.get("properties", {})
-        year = props.get("YEAR_")
-        county = props.get("UNIT_ID")
-        
-        # 应用年份和县过滤（如果指定）
-        if years and year not in years:
-            continue
-        if counties_to_include and county not in counties_to_include:
-            continue
+    def selected():
+        # 年份和县的过滤在主进程中完成（开销很小），几何和属性的精简交给工作进程
+        for feature in features:
+            summary["input"] += 1
+            props = feature.get("properties") or {}
+            year = props.get("YEAR_")
+            county = props.get("UNIT_ID")
             
-        # 简化几何数据 - 减少精度
-        if "geometry" in feature and feature["geometry"]:
-            simplify_geometry(feature["geometry"], precision=5)  # 增加精度保留小数位数
-        
-        # 只保留必要的属性
-        essential_props = {
-            "OBJECTID": props.get("OBJECTID"),
-            "YEAR_": props.get("YEAR_"),
-            "FIRE_NAME": props.get("FIRE_NAME"),
-            "ALARM_DATE": props.get("ALARM_DATE"),
-            "CONT_DATE": props.get("CONT_DATE"),
-            "UNIT_ID": props.get("UNIT_ID"),
-            "CAUSE": props.get("CAUSE"),
-            "ACRES": props.get("ACRES")
-        }
-        feature["properties"] = essential_props
-        
-        filtered_features.append(feature)
-        
-        # 如果指定了最大特征数量并达到该数量，停止添加
-        if max_features and len(filtered_features) >= max_features:
-            break
+            if year:
+                all_years.add(year)
+            if county:
+                all_counties.add(county)
+            
+            # 应用年份和县过滤（如果指定）
+            if years and year not in years:
+                continue
+            if include_counties and county not in include_counties:
+                continue
+            
+            yield feature
+            
+            # 如果指定了最大特征数量并达到该数量，停止添加
+            summary["output"] += 1
+            if max_features and summary["output"] >= max_features:
+                break
+    
+    mapper = build.map if build is not None else parallel_map
+    yield from mapper(slim_fire_feature, selected(), workers)
+
+def print_fire_summary(summary):
+    """打印筛选过程中收集的年份和县信息"""
+    all_years = summary.get("years", set())
+    print(f"Original data contains {summary.get('input', 0)} features")
+    print(f"Years range from {min(all_years) if all_years else 'unknown'} to {max(all_years) if all_years else 'unknown'}")
+    print(f"Found {len(summary.get('counties', set()))} unique counties")
+    print(f"Filtered to {summary.get('output', 0)} features")
+
+def filter_fire_data(data, max_features=None, years=None, include_counties=None):
+    """筛选内存中的火灾数据（filter_fire_features 的整体版本）"""
+    if not data or "features" not in data:
+        return data
     
-    print(f"Filtered to {len(filtered_features)} features")
+    summary = {}
+    filtered_features = list(filter_fire_features(data["features"], max_features, years, include_counties, summary))
+    print_fire_summary(summary)
     
     # 创建新的GeoJSON对象
-    filtered_data = {
+    return {
         "type": data["type"],
         "features": filtered_features
     }
+
+def slim_ecoregion_feature(feature):
+    """精简单个生态区域特征（在工作进程中运行）"""
+    # 简化几何数据
+    if "geometry" in feature and feature["geometry"]:
+        simplify_geometry(feature["geometry"])
     
-    return filtered_data
+    # 只保留必要的属性
+    if "properties" in feature:
+        props = feature["properties"]
+        essential_props = {
+            "OBJECTID": props.get("OBJECTID"),
+            "ECOREGION_SECTION": props.get("ECOREGION_SECTION"),
+            "Ecoregion_Acres": props.get("Ecoregion_Acres")
+        }
+        feature["properties"] = essential_props
+    
+    return feature
+
+def filter_ecoregion_features(features, workers=None, build=None):
+    """逐个筛选生态区域特征（生成器），简化几何形状和属性"""
+    mapper = build.map if build is not None else parallel_map
+    return mapper(slim_ecoregion_feature, features, workers)
 
 def filter_ecoregion_data(data):
-    """筛选生态区域数据，简化几何形状和属性"""
+    """筛选内存中的生态区域数据（filter_ecoregion_features 的整体版本）"""
     if not data or "features" not in data:
         return data
     
     print(f"Original ecoregion data contains {len(data['features'])} features")
     
-    filtered_features = []
-    
-    for feature in data["features"]:
-        # 简化几何数据
-        if "geometry" in feature and feature["geometry"]:
-            simplify_geometry(feature["geometry"])
-        
-        # 只保留必要的属性
-        if "properties" in feature:
-            props = feature["properties"]
-            essential_props = {
-                "OBJECTID": props.get("OBJECTID"),
-                "ECOREGION_SECTION": props.get("ECOREGION_SECTION"),
-                "Ecoregion_Acres": props.get("Ecoregion_Acres")
-            }
-            feature["properties"] = essential_props
-        
-        filtered_features.append(feature)
-    
     # 创建新的GeoJSON对象
-    filtered_data = {
+    return {
         "type": data["type"],
-        "features": filtered_features
+        "features": list(filter_ecoregion_features(data["features"]))
     }
-    
-    return filtered_data
 
 def simplify_geometry(geometry, precision=5):
     """简化几何数据，减少精度"""
@@ -170,6 +206,10 @@ def simplify_geometry(geometry, precision=5):
                 for k, point in enumerate(line):
                     geometry["coordinates"][i][j][k] = [round(point[0], precision), round(point[1], precision)]
 
+def output_files(file_path):
+    """一个输出对应的所有文件（GeoJSON，以及安装了pyarrow时的GeoParquet）"""
+    return [file_path] + ([parquet_path(file_path)] if parquet_available else [])
+
 def main():
     # 源文件路径
     fire_geojson = "FireGeoData/California_Fire_Perimeters_(all).geojson"
@@ -183,22 +223,36 @@ def main():
     fire_output = os.path.join(output_dir, "fires_filtered.geojson")
     eco_output = os.path.join(output_dir, "ecoregions_filtered.geojson")
     
-    # 处理火灾数据
+    # 处理火灾数据（流式读取和写入，内存占用与文件大小无关）
+    # 构建清单（cache/build）记录每个特征的哈希：只重新处理新增或变化的特征
     print("Processing fire data...")
-    fire_data = read_geojson_file(fire_geojson)
-    if fire_data:
+    if os.path.exists(fire_geojson):
         # 保留所有年份的数据，不限制特征数量
-        filtered_fire_data = filter_fire_data(fire_data)
-        if filtered_fire_data:
-            save_geojson_file(filtered_fire_data, fire_output)
+        with IncrementalBuild("filter_fires", {"step": 1, "precision": 5}, [fire_geojson], output_files(fire_output)) as build:
+            if build.up_to_date():
+                print(f"{fire_output} is up to date")
+            else:
+                summary = {}
+                features = iter_features(fire_geojson)
+                if stream_geojson_file(filter_fire_features(features, summary=summary, build=build), fire_output) is not None:
+                    build.finish()
+                print_fire_summary(summary)
+    else:
+        print(f"Input file not found: {fire_geojson}")
     
     # 处理生态区域数据
     print("\nProcessing ecoregion data...")
-    eco_data = read_geojson_file(eco_geojson)
-    if eco_data:
-        filtered_eco_data = filter_ecoregion_data(eco_data)
-        if filtered_eco_data:
-            save_geojson_file(filtered_eco_data, eco_output)
+    if os.path.exists(eco_geojson):
+        with IncrementalBuild("filter_ecoregions", {"step": 1}, [eco_geojson], output_files(eco_output)) as build:
+            if build.up_to_date():
+                print(f"{eco_output} is up to date")
+            else:
+                count = stream_geojson_file(filter_ecoregion_features(iter_features(eco_geojson), build=build), eco_output)
+                if count is not None:
+                    build.finish()
+                    print(f"Original ecoregion data contains {count} features")
+    else:
+        print(f"Input file not found: {eco_geojson}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -2,9 +2,13 @@ import json
 import os
 import math
 
-def convert_to_wgs84(x, y):
+import numpy as np
+
+from geo_transform import transform_geometry
+
+def convert_to_wgs84(xy):
     """
-    简单转换函数 - 从原始的加州坐标系统转换为WGS84
+    简单转换函数（向量化）- 从原始的加州坐标系统转换为WGS84
     根据数据检查结果调整参数以获得更准确的映射
     """
     # 加州边界大致为：
@@ -12,14 +16,14 @@ def convert_to_wgs84(x, y):
     # 纬度：32.534156 到 42.009518
 
     # 基于检查后的坐标转换参数
-    lon = -124.4096 + (x + 151189) / 300000
-    lat = 32.5343 + (y + 12434) / 250000
+    lon = -124.4096 + (xy[:, 0] + 151189) / 300000
+    lat = 32.5343 + (xy[:, 1] + 12434) / 250000
     
     # 限制在加州合理范围内
-    lon = max(-124.409591, min(-114.131211, lon))
-    lat = max(32.534156, min(42.009518, lat))
+    lon = np.clip(lon, -124.409591, -114.131211)
+    lat = np.clip(lat, 32.534156, 42.009518)
     
-    return [lon, lat]
+    return np.column_stack([lon, lat])
 
 def fix_eco_data():
     """修复生态区域数据的坐标系统问题"""
@@ -38,41 +42,10 @@ def fix_eco_data():
         features = data.get('features', [])
         print(f"Processing {len(features)} features...")
         
-        # 处理每个特征
+        # 处理每个特征：转换坐标 - 这里假设坐标已经是WGS84，但需要调整
+        # 应用适当的转换来修正显示问题（每个几何体一次向量化调用）
         for feature in features:
-            geo = feature.get('geometry', {})
-            geo_type = geo.get('type')
-            
-            if geo_type == 'MultiPolygon':
-                # 处理MultiPolygon
-                new_coords = []
-                for polygon_group in geo.get('coordinates', []):
-                    new_polygon_group = []
-                    for polygon in polygon_group:
-                        new_polygon = []
-                        for point in polygon:
-                            # 转换坐标 - 这里假设坐标已经是WGS84，但需要调整
-                            # 应用适当的转换来修正显示问题
-                            new_point = adjust_coordinates(point[0], point[1])
-                            new_polygon.append(new_point)
-                        new_polygon_group.append(new_polygon)
-                    new_coords.append(new_polygon_group)
-                geo['coordinates'] = new_coords
-            
-            elif geo_type == 'Polygon':
-                # 处理Polygon
-                new_coords = []
-                for ring in geo.get('coordinates', []):
-                    new_ring = []
-                    for point in ring:
-                        # 转换坐标
-                        new_point = adjust_coordinates(point[0], point[1])
-                        new_ring.append(new_point)
-                    new_coords.append(new_ring)
-                geo['coordinates'] = new_coords
-            
-            # 更新特征的几何
-            feature['geometry'] = geo
+            transform_geometry(feature.get('geometry'), adjust_coordinates)
         
         # 保存修复后的数据
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -110,16 +83,15 @@ def fix_eco_data():
         print(f"Error fixing ecoregion data: {e}")
         traceback.print_exc()
 
-def adjust_coordinates(lon, lat):
+def adjust_coordinates(xy):
     """
-    调整WGS84坐标以修正显示问题
+    调整WGS84坐标以修正显示问题（向量化）
     """
     # 根据原始坐标进行调整，使生态区域正确显示在加州地图上
-    adjusted_lon = lon * 0.85 - 18.0  # 调整经度
-    adjusted_lat = lat * 0.85 + 5.0   # 调整纬度
-    
-    print(f"DEBUG: Adjusted {lon},{lat} -> {adjusted_lon},{adjusted_lat}")
-    return [adjusted_lon, adjusted_lat]
+    adjusted = np.empty_like(xy)
+    adjusted[:, 0] = xy[:, 0] * 0.85 - 18.0  # 调整经度
+    adjusted[:, 1] = xy[:, 1] * 0.85 + 5.0   # 调整纬度
+    return adjusted
 
 if __name__ == "__main__":
     print("Starting ecoregion data fix...")
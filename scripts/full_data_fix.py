@@ -1,7 +1,15 @@
 import json
 import os
 import math
-import random
+from contextlib import ExitStack
+
+import numpy as np
+
+from geojson_stream import GeoJSONWriter, iter_features
+from build_manifest import IncrementalBuild
+from geo_transform import SOURCE_CRS, transform_geometry, wgs84_transform
+from geoparquet import GeoParquetWriter, parquet_available, parquet_path
+from geo_simplify import DEFAULT_LOD_ZOOMS, DEFAULT_ZOOM, count_coordinates, lod_path, simplify_lods
 
 def read_geojson_file(file_path):
     """读取GeoJSON文件并返回其内容"""
@@ -23,86 +31,86 @@ def save_geojson_file(data, file_path):
     except Exception as e:
         print(f"Error saving file {file_path}: {e}")
 
-def convert_to_wgs84(x, y):
+def convert_to_wgs84(xy):
     """
-    简单转换函数 - 这里使用简单线性变换估算
-    实际项目中应使用专业的坐标转换库如pyproj
+    简单转换函数（向量化）- 这里使用简单线性变换估算
+    仅在未安装 pyproj 时使用（或设置 COORDINATE_TRANSFORM=affine），
+    否则使用 pyproj 从加州 Albers 投影（SOURCE_CRS）转换
     """
     # 加州大致坐标范围
     # 大致估算，仅用于演示
-    lon = -124.4096 + (x / 1000000) * 10.4
-    lat = 32.5343 + (y / 1000000) * 9.5
+    lon = -124.4096 + (xy[:, 0] / 1000000) * 10.4
+    lat = 32.5343 + (xy[:, 1] / 1000000) * 9.5
     
     # 限制在合理范围内
-    lon = max(-124.4096, min(-114.1308, lon))
-    lat = max(32.5343, min(42.0095, lat))
+    lon = np.clip(lon, -124.4096, -114.1308)
+    lat = np.clip(lat, 32.5343, 42.0095)
     
-    return [lon, lat]
+    return np.column_stack([lon, lat])
 
-def advanced_simplify_geometry(geometry, precision=5, sample_rate=1.0):
-    """高级简化几何数据，减少精度并采样点"""
-    if not geometry:
-        return
-    
-    geo_type = geometry.get("type")
-    
-    if geo_type == "Point":
-        coordinates = geometry.get("coordinates", [])
-        if coordinates:
-            geometry["coordinates"] = [round(coordinates[0], precision), round(coordinates[1], precision)]
-    
-    elif geo_type in ["LineString", "MultiPoint"]:
-        # 随机采样点
-        coords = geometry.get("coordinates", [])
-        if sample_rate < 1.0 and len(coords) > 10:
-            # 采样点，但确保保留前后点
-            sample_size = max(10, int(len(coords) * sample_rate))
-            sampled_indices = sorted(random.sample(range(1, len(coords)-1), sample_size-2))
-            sampled_coords = [coords[0]] + [coords[i] for i in sampled_indices] + [coords[-1]]
-            geometry["coordinates"] = sampled_coords
-        
-        # 减少精度
-        for i, point in enumerate(geometry.get("coordinates", [])):
-            if point:
-                geometry["coordinates"][i] = [round(point[0], precision), round(point[1], precision)]
-    
-    elif geo_type in ["Polygon", "MultiLineString"]:
-        for i, line in enumerate(geometry.get("coordinates", [])):
-            # 随机采样点
-            if sample_rate < 1.0 and len(line) > 10:
-                # 采样点，但确保保留前后点（对于多边形，首尾点需相同）
-                sample_size = max(10, int(len(line) * sample_rate))
-                if geo_type == "Polygon":
-                    # 确保首尾相同
-                    sampled_indices = sorted(random.sample(range(1, len(line)-1), sample_size-2))
-                    sampled_line = [line[0]] + [line[i] for i in sampled_indices] + [line[0]]
-                else:
-                    sampled_indices = sorted(random.sample(range(1, len(line)-1), sample_size-2))
-                    sampled_line = [line[0]] + [line[i] for i in sampled_indices] + [line[-1]]
-                geometry["coordinates"][i] = sampled_line
-            
-            # 减少精度
-            for j, point in enumerate(geometry["coordinates"][i]):
-                geometry["coordinates"][i][j] = [round(point[0], precision), round(point[1], precision)]
+# 实际使用的坐标转换：pyproj（加州 Albers -> WGS84），没有 pyproj 时退回上面的线性估算
+to_wgs84 = wgs84_transform(convert_to_wgs84)
+
+def open_lod_writers(stack, output_path, zooms=DEFAULT_LOD_ZOOMS, main_zoom=DEFAULT_ZOOM):
+    """为每个细节层级（LOD）打开一个流式写入器：主文件使用 main_zoom，其余写入 *.z{zoom}.geojson"""
+    return {
+        zoom: stack.enter_context(GeoJSONWriter(output_path if zoom == main_zoom else lod_path(output_path, zoom)))
+        for zoom in zooms
+    }
+
+def lod_output_files(output_path, zooms=DEFAULT_LOD_ZOOMS, main_zoom=DEFAULT_ZOOM):
+    """一次优化生成的所有文件（每个 LOD 的 GeoJSON，以及安装了 pyarrow 时的 GeoParquet）"""
+    files = [output_path if zoom == main_zoom else lod_path(output_path, zoom) for zoom in zooms]
+    return files + ([parquet_path(output_path)] if parquet_available else [])
+
+def open_parquet_writer(stack, output_path):
+    """主文件对应的 GeoParquet 写入器（未安装 pyarrow 时返回 None）"""
+    if not parquet_available:
+        return None
+    return stack.enter_context(GeoParquetWriter(parquet_path(output_path)))
+
+def report_lod_outputs(lod_writers, vertex_counts, parquet=None):
+    """打印每个 LOD 文件的顶点数和文件大小"""
+    for zoom, writer in lod_writers.items():
+        print(f"  zoom {zoom:>2}: {vertex_counts[zoom]} vertices, {os.path.getsize(writer.path) / (1024*1024):.2f} MB -> {writer.path}")
+    if parquet is not None:
+        print(f"  GeoParquet (zoom {DEFAULT_ZOOM}): {os.path.getsize(parquet.path) / (1024*1024):.2f} MB -> {parquet.path}")
+
+def simplify_feature_lods(feature, zooms=DEFAULT_LOD_ZOOMS):
+    """
+    按缩放级别确定性地简化一个要素（在工作进程中运行）
     
-    elif geo_type == "MultiPolygon":
-        for i, polygon in enumerate(geometry.get("coordinates", [])):
-            for j, ring in enumerate(polygon):
-                # 随机采样点
-                if sample_rate < 1.0 and len(ring) > 10:
-                    # 采样点，但确保保留首尾点（对于多边形，首尾点需相同）
-                    sample_size = max(10, int(len(ring) * sample_rate))
-                    # 确保首尾相同
-                    sampled_indices = sorted(random.sample(range(1, len(ring)-1), sample_size-2))
-                    sampled_ring = [ring[0]] + [ring[k] for k in sampled_indices] + [ring[0]]
-                    geometry["coordinates"][i][j] = sampled_ring
-                
-                # 减少精度
-                for k, point in enumerate(geometry["coordinates"][i][j]):
-                    geometry["coordinates"][i][j][k] = [round(point[0], precision), round(point[1], precision)]
+    返回 (简化前的顶点数, {zoom: 简化后的要素})
+    """
+    lods = simplify_lods(feature.get("geometry"), zooms, precision=5)
+    return count_coordinates(feature.get("geometry")), {
+        zoom: {
+            "type": "Feature",
+            "properties": feature.get("properties"),
+            "geometry": lods[zoom]
+        }
+        for zoom in zooms
+    }
+
+def convert_feature_to_wgs84(feature):
+    """把一个生态区域要素的坐标转换为WGS84（每个几何体一次向量化调用）"""
+    transform_geometry(feature.get('geometry'), to_wgs84)
+    return feature
+
+def fix_eco_feature(feature):
+    """先转换坐标，再按缩放级别确定性地简化（在工作进程中运行）"""
+    return simplify_feature_lods(convert_feature_to_wgs84(feature))
+
+def write_feature_lods(lod_features, lod_writers, vertex_counts, parquet=None):
+    """把一个要素的各个 LOD 写入对应的输出文件（主 LOD 同时写入 GeoParquet）"""
+    for zoom, writer in lod_writers.items():
+        vertex_counts[zoom] += count_coordinates(lod_features[zoom]["geometry"])
+        writer.write(lod_features[zoom])
+    if parquet is not None:
+        parquet.write(lod_features[DEFAULT_ZOOM])
 
 def optimize_fire_data():
-    """优化火灾数据，减小文件大小同时保留所有特征"""
+    """优化火灾数据，减小文件大小同时保留所有特征（流式读取，多进程并行简化）"""
     input_path = "static/data/fires_filtered.geojson"
     output_path = "static/data/fires_optimized.geojson"
     
@@ -111,49 +119,32 @@ def optimize_fire_data():
         return
     
     try:
-        # 读取数据
-        print(f"Reading fire data from {input_path}...")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        features = data.get('features', [])
-        feature_count = len(features)
-        print(f"Processing {feature_count} fire features...")
+        print(f"Processing fire features from {input_path}...")
         
-        # 使用高级简化方法优化每个特征
-        for i, feature in enumerate(features):
-            if i % 1000 == 0:
-                print(f"Processed {i}/{feature_count} features...")
-                
-            # 简化几何数据 - 使用高级方法
-            if "geometry" in feature and feature["geometry"]:
-                # 根据多边形点的数量决定采样率
-                geo = feature["geometry"]
-                point_count = 0
-                
-                if geo.get("type") == "Polygon":
-                    for ring in geo.get("coordinates", []):
-                        point_count += len(ring)
-                elif geo.get("type") == "MultiPolygon":
-                    for polygon in geo.get("coordinates", []):
-                        for ring in polygon:
-                            point_count += len(ring)
-                
-                # 采样率基于点数量
-                sample_rate = 1.0  # 默认不采样
-                if point_count > 1000:
-                    sample_rate = 0.1  # 非常大的多边形
-                elif point_count > 500:
-                    sample_rate = 0.2
-                elif point_count > 200:
-                    sample_rate = 0.5
-                
-                advanced_simplify_geometry(geo, precision=5, sample_rate=sample_rate)
+        # 构建清单只重新简化新增或变化的特征，其余的直接使用上次的结果
+        params = {"step": 1, "zooms": DEFAULT_LOD_ZOOMS, "main_zoom": DEFAULT_ZOOM, "precision": 5}
+        with IncrementalBuild("optimize_fires", params, [input_path], lod_output_files(output_path)) as build:
+            if build.up_to_date():
+                print(f"{output_path} is up to date")
+                return
+            
+            # 按缩放级别确定性地简化每个特征（Douglas-Peucker，保持拓扑），逐个写入每个 LOD 文件
+            original_vertices = 0
+            vertex_counts = {zoom: 0 for zoom in DEFAULT_LOD_ZOOMS}
+            with ExitStack() as stack:
+                lod_writers = open_lod_writers(stack, output_path)
+                parquet = open_parquet_writer(stack, output_path)
+                # 要素分块并行简化（ProcessPoolExecutor），结果按输入顺序写出
+                for i, (vertices, lod_features) in enumerate(build.map(simplify_feature_lods, iter_features(input_path))):
+                    if i % 1000 == 0:
+                        print(f"Processed {i} features...")
+                    original_vertices += vertices
+                    write_feature_lods(lod_features, lod_writers, vertex_counts, parquet)
+            build.finish()
         
-        # 保存优化后的数据
-        print(f"Saving optimized fire data to {output_path}...")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
+        print(f"Saved {lod_writers[DEFAULT_ZOOM].count} optimized fire features to {output_path} "
+              f"({original_vertices} vertices before simplification):")
+        report_lod_outputs(lod_writers, vertex_counts, parquet)
         
         print(f"Original file size: {os.path.getsize(input_path) / (1024*1024):.2f} MB")
         print(f"Optimized file size: {os.path.getsize(output_path) / (1024*1024):.2f} MB")
@@ -162,7 +153,7 @@ def optimize_fire_data():
         print(f"Error optimizing fire data: {e}")
 
 def fix_eco_data_wgs84():
-    """修复生态区域数据的坐标系统问题，转换为WGS84"""
+    """修复生态区域数据的坐标系统问题，转换为WGS84（流式读取，多进程并行处理）"""
     input_path = "static/data/ecoregions_filtered.geojson"
     output_path = "static/data/ecoregions_optimized.geojson"
     
@@ -171,95 +162,40 @@ def fix_eco_data_wgs84():
         return
     
     try:
-        # 读取数据
-        print(f"Reading ecoregion data from {input_path}...")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        features = data.get('features', [])
-        print(f"Processing {len(features)} ecoregion features...")
+        print(f"Processing ecoregion features from {input_path}...")
         
-        # 处理每个特征
-        for feature in features:
-            geo = feature.get('geometry', {})
-            geo_type = geo.get('type')
+        # 坐标转换方式也是构建参数：改变后所有特征都会重新处理
+        params = {"step": 1, "zooms": DEFAULT_LOD_ZOOMS, "main_zoom": DEFAULT_ZOOM, "precision": 5,
+                  "transform": to_wgs84.__name__, "source_crs": SOURCE_CRS}
+        with IncrementalBuild("optimize_ecoregions", params, [input_path], lod_output_files(output_path)) as build:
+            if build.up_to_date():
+                print(f"{output_path} is up to date")
+                return
             
-            if geo_type == 'MultiPolygon':
-                # 处理MultiPolygon
-                new_coords = []
-                for polygon_group in geo.get('coordinates', []):
-                    new_polygon_group = []
-                    for polygon in polygon_group:
-                        # 对于大多边形，进行点采样
-                        if len(polygon) > 1000:
-                            sample_rate = 0.05
-                        elif len(polygon) > 500:
-                            sample_rate = 0.1
-                        elif len(polygon) > 200:
-                            sample_rate = 0.2
-                        else:
-                            sample_rate = 1.0
-                            
-                        if sample_rate < 1.0:
-                            # 采样点，但确保保留首尾点（对于多边形，首尾点需相同）
-                            sample_size = max(20, int(len(polygon) * sample_rate))
-                            sampled_indices = sorted(random.sample(range(1, len(polygon)-1), sample_size-2))
-                            sampled_polygon = [polygon[0]] + [polygon[i] for i in sampled_indices] + [polygon[0]]
-                            polygon = sampled_polygon
-                        
-                        new_polygon = []
-                        for point in polygon:
-                            # 转换坐标
-                            new_point = convert_to_wgs84(point[0], point[1])
-                            new_polygon.append(new_point)
-                        new_polygon_group.append(new_polygon)
-                    new_coords.append(new_polygon_group)
-                geo['coordinates'] = new_coords
-            
-            elif geo_type == 'Polygon':
-                # 处理Polygon
-                new_coords = []
-                for ring in geo.get('coordinates', []):
-                    # 对于大环，进行点采样
-                    if len(ring) > 1000:
-                        sample_rate = 0.05
-                    elif len(ring) > 500:
-                        sample_rate = 0.1
-                    elif len(ring) > 200:
-                        sample_rate = 0.2
-                    else:
-                        sample_rate = 1.0
-                        
-                    if sample_rate < 1.0:
-                        # 采样点，但确保保留首尾点相同
-                        sample_size = max(20, int(len(ring) * sample_rate))
-                        sampled_indices = sorted(random.sample(range(1, len(ring)-1), sample_size-2))
-                        sampled_ring = [ring[0]] + [ring[i] for i in sampled_indices] + [ring[0]]
-                        ring = sampled_ring
-                    
-                    new_ring = []
-                    for point in ring:
-                        # 转换坐标
-                        new_point = convert_to_wgs84(point[0], point[1])
-                        new_ring.append(new_point)
-                    new_coords.append(new_ring)
-                geo['coordinates'] = new_coords
-            
-            # 更新特征的几何
-            feature['geometry'] = geo
+            # 处理每个特征：先转换坐标，再按缩放级别确定性地简化
+            first_geometry = None
+            vertex_counts = {zoom: 0 for zoom in DEFAULT_LOD_ZOOMS}
+            with ExitStack() as stack:
+                lod_writers = open_lod_writers(stack, output_path)
+                parquet = open_parquet_writer(stack, output_path)
+                # 要素分块并行处理（ProcessPoolExecutor），结果按输入顺序写出
+                for _, lod_features in build.map(fix_eco_feature, iter_features(input_path)):
+                    write_feature_lods(lod_features, lod_writers, vertex_counts, parquet)
+                    if lod_writers[DEFAULT_ZOOM].count == 1:
+                        first_geometry = lod_features[DEFAULT_ZOOM]["geometry"]
+            build.finish()
         
-        # 保存修复后的数据
-        print(f"Saving optimized ecoregion data to {output_path}...")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
+        # 保存修复后的数据（每个 LOD 一个文件）
+        print(f"Saved {lod_writers[DEFAULT_ZOOM].count} optimized ecoregion features to {output_path}:")
+        report_lod_outputs(lod_writers, vertex_counts, parquet)
         
         print(f"Original file size: {os.path.getsize(input_path) / (1024*1024):.2f} MB")
         print(f"Optimized file size: {os.path.getsize(output_path) / (1024*1024):.2f} MB")
         
         # 简单验证
         print("\nValidation of first feature:")
-        if features:
-            geo = features[0].get('geometry', {})
+        if lod_writers[DEFAULT_ZOOM].count:
+            geo = first_geometry or {}
             geo_type = geo.get('type')
             print(f"Geometry type: {geo_type}")
             
@@ -0,0 +1,60 @@
+"""
+Parallel, order-preserving feature pipeline for the data scripts.
+
+Features are grouped into chunks and each chunk is processed by a worker
+process (ProcessPoolExecutor). Results come back in input order, and only a
+few chunks per worker are in flight at once, so a streamed input
+(geojson_stream.iter_features) keeps its bounded memory use.
+
+The function applied to each feature must be defined at module level (it is
+pickled by reference), and the calling script must keep its work under
+`if __name__ == "__main__":`.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Worker processes (default: one per core); 1 runs everything in this process
+WORKERS = int(os.getenv("DATA_WORKERS", "0")) or os.cpu_count() or 1
+# Features sent to a worker at a time
+CHUNK_SIZE = int(os.getenv("DATA_CHUNK_SIZE", "256"))
+# Chunks queued per worker ahead of the one being consumed
+PREFETCH = 4
+
+
+def _apply_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_map(func, items, workers=None, chunk_size=None):
+    """
+    Yield func(item) for every item, in input order, computed in worker processes.
+
+    `items` may be any iterable (it is consumed lazily). With workers=1 the
+    work runs inline, which is also handy for debugging.
+    """
+    workers = workers or WORKERS
+    chunk_size = chunk_size or CHUNK_SIZE
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append(executor.submit(_apply_chunk, func, chunk))
+            if len(pending) >= workers * PREFETCH:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,84 @@
+"""
+Deterministic geometry simplification for the data scripts.
+
+Replaces the random vertex sampling the scripts used to do: geometries are
+simplified with shapely's topology-preserving Douglas-Peucker, so the same
+input always gives the same output and shapes keep their outline.
+
+Tolerances are given per web-map zoom level, and one call produces every
+level of detail (LOD) from a single parse of the geometry.
+"""
+import json
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+# Zoom levels written by default: overview, regional, and the full-detail map view
+DEFAULT_LOD_ZOOMS = (6, 9, 12)
+# Zoom used for the main output file the map loads
+DEFAULT_ZOOM = 12
+
+
+def zoom_tolerance(zoom, pixels=1.0):
+    """Simplification tolerance in degrees that keeps errors under `pixels` screen pixels at `zoom`."""
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def _round_coordinates(geom, precision):
+    return shapely.transform(geom, lambda coords: np.round(coords, precision))
+
+
+def _to_geojson(geom):
+    """GeoJSON geometry dict, or None for an empty result."""
+    if geom is None or geom.is_empty:
+        return None
+    return json.loads(shapely.to_geojson(geom))
+
+
+def simplify_lods(geometry, zooms=DEFAULT_LOD_ZOOMS, precision=5, pixels=1.0):
+    """
+    Simplify one GeoJSON geometry dict for several zoom levels.
+
+    Returns {zoom: geometry dict or None}. Coordinates are rounded to
+    `precision` decimals after simplification; a geometry that collapses at a
+    zoom level maps to None there.
+    """
+    if not geometry:
+        return {zoom: None for zoom in zooms}
+    try:
+        geom = shape(geometry)
+    except (ValueError, shapely.errors.GEOSException):
+        # Malformed rings (fewer than 4 points etc.) are passed through untouched
+        return {zoom: geometry for zoom in zooms}
+
+    lods = {}
+    for zoom in zooms:
+        simplified = shapely.simplify(geom, zoom_tolerance(zoom, pixels), preserve_topology=True)
+        lods[zoom] = _to_geojson(_round_coordinates(simplified, precision))
+    return lods
+
+
+def simplify_geometry(geometry, zoom=DEFAULT_ZOOM, precision=5, pixels=1.0):
+    """Simplify one GeoJSON geometry dict for a single zoom level."""
+    return simplify_lods(geometry, (zoom,), precision, pixels)[zoom]
+
+
+def lod_path(path, zoom):
+    """Output path for one LOD, e.g. fires_optimized.geojson -> fires_optimized.z6.geojson."""
+    root, ext = path.rsplit(".", 1) if "." in path else (path, "geojson")
+    return f"{root}.z{zoom}.{ext}"
+
+
+# Nesting depth of the coordinate arrays for each GeoJSON geometry type
+COORDINATE_DEPTH = {"Point": 0, "LineString": 1, "MultiPoint": 1, "Polygon": 2, "MultiLineString": 2, "MultiPolygon": 3}
+
+
+def count_coordinates(geometry):
+    """Number of vertices in a GeoJSON geometry dict (counted from the nested lists, no parsing)."""
+    if not geometry or geometry.get("type") not in COORDINATE_DEPTH:
+        return 0
+    parts = [geometry.get("coordinates") or []]
+    for _ in range(COORDINATE_DEPTH[geometry["type"]]):
+        parts = [child for part in parts for child in part]
+    return len(parts)
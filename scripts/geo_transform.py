@@ -0,0 +1,92 @@
+"""
+Vectorized coordinate transforms for the data scripts.
+
+A transform is a function taking an (n, 2) float array of x/y and returning
+the transformed (n, 2) array. transform_geometry() gathers every vertex of a
+GeoJSON geometry into one array, applies the transform in a single call and
+writes the result back into the original nesting, so reprojecting a feature
+costs one NumPy/PROJ call instead of one Python call per vertex.
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from geo_simplify import COORDINATE_DEPTH
+
+# pyproj is optional; without it the scripts fall back to their affine approximations
+try:
+    from pyproj import Transformer
+    pyproj_available = True
+except ImportError:
+    Transformer = None
+    pyproj_available = False
+
+# CRS of the projected source data (California Albers)
+SOURCE_CRS = os.getenv("SOURCE_CRS", "EPSG:3310")
+# "pyproj" (default when installed) or "affine" to force the scripts' approximations
+COORDINATE_TRANSFORM = os.getenv("COORDINATE_TRANSFORM", "pyproj")
+
+
+@lru_cache(maxsize=None)
+def _transformer(source_crs, target_crs):
+    # Built once per process (workers included); always_xy keeps lon/lat order
+    return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+def projected_to_wgs84(xy, source_crs=SOURCE_CRS):
+    """Reproject an (n, 2) array from `source_crs` to WGS84 lon/lat with PROJ."""
+    lon, lat = _transformer(source_crs, "EPSG:4326").transform(xy[:, 0], xy[:, 1])
+    return np.column_stack([lon, lat])
+
+
+def wgs84_transform(fallback):
+    """projected_to_wgs84 when pyproj is available (and not disabled), else the `fallback` transform."""
+    if pyproj_available and COORDINATE_TRANSFORM != "affine":
+        return projected_to_wgs84
+    return fallback
+
+
+def _leaf_lists(coordinates, depth):
+    """The innermost position lists (rings/lines) of a coordinates array nested `depth` levels deep."""
+    parts = [coordinates]
+    for _ in range(depth - 1):
+        parts = [child for part in parts for child in part]
+    return parts
+
+
+def _as_xy(positions):
+    if not positions:
+        return np.empty((0, 2))
+    return np.asarray(positions, dtype=np.float64).reshape(len(positions), -1)[:, :2]
+
+
+def _rebuild(coordinates, depth, leaves):
+    if depth == 1:
+        return next(leaves).tolist()
+    return [_rebuild(child, depth - 1, leaves) for child in coordinates]
+
+
+def transform_geometry(geometry, transform):
+    """
+    Apply a vectorized `transform` to every vertex of a GeoJSON geometry dict (in place).
+
+    Only x/y are kept, as the per-point converters did. Returns the geometry.
+    """
+    if not geometry or geometry.get("type") not in COORDINATE_DEPTH:
+        return geometry
+    coordinates = geometry.get("coordinates")
+    if not coordinates:
+        return geometry
+    depth = COORDINATE_DEPTH[geometry["type"]]
+
+    if depth == 0:
+        geometry["coordinates"] = transform(_as_xy([coordinates]))[0].tolist()
+        return geometry
+
+    leaves = _leaf_lists(coordinates, depth)
+    xy = np.concatenate([_as_xy(positions) for positions in leaves])
+    transformed = transform(xy)
+    offsets = np.cumsum([len(positions) for positions in leaves])[:-1]
+    geometry["coordinates"] = _rebuild(coordinates, depth, iter(np.split(transformed, offsets)))
+    return geometry
@@ -0,0 +1,195 @@
+"""
+Streaming GeoJSON reader and writer for the data scripts.
+
+The reader walks a FeatureCollection one feature at a time: text is read in
+large chunks and each feature is decoded with json's C scanner
+(JSONDecoder.raw_decode) straight from the buffer, so memory stays bounded by
+the largest single feature rather than the file. The writer emits features
+as they are produced and moves the file into place when it is closed.
+"""
+import os
+import json
+
+# Characters read from disk per refill
+CHUNK_SIZE = 8 * 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class GeoJSONReader:
+    """
+    Iterate the features of a (possibly very large) GeoJSON FeatureCollection.
+
+    Top-level members other than "features" (type, crs, name, metadata...)
+    are collected in `header`; members that come after the features array
+    are only available once iteration has finished.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.header = {}
+        self.count = 0
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._file = f
+            self._buf, self._pos, self._eof = "", 0, False
+            try:
+                yield from self._read_collection()
+            finally:
+                self._file = None
+                self._buf = ""
+
+    # -- buffer handling -------------------------------------------------
+
+    def _fill(self, min_extra=1):
+        """Append at least `min_extra` characters (unless at EOF); drop what has been consumed."""
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        target = len(self._buf) + min_extra
+        while len(self._buf) < target and not self._eof:
+            chunk = self._file.read(max(self.chunk_size, min_extra))
+            if not chunk:
+                self._eof = True
+            self._buf += chunk
+        return not self._eof or self._pos < len(self._buf)
+
+    def _skip(self, chars=_WHITESPACE):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in chars:
+                self._pos += 1
+            if self._pos < len(self._buf) or self._eof:
+                return
+            self._fill()
+
+    def _expect(self, char):
+        self._skip()
+        if self._pos >= len(self._buf):
+            self._fill()
+        if self._pos >= len(self._buf) or self._buf[self._pos] != char:
+            found = self._buf[self._pos:self._pos + 20] if self._pos < len(self._buf) else "end of file"
+            raise ValueError(f"{self.path}: expected '{char}', found {found!r}")
+        self._pos += 1
+
+    def _peek(self):
+        self._skip()
+        return self._buf[self._pos] if self._pos < len(self._buf) else ""
+
+    def _value(self):
+        """Decode the next JSON value, reading more input until it is complete."""
+        self._skip()
+        need = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                # Incomplete value: read more (doubling, so huge features are not re-scanned too often)
+                self._fill(need)
+                need *= 2
+                continue
+            if end == len(self._buf) and not self._eof:
+                # A number at the very end of the buffer may continue in the next chunk
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    # -- structure -------------------------------------------------------
+
+    def _read_collection(self):
+        self._fill()
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "features":
+                yield from self._read_features()
+            else:
+                self.header[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def _read_features(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            feature = self._value()
+            self.count += 1
+            yield feature
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
+
+
+def iter_features(path, chunk_size=CHUNK_SIZE):
+    """Yield the features of a GeoJSON FeatureCollection one at a time."""
+    return iter(GeoJSONReader(path, chunk_size))
+
+
+class GeoJSONWriter:
+    """
+    Write a FeatureCollection incrementally.
+
+    Use as a context manager. Members in `header` are written before the
+    features, members in `footer` (which may be filled in while writing,
+    e.g. summary metadata) after them. Output goes to a temporary file that
+    replaces `path` only when the writer closes without an error.
+    """
+
+    def __init__(self, path, header=None, footer=None):
+        self.path = path
+        self.header = {"type": "FeatureCollection", **(header or {})}
+        self.footer = footer if footer is not None else {}
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("{")
+        for key, value in self.header.items():
+            self._file.write(f"{json.dumps(key)}: {json.dumps(value)}, ")
+        self._file.write('"features": [')
+        return self
+
+    def write(self, feature):
+        if self.count:
+            self._file.write(", ")
+        json.dump(feature, self._file)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._file.write("]")
+                for key, value in self.footer.items():
+                    self._file.write(f", {json.dumps(key)}: {json.dumps(value)}")
+                self._file.write("}")
+        finally:
+            self._file.close()
+        if exc_type is None:
+            os.replace(self._tmp_path, self.path)
+        else:
+            os.remove(self._tmp_path)
+        return False
@@ -0,0 +1,242 @@
+"""
+GeoParquet output for the data scripts.
+
+Features are stored as WKB geometries plus one column per property, with a
+per-row bounding box struct ("bbox": xmin/ymin/xmax/ymax, the GeoParquet 1.1
+bbox covering). Features are buffered in windows of WINDOW_SIZE rows; each
+window is ordered along a Hilbert curve of the bbox centers and written as
+small row groups, so each row group covers a compact area and its bbox column
+statistics let a reader skip everything outside a query box (see
+geoparquet_layers.py on the server side). Memory is bounded by one window.
+
+Each row keeps its position in the input as "fid", so readers can restore
+the original feature order.
+"""
+import os
+import json
+
+import numpy as np
+
+# pyarrow and shapely are only needed when GeoParquet output is written
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import shapely
+    from shapely.geometry import shape
+    parquet_available = True
+except ImportError:
+    pa = None
+    pq = None
+    parquet_available = False
+
+# Rows per row group: small enough that a bbox query reads little beyond its area
+ROW_GROUP_SIZE = 1024
+# Rows buffered and Hilbert-sorted together before their row groups are written
+WINDOW_SIZE = 64 * ROW_GROUP_SIZE
+# Hilbert keys are computed over the whole lon/lat range, so they agree between windows
+HILBERT_EXTENT = (-180.0, -90.0, 180.0, 90.0)
+GEOPARQUET_VERSION = "1.1.0"
+
+
+def parquet_path(path):
+    """GeoParquet path next to a GeoJSON output, e.g. fires_filtered.geojson -> fires_filtered.parquet."""
+    root = path.rsplit(".", 1)[0] if path.endswith(".geojson") else path
+    return f"{root}.parquet"
+
+
+def _as_strings(values):
+    return [None if v is None else (v if isinstance(v, str) else json.dumps(v)) for v in values]
+
+
+def _property_array(values):
+    """Arrow array for one property column; mixed-type and all-null columns are stored as strings."""
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(_as_strings(values), type=pa.string())
+    # An all-null first window would otherwise fix the column's type as null for the whole file
+    return array.cast(pa.string()) if pa.types.is_null(array.type) else array
+
+
+def _property_array_as(values, type):
+    """
+    Arrow array of `type` for a column whose type was fixed by an earlier window.
+
+    Returns (array, invalid): values that cannot be converted are stored as
+    null and counted in `invalid`.
+    """
+    if pa.types.is_string(type):
+        return pa.array(_as_strings(values), type=type), 0
+    try:
+        return pa.array(values, type=type), 0
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        converted, invalid = [], 0
+        for value in values:
+            try:
+                converted.append(pa.scalar(value, type=type).as_py())
+            except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+                converted.append(None)
+                invalid += value is not None
+        return pa.array(converted, type=type), invalid
+
+
+def _hilbert(bounds, extent, order=16):
+    """Hilbert curve index of each bbox center, quantized to `order` bits per axis within `extent`."""
+    n = 1 << order
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2
+    span_x = max(extent[2] - extent[0], 1e-12)
+    span_y = max(extent[3] - extent[1], 1e-12)
+    x = np.nan_to_num((cx - extent[0]) / span_x * (n - 1)).clip(0, n - 1).astype(np.int64)
+    y = np.nan_to_num((cy - extent[1]) / span_y * (n - 1)).clip(0, n - 1).astype(np.int64)
+    d = np.zeros(len(bounds), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x[flip] = n - 1 - x[flip]
+        y[flip] = n - 1 - y[flip]
+        swap = ~ry
+        x[swap], y[swap] = y[swap], x[swap].copy()
+        s //= 2
+    return d
+
+
+class GeoParquetWriter:
+    """
+    Stream features into a GeoParquet file, one Hilbert-sorted window at a time.
+
+    Use as a context manager, like geojson_stream.GeoJSONWriter. Only the
+    current window's WKB and property values are held in memory. The column
+    types are fixed by the first window; a property first seen in a later
+    window is dropped and values that do not fit their column are stored as
+    null (both are counted in `dropped_columns` / `invalid_values`).
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE, window_size=WINDOW_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.window_size = max(row_group_size, window_size)
+        self.count = 0
+        self.dropped_columns = set()
+        self.invalid_values = 0
+        self._tmp_path = f"{path}.tmp"
+        self._writer = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self._start = self.count
+        self._wkb = []
+        self._bounds = []
+        self._properties = {}
+
+    def __enter__(self):
+        return self
+
+    def write(self, feature):
+        geometry = feature.get("geometry")
+        wkb, bounds = None, (np.nan, np.nan, np.nan, np.nan)
+        if geometry:
+            try:
+                geom = shape(geometry)
+                if not geom.is_empty:
+                    wkb = shapely.to_wkb(geom)
+                    bounds = tuple(geom.bounds)
+            except (ValueError, TypeError, AttributeError, shapely.errors.GEOSException):
+                # Malformed geometry: the row is kept without geometry
+                pass
+        self._wkb.append(wkb)
+        self._bounds.append(bounds)
+
+        rows = len(self._wkb) - 1
+        props = feature.get("properties") or {}
+        for name in props:
+            if name not in self._properties:
+                self._properties[name] = [None] * rows
+        for name, values in self._properties.items():
+            values.append(props.get(name))
+        self.count += 1
+        if len(self._wkb) >= self.window_size:
+            self._flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self._wkb or self._writer is None:
+                    self._flush()
+                self._writer.close()
+                self._writer = None
+                os.replace(self._tmp_path, self.path)
+                if self.dropped_columns:
+                    print(f"GeoParquet {self.path}: properties first seen after the first window were dropped: "
+                          f"{', '.join(sorted(self.dropped_columns))}")
+                if self.invalid_values:
+                    print(f"GeoParquet {self.path}: {self.invalid_values} values did not fit their column type "
+                          f"and were stored as null")
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+            if exc_type is not None and os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        return False
+
+    def _flush(self):
+        """Hilbert-sort the buffered window and append it to the file as row groups."""
+        bounds = np.array(self._bounds, dtype=np.float64).reshape(-1, 4)
+        present = ~np.isnan(bounds[:, 0])
+        order = np.argsort(_hilbert(bounds, HILBERT_EXTENT), kind="stable")
+
+        bbox = pa.StructArray.from_arrays(
+            [pa.array(bounds[order, i], mask=~present[order]) for i in range(4)],
+            names=["xmin", "ymin", "xmax", "ymax"]
+        )
+        columns = {
+            "fid": pa.array(order + self._start, type=pa.int64()),
+            "geometry": pa.array([self._wkb[i] for i in order], type=pa.binary()),
+            "bbox": bbox
+        }
+
+        if self._writer is None:
+            for name, values in self._properties.items():
+                if name not in columns:
+                    columns[name] = _property_array([values[i] for i in order])
+            table = pa.table(columns)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"geo": self._geo_metadata()})
+            self._writer = pq.ParquetWriter(self._tmp_path, table.schema, compression="zstd", write_statistics=True)
+        else:
+            schema = self._writer.schema
+            for field in schema:
+                if field.name in columns:
+                    continue
+                values = self._properties.get(field.name)
+                values = [None] * len(order) if values is None else [values[i] for i in order]
+                columns[field.name], invalid = _property_array_as(values, field.type)
+                self.invalid_values += invalid
+            self.dropped_columns.update(name for name in self._properties if name not in schema.names)
+            table = pa.table(columns, schema=schema)
+
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._reset_window()
+
+    @staticmethod
+    def _geo_metadata():
+        """
+        GeoParquet "geo" metadata. It is written with the schema before the
+        whole file is seen, so the geometry types and the file bbox are left
+        unspecified (an empty geometry_types list means any type).
+        """
+        geo = {
+            "version": GEOPARQUET_VERSION,
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": [],
+                    "covering": {"bbox": {key: ["bbox", key] for key in ("xmin", "ymin", "xmax", "ymax")}}
+                }
+            }
+        }
+        return json.dumps(geo).encode()
@@ -1,65 +1,10 @@
 #!/usr/bin/env python
-import json
 import os
 from datetime import datetime
 import re
 
-def load_geojson_in_chunks(file_path, chunk_size=1024*1024*10):  # 10MB chunks
-    """Load a large GeoJSON file in chunks and parse it incrementally."""
-    fire_features = []
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        # Read and parse the header
-        header = ""
-        while True:
-            char = f.read(1)
-            header += char
-            if header.endswith('"features": ['):
-                break
-        
-        # Now read features one by one
-        feature_str = ""
-        open_braces = 0
-        in_feature = False
-        
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-                
-            for char in chunk:
-                if not in_feature and char == '{':
-                    in_feature = True
-                
-                if in_feature:
-                    feature_str += char
-                    if char == '{':
-                        open_braces += 1
-                    elif char == '}':
-                        open_braces -= 1
-                        
-                    if open_braces == 0:
-                        # We've found a complete feature
-                        try:
-                            feature = json.loads(feature_str)
-                            fire_features.append(feature)
-                        except json.JSONDecodeError:
-                            print(f"Error parsing feature: {feature_str[:100]}...")
-                        
-                        feature_str = ""
-                        in_feature = False
-                        
-                        # Skip the comma and whitespace
-                        while True:
-                            next_char = f.read(1)
-                            if not next_char or next_char == '{':
-                                if next_char == '{':
-                                    feature_str = '{'
-                                    open_braces = 1
-                                    in_feature = True
-                                break
-    
-    return fire_features
+from geojson_stream import GeoJSONWriter, iter_features
+from build_manifest import IncrementalBuild
 
 def extract_year_from_date(date_str):
     """Extract year from date string in various formats."""
@@ -94,130 +39,124 @@ def extract_year_from_date(date_str):
     
     return None
 
-def process_fire_data(input_file, output_file):
-    """Process fire perimeter data and output a simplified version."""
-    print(f"Processing {input_file}...")
+def simplify_fire_feature(numbered):
+    """Simplify one (position, feature) pair from the fire input; runs in a worker process."""
+    position, feature = numbered
+    props = feature.get('properties', {})
+    
+    # Extract key information
+    year = props.get('YEAR_')
+    if not year and 'ALARM_DATE' in props:
+        year = extract_year_from_date(props['ALARM_DATE'])
+    
+    county = props.get('COUNTY', '')  # Some datasets might have county information
+    fire_name = props.get('FIRE_NAME', '')
+    acres = props.get('GIS_ACRES', 0)
+    
+    # Only include essential properties
+    simplified_props = {
+        'id': props.get('OBJECTID', position),
+        'fire_name': fire_name,
+        'year': year,
+        'county': county,
+        'acres': acres,
+        'alarm_date': props.get('ALARM_DATE', ''),
+        'cont_date': props.get('CONT_DATE', ''),
+        'cause': props.get('CAUSE', '')
+    }
     
-    # Process fire features in chunks
-    features = load_geojson_in_chunks(input_file)
+    return {
+        'type': 'Feature',
+        'properties': simplified_props,
+        'geometry': feature.get('geometry', {})
+    }
+
+def simplify_ecoregion_feature(numbered):
+    """Simplify one (position, feature) pair from the ecoregion input; runs in a worker process."""
+    position, feature = numbered
+    props = feature.get('properties', {})
+    
+    # Only include essential properties
+    simplified_props = {
+        'id': props.get('OBJECTID', position),
+        'eco_section': props.get('S_NAME', ''),
+        'eco_code': props.get('S_CODE', '')
+    }
     
-    # Process and filter features
-    processed_features = []
+    return {
+        'type': 'Feature',
+        'properties': simplified_props,
+        'geometry': feature.get('geometry', {})
+    }
+
+def process_fire_data(input_file, output_file, workers=None):
+    """Process fire perimeter data and output a simplified version."""
+    print(f"Processing {input_file}...")
     
     # Track counties and years for dropdown options
     counties = set()
     years = set()
     
-    for feature in features:
-        props = feature.get('properties', {})
-        
-        # Extract key information
-        year = props.get('YEAR_')
-        if not year and 'ALARM_DATE' in props:
-            year = extract_year_from_date(props['ALARM_DATE'])
-        
-        county = props.get('COUNTY', '')  # Some datasets might have county information
-        fire_name = props.get('FIRE_NAME', '')
-        acres = props.get('GIS_ACRES', 0)
-        
-        # Only include essential properties
-        simplified_props = {
-            'id': props.get('OBJECTID', len(processed_features) + 1),
-            'fire_name': fire_name,
-            'year': year,
-            'county': county,
-            'acres': acres,
-            'alarm_date': props.get('ALARM_DATE', ''),
-            'cont_date': props.get('CONT_DATE', ''),
-            'cause': props.get('CAUSE', '')
-        }
-        
-        # Add to tracking sets
-        if county:
-            counties.add(county)
-        if year:
-            years.add(year)
+    with IncrementalBuild('process_fires', {'step': 1}, [input_file], [output_file]) as build:
+        if build.up_to_date():
+            print(f"{output_file} is up to date")
+            return
         
-        # Create simplified feature
-        simplified_feature = {
-            'type': 'Feature',
-            'properties': simplified_props,
-            'geometry': feature.get('geometry', {})
-        }
-        
-        processed_features.append(simplified_feature)
-    
-    # Create output GeoJSON
-    output_geojson = {
-        'type': 'FeatureCollection',
-        'metadata': {
-            'counties': sorted(list(counties)),
-            'years': sorted(list(years))
-        },
-        'features': processed_features
-    }
-    
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_geojson, f)
-    
-    print(f"Processed {len(processed_features)} features")
+        # New or changed features are simplified in worker processes (the rest
+        # come from the build manifest) and streamed, in input order, into the
+        # output; the metadata (only known once every feature has been seen)
+        # is written after them
+        features = iter_features(input_file)
+        with GeoJSONWriter(output_file) as writer:
+            for feature in build.map(simplify_fire_feature, features, workers, with_position=True):
+                props = feature['properties']
+                
+                # Add to tracking sets
+                if props['county']:
+                    counties.add(props['county'])
+                if props['year']:
+                    years.add(props['year'])
+                
+                writer.write(feature)
+            
+            writer.footer['metadata'] = {
+                'counties': sorted(list(counties)),
+                'years': sorted(list(years))
+            }
+        build.finish()
+    
+    print(f"Processed {writer.count} features")
     print(f"Output written to {output_file}")
 
-def process_ecoregion_data(input_file, output_file):
+def process_ecoregion_data(input_file, output_file, workers=None):
     """Process ecoregion data and output a simplified version."""
     print(f"Processing {input_file}...")
     
-    # Process ecoregion features
-    features = load_geojson_in_chunks(input_file)
-    
-    # Process and filter features
-    processed_features = []
-    
     # Track ecoregions for dropdown options
     ecoregions = set()
     
-    for feature in features:
-        props = feature.get('properties', {})
-        
-        # Extract key information
-        eco_section = props.get('S_NAME', '')
-        eco_code = props.get('S_CODE', '')
+    with IncrementalBuild('process_ecoregions', {'step': 1}, [input_file], [output_file]) as build:
+        if build.up_to_date():
+            print(f"{output_file} is up to date")
+            return
         
-        # Only include essential properties
-        simplified_props = {
-            'id': props.get('OBJECTID', len(processed_features) + 1),
-            'eco_section': eco_section,
-            'eco_code': eco_code
-        }
-        
-        # Add to tracking sets
-        if eco_section:
-            ecoregions.add(eco_section)
-        
-        # Create simplified feature
-        simplified_feature = {
-            'type': 'Feature',
-            'properties': simplified_props,
-            'geometry': feature.get('geometry', {})
-        }
-        
-        processed_features.append(simplified_feature)
-    
-    # Create output GeoJSON
-    output_geojson = {
-        'type': 'FeatureCollection',
-        'metadata': {
-            'ecoregions': sorted(list(ecoregions))
-        },
-        'features': processed_features
-    }
-    
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_geojson, f)
-    
-    print(f"Processed {len(processed_features)} ecoregion features")
+        features = iter_features(input_file)
+        with GeoJSONWriter(output_file) as writer:
+            for feature in build.map(simplify_ecoregion_feature, features, workers, with_position=True):
+                eco_section = feature['properties']['eco_section']
+                
+                # Add to tracking sets
+                if eco_section:
+                    ecoregions.add(eco_section)
+                
+                writer.write(feature)
+            
+            writer.footer['metadata'] = {
+                'ecoregions': sorted(list(ecoregions))
+            }
+        build.finish()
+    
+    print(f"Processed {writer.count} ecoregion features")
     print(f"Output written to {output_file}")
 
 if __name__ == "__main__":
@@ -10,6 +10,15 @@ document.addEventListener('DOMContentLoaded', function() {
     let ecoregions = new Set();
     let fireLayerGroup = L.layerGroup();
     let ecoregionLayerGroup = L.layerGroup();
+    let ecoregionTileLayer = null;
+    let fireTileLayer = null;
+    let fireFilters = null; // Filters the fire tile style function applies
+    // Fires and ecoregions are drawn from the server's vector tiles when Leaflet.VectorGrid is loaded
+    const useVectorTiles = typeof L.vectorGrid !== 'undefined';
+    const ecoregionColors = [
+        '#3388FF', '#33CC55', '#FF6666', '#CC3333', '#FF9900', 
+        '#9966CC', '#CC6633', '#0099CC', '#FFCC33', '#9933CC'
+    ];
     let lastFiveYears = [];
     let countyBounds = {}; // Store county boundaries for zoom feature
     
@@ -113,61 +122,68 @@ document.addEventListener('DOMContentLoaded', function() {
             // Show loading state
             document.getElementById('map-loading').classList.remove('d-none');
             
-            // Load ecoregion data
-            const ecoResponse = await fetch('/static/data/ecoregions_fixed.geojson');
-            if (!ecoResponse.ok) throw new Error('Failed to fetch ecoregion data');
-            ecoregionData = await ecoResponse.json();
-            
-            // Extract ecoregions
-            const tempEcoregions = new Set();
-            ecoregionData.features.forEach(feature => {
-                if (feature.properties && feature.properties.ECOREGION_SECTION) {
-                    tempEcoregions.add(feature.properties.ECOREGION_SECTION);
-                }
-            });
-            
-            // Sort ecoregion names
-            ecoregions = Array.from(tempEcoregions).sort();
-            populateEcoregionDropdown();
-            
-            // Load fire data
-            const fireResponse = await fetch('/static/data/fires_optimized.geojson');
-            if (!fireResponse.ok) throw new Error('Failed to fetch fire data');
-            fireData = await fireResponse.json();
-            
-            // Extract counties and store their boundaries
-            const tempCounties = new Set();
+            // Load ecoregion data (not needed when the ecoregions come from vector tiles)
+            if (!useVectorTiles) {
+                const ecoResponse = await fetch('/static/data/ecoregions_fixed.geojson');
+                if (!ecoResponse.ok) throw new Error('Failed to fetch ecoregion data');
+                ecoregionData = await ecoResponse.json();
+                
+                // Extract ecoregions
+                const tempEcoregions = new Set();
+                ecoregionData.features.forEach(feature => {
+                    if (feature.properties && feature.properties.ECOREGION_SECTION) {
+                        tempEcoregions.add(feature.properties.ECOREGION_SECTION);
+                    }
+                });
+                
+                // Sort ecoregion names
+                ecoregions = Array.from(tempEcoregions).sort();
+                populateEcoregionDropdown();
+            }
             
-            fireData.features.forEach(feature => {
-                if (feature.properties && feature.properties.UNIT_ID) {
-                    const county = feature.properties.UNIT_ID;
-                    tempCounties.add(county);
+            // Load fire units (county list and zoom bounds); with vector tiles the perimeters are never downloaded whole
+            if (useVectorTiles) {
+                await loadFireUnits();
+            } else {
+                // Load fire data
+                const fireResponse = await fetch('/static/data/fires_optimized.geojson');
+                if (!fireResponse.ok) throw new Error('Failed to fetch fire data');
+                fireData = await fireResponse.json();
+                
+                // Extract counties and store their boundaries
+                const tempCounties = new Set();
+                
+                fireData.features.forEach(feature => {
+                    if (feature.properties && feature.properties.UNIT_ID) {
+                        const county = feature.properties.UNIT_ID;
+                        tempCounties.add(county);
                     
-                    // Store bounds for each county
-                    if (!countyBounds[county] && feature.geometry) {
-                        try {
-                            // Create temporary layer to calculate bounds
-                            const tempLayer = L.geoJSON(feature.geometry);
-                            const bounds = tempLayer.getBounds();
+                        // Store bounds for each county
+                        if (!countyBounds[county] && feature.geometry) {
+                            try {
+                                // Create temporary layer to calculate bounds
+                                const tempLayer = L.geoJSON(feature.geometry);
+                                const bounds = tempLayer.getBounds();
                             
-                            // Initialize or extend county bounds
-                            if (!countyBounds[county]) {
-                                countyBounds[county] = bounds;
-                            } else {
-                                countyBounds[county].extend(bounds);
+                                // Initialize or extend county bounds
+                                if (!countyBounds[county]) {
+                                    countyBounds[county] = bounds;
+                                } else {
+                                    countyBounds[county].extend(bounds);
+                                }
+                            } catch (e) {
+                                console.warn(`Could not calculate bounds for county ${county}:`, e);
                             }
-                        } catch (e) {
-                            console.warn(`Could not calculate bounds for county ${county}:`, e);
                         }
                     }
-                }
-            });
-            
-            // Sort county names
-            counties = Array.from(tempCounties).sort();
-            console.log("Extracted counties from data:", counties.slice(0, 10));
-            console.log("County code example:", counties.length > 0 ? counties[0] : 'No counties found');
-            populateCountyDropdown();
+                });
+                
+                // Sort county names
+                counties = Array.from(tempCounties).sort();
+                console.log("Extracted counties from data:", counties.slice(0, 10));
+                console.log("County code example:", counties.length > 0 ? counties[0] : 'No counties found');
+                populateCountyDropdown();
+            }
             
             // Hide loading state
             document.getElementById('map-loading').classList.add('d-none');
@@ -275,16 +291,32 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Display fire data on the map
-    function displayFireData() {
-        if (!fireData) return;
-        
-        // Clear previous fire layers
-        fireLayerGroup.clearLayers();
+    // County list and zoom bounds from /api/fires/stats (used instead of reading them from the fire GeoJSON)
+    async function loadFireUnits() {
+        const response = await fetch('/api/fires/stats?group_by=unit&bounds=true');
+        if (!response.ok) {
+            console.warn(`Could not load fire units (${response.status}), county list unavailable`);
+            return;
+        }
+        const stats = await response.json();
+        
+        const tempCounties = [];
+        stats.groups.forEach(group => {
+            if (!group.unit) return;
+            tempCounties.push(group.unit);
+            const [minLon, minLat, maxLon, maxLat] = group.bounds;
+            countyBounds[group.unit] = L.latLngBounds([minLat, minLon], [maxLat, maxLon]);
+        });
         
-        // Get filter values
+        // Sort county names
+        counties = tempCounties.sort();
+        console.log("Loaded counties from fire stats:", counties.slice(0, 10));
+        populateCountyDropdown();
+    }
+    
+    // Read the fire filter inputs
+    function currentFireFilters() {
         const selectedCounty = document.getElementById('county-select').value;
-        const displayType = document.getElementById('display-type').value;
         const startDateVal = document.getElementById('start-date').value;
         const endDateVal = document.getElementById('end-date').value;
         
@@ -310,74 +342,172 @@ document.addEventListener('DOMContentLoaded', function() {
         // Apply the 5-year filter only if no county is selected, no specific dates are set, and not clicked Apply Filters
         const shouldApplyYearFilter = selectedCounty === 'all' && !(applyFiltersClicked && (startDateVal !== '' || endDateVal !== ''));
         
-        // Filter features
-        const filteredFeatures = fireData.features.filter(feature => {
-            // Skip features without properties
-            if (!feature.properties) return false;
-            
-            const props = feature.properties;
-            
-            // Apply the 5-year filter if needed (only when no county is selected)
-            if (shouldApplyYearFilter && props.YEAR_ && !lastFiveYears.includes(props.YEAR_)) {
-                return false;
-            }
+        return { selectedCounty, startDateObj, endDateObj, shouldApplyYearFilter };
+    }
+    
+    // Check a fire's properties against the filters (shared by the GeoJSON and vector tile layers)
+    function fireMatchesFilters(props, filters) {
+        const { selectedCounty, startDateObj, endDateObj, shouldApplyYearFilter } = filters;
+        
+        // Apply the 5-year filter if needed (only when no county is selected)
+        if (shouldApplyYearFilter && props.YEAR_ && !lastFiveYears.includes(props.YEAR_)) {
+            return false;
+        }
+        
+        // Filter by county if a specific one is selected
+        if (selectedCounty !== 'all' && props.UNIT_ID !== selectedCounty) {
+            return false;
+        }
+        
+        // Filter by date if provided
+        if (startDateObj || endDateObj) {
+            let featureDate = null;
             
-            // Filter by county if a specific one is selected
-            if (selectedCounty !== 'all' && props.UNIT_ID !== selectedCounty) {
-                return false;
+            // Try to parse date from ALARM_DATE
+            if (props.ALARM_DATE) {
+                try {
+                    featureDate = new Date(props.ALARM_DATE);
+                } catch (e) {
+                    console.warn("Could not parse date:", props.ALARM_DATE);
+                }
             }
             
-            // Filter by date if provided
-            if (startDateObj || endDateObj) {
-                let featureDate = null;
-                
-                // Try to parse date from ALARM_DATE
-                if (props.ALARM_DATE) {
-                    try {
-                        featureDate = new Date(props.ALARM_DATE);
-                    } catch (e) {
-                        console.warn("Could not parse date:", props.ALARM_DATE);
-                    }
-                }
-                
-                // If no date or invalid date, try using year
-                if (!featureDate && props.YEAR_) {
-                    try {
-                        featureDate = new Date(props.YEAR_, 0, 1); // Set to January 1st of that year
-                    } catch (e) {
-                        console.warn("Could not use year as date:", props.YEAR_);
-                    }
+            // If no date or invalid date, try using year
+            if (!featureDate && props.YEAR_) {
+                try {
+                    featureDate = new Date(props.YEAR_, 0, 1); // Set to January 1st of that year
+                } catch (e) {
+                    console.warn("Could not use year as date:", props.YEAR_);
                 }
-                
-                // Skip if no valid date
-                if (!featureDate) return false;
-                
-                // Apply date filters
-                if (startDateObj && featureDate < startDateObj) return false;
-                if (endDateObj && featureDate > endDateObj) return false;
             }
             
-            return true;
-        });
-        
-        console.log(`Filtered to ${filteredFeatures.length} features`);
+            // Skip if no valid date
+            if (!featureDate) return false;
+            
+            // Apply date filters
+            if (startDateObj && featureDate < startDateObj) return false;
+            if (endDateObj && featureDate > endDateObj) return false;
+        }
         
-        // Update data status message based on filter state
-        if (selectedCounty !== 'all') {
+        return true;
+    }
+    
+    // Update data status message based on filter state
+    function updateFireStatus(filters) {
+        if (filters.selectedCounty !== 'all') {
             document.getElementById('data-status').textContent = 'Showing all historical data for selected county';
-        } else if (!shouldApplyYearFilter) {
+        } else if (!filters.shouldApplyYearFilter) {
             document.getElementById('data-status').textContent = 'Showing all historical data with date filter';
         } else {
             document.getElementById('data-status').textContent = 'Showing last 5 years data';
         }
+    }
+    
+    // Show a message when no fires match the filters
+    function showNoFireData() {
+        const centerLatLng = map.getCenter();
+        const noDataMarker = L.marker(centerLatLng)
+            .bindPopup("<strong>No fire data matches your filters</strong>")
+            .addTo(fireLayerGroup);
+        noDataMarker.openPopup();
+    }
+    
+    // Fire count for the vector tile layer from /api/fires/stats (tiles only hold the fires in view).
+    // The server filters by year, so with a date filter the count covers the whole start and end years.
+    async function updateFireTileCount(filters) {
+        let yearFrom = filters.startDateObj ? filters.startDateObj.getFullYear() : null;
+        let yearTo = filters.endDateObj ? filters.endDateObj.getFullYear() : null;
+        if (filters.shouldApplyYearFilter) {
+            yearFrom = Math.max(yearFrom || 0, lastFiveYears[0]);
+            yearTo = Math.min(yearTo || Infinity, lastFiveYears[lastFiveYears.length - 1]);
+        }
+        
+        const params = new URLSearchParams({ group_by: '' });
+        if (yearFrom !== null) params.set('year_from', yearFrom);
+        if (yearTo !== null) params.set('year_to', yearTo);
+        if (filters.selectedCounty !== 'all') params.set('unit', filters.selectedCounty);
+        
+        try {
+            const response = await fetch(`/api/fires/stats?${params}`);
+            if (!response.ok) return;
+            const stats = await response.json();
+            // Ignore the answer if the filters changed while it was loading
+            if (filters !== fireFilters) return;
+            document.getElementById('feature-count').textContent = stats.total.count;
+            if (stats.total.count === 0) showNoFireData();
+        } catch (e) {
+            console.warn("Could not load fire count:", e);
+        }
+    }
+    
+    // Display fires from the vector tile endpoint (/api/tiles/fires/{z}/{x}/{y}.mvt).
+    // The filters are applied in the style function, so changing them only restyles the tiles.
+    function displayFireTiles() {
+        fireFilters = currentFireFilters();
+        updateFireStatus(fireFilters);
+        
+        // Remove a previous "no data" marker, keep the tile layer
+        fireLayerGroup.eachLayer(layer => {
+            if (layer !== fireTileLayer) fireLayerGroup.removeLayer(layer);
+        });
+        
+        if (!fireTileLayer) {
+            fireTileLayer = L.vectorGrid.protobuf('/api/tiles/fires/{z}/{x}/{y}.mvt', {
+                rendererFactory: L.canvas.tile,
+                interactive: true,
+                maxNativeZoom: 16,
+                vectorTileLayerStyles: {
+                    // An empty style list hides the feature
+                    fires: properties => fireMatchesFilters(properties, fireFilters) ? {
+                        color: '#FF5500',
+                        weight: 2,
+                        opacity: 0.8,
+                        fill: true,
+                        fillColor: '#FF5500',
+                        fillOpacity: 0.4
+                    } : []
+                }
+            });
+            fireTileLayer.on('click', e => {
+                L.popup()
+                    .setLatLng(e.latlng)
+                    .setContent(createFirePopup({ properties: e.layer.properties }))
+                    .openOn(map);
+            });
+            fireLayerGroup.addLayer(fireTileLayer);
+        } else {
+            // Restyle with the new filters (tiles come from the browser cache or revalidate with a 304)
+            fireTileLayer.redraw();
+        }
+        
+        updateFireTileCount(fireFilters);
+    }
+    
+    // Display fire data on the map
+    function displayFireData() {
+        if (useVectorTiles) {
+            displayFireTiles();
+            return;
+        }
+        if (!fireData) return;
+        
+        // Clear previous fire layers
+        fireLayerGroup.clearLayers();
+        
+        // Filter features
+        const filters = currentFireFilters();
+        const filteredFeatures = fireData.features.filter(feature => {
+            // Skip features without properties
+            return feature.properties && fireMatchesFilters(feature.properties, filters);
+        });
+        
+        console.log(`Filtered to ${filteredFeatures.length} features`);
+        
+        updateFireStatus(filters);
         
         // If no features match the filters, show a message
         if (filteredFeatures.length === 0) {
-            const centerLatLng = map.getCenter();
-            const noDataMarker = L.marker(centerLatLng)
-                .bindPopup("<strong>No fire data matches your filters</strong>")
-                .addTo(fireLayerGroup);
-            noDataMarker.openPopup();
+            showNoFireData();
             return;
         }
         
@@ -407,8 +537,59 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Pick a stable color for an ecoregion from its name (tiles have no feature index)
+    function ecoregionColor(name) {
+        let hash = 0;
+        for (const ch of String(name || '')) {
+            hash = (hash * 31 + ch.charCodeAt(0)) | 0;
+        }
+        return ecoregionColors[Math.abs(hash) % ecoregionColors.length];
+    }
+    
+    // Display ecoregions from the vector tile endpoint (/api/tiles/ecoregions/{z}/{x}/{y}.mvt)
+    function displayEcoregionTiles() {
+        ecoregionLayerGroup.clearLayers();
+        
+        const displayType = document.getElementById('display-type').value;
+        if (displayType !== 'ecoregions' && displayType !== 'all') {
+            console.log("Display type not set to show ecoregions, skipping");
+            return;
+        }
+        
+        // The tile layer is created once; Leaflet only requests the tiles in view
+        if (!ecoregionTileLayer) {
+            ecoregionTileLayer = L.vectorGrid.protobuf('/api/tiles/ecoregions/{z}/{x}/{y}.mvt', {
+                rendererFactory: L.canvas.tile,
+                interactive: true,
+                maxNativeZoom: 16,
+                vectorTileLayerStyles: {
+                    ecoregions: properties => ({
+                        color: ecoregionColor(properties.ECOREGION_SECTION),
+                        weight: 1,
+                        opacity: 0.8,
+                        fill: true,
+                        fillColor: ecoregionColor(properties.ECOREGION_SECTION),
+                        fillOpacity: 0.4
+                    })
+                }
+            });
+            ecoregionTileLayer.on('click', e => {
+                L.popup()
+                    .setLatLng(e.latlng)
+                    .setContent(createEcoregionPopup({ properties: e.layer.properties }))
+                    .openOn(map);
+            });
+        }
+        
+        ecoregionLayerGroup.addLayer(ecoregionTileLayer);
+    }
+    
     // Display ecoregion data on the map
     function displayEcoregionData() {
+        if (useVectorTiles) {
+            displayEcoregionTiles();
+            return;
+        }
         if (!ecoregionData) return;
         
         console.log("Starting to display ecoregion data...");
@@ -467,15 +648,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Create style object with different colors for each ecoregion
-                const colors = [
-                    '#3388FF', '#33CC55', '#FF6666', '#CC3333', '#FF9900', 
-                    '#9966CC', '#CC6633', '#0099CC', '#FFCC33', '#9933CC'
-                ];
-                const colorIndex = index % colors.length;
+                const colorIndex = index % ecoregionColors.length;
                 
                 // Create style options
                 const style = {
-                    color: colors[colorIndex],
+                    color: ecoregionColors[colorIndex],
                     weight: 1,
                     opacity: 0.8,
                     fillOpacity: 0.4
@@ -0,0 +1,50 @@
+"""FireAttributes acreage: ACRES from filtered files, GIS_ACRES from the raw CAL FIRE export."""
+import sys
+import pathlib
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from fire_attributes import FireAttributes
+from filter_geojson import slim_fire_feature
+
+
+def test_null_acres_falls_back_to_gis_acres():
+    attributes = FireAttributes([
+        {"YEAR_": 2020, "UNIT_ID": "LNU", "ACRES": None, "GIS_ACRES": 1250.5},
+        {"YEAR_": 2020, "UNIT_ID": "LNU", "GIS_ACRES": 100.0},
+        {"YEAR_": 2021, "UNIT_ID": "BEU", "ACRES": 40.0, "GIS_ACRES": 39.0},
+        {"YEAR_": 2021, "UNIT_ID": "BEU", "ACRES": None}
+    ])
+
+    groups, totals = attributes.group_by(["year"], list(range(len(attributes))))
+    assert groups == [
+        {"year": 2020, "count": 2, "acres": 1350.5},
+        {"year": 2021, "count": 2, "acres": 40.0}
+    ]
+    assert totals == {"count": 4, "acres": 1390.5}
+
+
+def test_filtered_feature_keeps_gis_acres():
+    feature = {"properties": {"YEAR_": "2020", "GIS_ACRES": 1250.5}, "geometry": None}
+    assert slim_fire_feature(feature)["properties"]["ACRES"] == 1250.5
+
+
+def test_group_bounds_enclose_each_group():
+    attributes = FireAttributes([
+        {"YEAR_": 2020, "UNIT_ID": "LNU"},
+        {"YEAR_": 2021, "UNIT_ID": "LNU"},
+        {"YEAR_": 2021, "UNIT_ID": "BEU"}
+    ])
+    extents = [
+        [-122.5, 38.0, -122.0, 38.5],
+        [-123.0, 38.2, -122.2, 39.0],
+        [-121.5, 36.0, -121.0, 36.5]
+    ]
+
+    groups, _ = attributes.group_by(["unit"], [0, 1, 2], extents=extents)
+    assert groups == [
+        {"unit": "BEU", "count": 1, "acres": 0.0, "bounds": [-121.5, 36.0, -121.0, 36.5]},
+        {"unit": "LNU", "count": 2, "acres": 0.0, "bounds": [-123.0, 38.0, -122.0, 39.0]}
+    ]
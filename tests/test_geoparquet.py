@@ -0,0 +1,84 @@
+"""scripts/geoparquet.py: windowed GeoParquet output read back through geoparquet_layers."""
+import sys
+import json
+import pathlib
+
+import numpy as np
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+pq = pytest.importorskip("pyarrow.parquet")
+pytest.importorskip("shapely")
+
+from geoparquet import GeoParquetWriter
+from geoparquet_layers import GeoParquetLayer
+
+
+def square(lon, lat, size=0.01):
+    return {"type": "Polygon", "coordinates": [[
+        [lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]
+    ]]}
+
+
+def features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        lon, lat = rng.uniform(-124, -114), rng.uniform(32.5, 42)
+        yield {"type": "Feature", "geometry": square(lon, lat), "properties": {"OBJECTID": i, "YEAR_": 2000 + i % 20}}
+
+
+def test_writes_windows_as_they_fill(tmp_path):
+    path = tmp_path / "fires.parquet"
+    with GeoParquetWriter(str(path), row_group_size=100, window_size=1000) as writer:
+        for feature in features(2500):
+            writer.write(feature)
+            # Never more than one window buffered
+            assert len(writer._wkb) < 1000
+
+    metadata = pq.read_metadata(path)
+    assert metadata.num_rows == 2500
+    assert metadata.num_row_groups == 25
+    assert json.loads(metadata.metadata[b"geo"])["primary_column"] == "geometry"
+    table = pq.read_table(path)
+    assert sorted(table.column("fid").to_pylist()) == list(range(2500))
+    assert table.column("OBJECTID").to_pylist() == table.column("fid").to_pylist()
+
+
+def test_bbox_query_matches_source(tmp_path):
+    path = tmp_path / "fires.parquet"
+    source = list(features(3000, seed=1))
+    with GeoParquetWriter(str(path), row_group_size=100, window_size=1000) as writer:
+        for feature in source:
+            writer.write(feature)
+
+    box = (-120.0, 35.0, -118.0, 37.0)
+    expected = [
+        f["properties"]["OBJECTID"] for f in source
+        if box[0] <= f["geometry"]["coordinates"][0][0][0] + 0.01 and f["geometry"]["coordinates"][0][0][0] <= box[2]
+        and box[1] <= f["geometry"]["coordinates"][0][0][1] + 0.01 and f["geometry"]["coordinates"][0][0][1] <= box[3]
+    ]
+    body, stats = GeoParquetLayer(str(path)).query(*box)
+    found = [f["properties"]["OBJECTID"] for f in json.loads(body)["features"]]
+    assert found == expected
+    assert stats["row_groups"] < stats["total_row_groups"]
+
+
+def test_later_windows_keep_the_first_schema(tmp_path, capsys):
+    path = tmp_path / "mixed.parquet"
+    with GeoParquetWriter(str(path), row_group_size=10, window_size=10) as writer:
+        for i in range(10):
+            writer.write({"geometry": square(-120, 36), "properties": {"YEAR_": 2000 + i, "NOTE": None}})
+        for i in range(10):
+            writer.write({"geometry": square(-119, 37), "properties": {"YEAR_": "unknown" if i == 0 else 2010 + i,
+                                                                       "NOTE": i, "EXTRA": "x"}})
+
+    table = pq.read_table(path).sort_by("fid")
+    years = table.column("YEAR_").to_pylist()
+    assert years[:10] == list(range(2000, 2010)) and years[10] is None and years[11] == 2011
+    assert table.column("NOTE").to_pylist()[10:] == [str(i) for i in range(10)]
+    assert "EXTRA" not in table.column_names
+    assert writer.dropped_columns == {"EXTRA"} and writer.invalid_values == 1
+    assert "EXTRA" in capsys.readouterr().out
@@ -0,0 +1,156 @@
+"""
+AsyncOpenWeatherClient and the async geocoding path, run against scripts/fake_openweather.py.
+
+The fake app is served in-process through httpx.ASGITransport, except for the
+connection reuse check, which needs real TCP connections and runs it with uvicorn.
+"""
+import sys
+import time
+import asyncio
+import pathlib
+import threading
+import importlib.util
+
+import httpx
+import pytest
+import uvicorn
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import weather_service
+from cache_utils import TTLCache
+from weather_client import AsyncOpenWeatherClient
+
+FAKE_URL = "http://fake-openweather"
+WEATHER_PARAMS = {"lat": 38.5, "lon": -121.5, "units": "metric", "appid": "test"}
+
+
+def _load_fake_openweather():
+    spec = importlib.util.spec_from_file_location("fake_openweather", ROOT / "scripts" / "fake_openweather.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fake = _load_fake_openweather()
+
+
+def asgi_client(**kwargs):
+    """A client whose requests go straight to the fake app, with no backoff delay between retries."""
+    kwargs.setdefault("backoff_base", 0)
+    return AsyncOpenWeatherClient(transport=httpx.ASGITransport(app=fake.app), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def reset_fake():
+    fake.reset()
+    yield
+    fake.reset()
+
+
+@pytest.fixture
+def fake_server():
+    """The fake app on a local port; yields its base URL."""
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert thread.is_alive() and time.monotonic() < deadline, "fake server did not start"
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def test_sequential_requests_reuse_one_connection(fake_server):
+    async def run():
+        client = AsyncOpenWeatherClient()
+        try:
+            for _ in range(10):
+                await client.get_json(f"{fake_server}/data/2.5/weather", WEATHER_PARAMS)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert fake.counters["weather"] == 10
+    assert len(fake.connections) == 1
+
+
+def test_semaphore_caps_in_flight_requests():
+    fake.settings["latency"] = 0.05
+
+    async def run():
+        client = asgi_client(max_concurrency=3)
+        try:
+            await asyncio.gather(*(
+                client.get_json(f"{FAKE_URL}/data/2.5/weather", WEATHER_PARAMS) for _ in range(12)
+            ))
+            return client.stats()
+        finally:
+            await client.aclose()
+
+    stats = asyncio.run(run())
+    assert fake.counters["weather"] == 12
+    assert fake.counters["peak_in_flight"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["requests_total"] == 12
+
+
+def test_retries_503_then_succeeds():
+    fake.settings["fail_next"] = 2
+
+    async def run():
+        client = asgi_client(max_retries=2)
+        try:
+            return await client.get_json(f"{FAKE_URL}/data/2.5/weather", WEATHER_PARAMS), client.stats()
+        finally:
+            await client.aclose()
+
+    data, stats = asyncio.run(run())
+    assert "main" in data
+    assert fake.counters["failures"] == 2
+    assert fake.counters["weather"] == 3
+    assert stats["retries_total"] == 2
+    assert stats["failures_total"] == 0
+
+
+def test_gives_up_after_max_retries():
+    fake.settings["fail_next"] = 2
+
+    async def run():
+        client = asgi_client(max_retries=1)
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get_json(f"{FAKE_URL}/data/2.5/weather", WEATHER_PARAMS)
+            return client.stats()
+        finally:
+            await client.aclose()
+
+    stats = asyncio.run(run())
+    assert fake.counters["weather"] == 2
+    assert stats["failures_total"] == 1
+
+
+def test_repeated_geocoding_hits_cache(monkeypatch):
+    monkeypatch.setattr(weather_service, "OPENWEATHER_API_KEY", "test")
+    monkeypatch.setattr(weather_service, "BASE_URL_GEOCODING", f"{FAKE_URL}/geo/1.0/direct")
+    monkeypatch.setattr(weather_service, "geocode_cache", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(weather_service, "geocode_store", None)
+
+    async def run():
+        client = asgi_client()
+        monkeypatch.setattr(weather_service, "get_async_client", lambda: client)
+        try:
+            first = await weather_service.async_get_coordinates("Fresno")
+            second = await weather_service.async_get_coordinates("  fresno ")
+            return first, second
+        finally:
+            await client.aclose()
+
+    first, second = asyncio.run(run())
+    assert first is not None and first["name"] == "Fresno"
+    assert second == first
+    assert fake.counters["geocoding"] == 1
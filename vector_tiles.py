@@ -0,0 +1,307 @@
+import os
+import json
+import gzip
+import math
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.tiles")
+
+# shapely and mapbox-vector-tile are only needed when tiles are requested
+try:
+    import shapely
+    import mapbox_vector_tile
+    tiles_available = True
+except ImportError:
+    shapely = None
+    mapbox_vector_tile = None
+    tiles_available = False
+
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", os.path.join("cache", "tiles"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "16"))
+# Simplification tolerance in screen pixels at each zoom level
+TILE_SIMPLIFY_PIXELS = float(os.getenv("TILE_SIMPLIFY_PIXELS", "1.0"))
+TILE_EXTENT = 4096
+# Extra border (in tile units) kept around each tile so polygon edges do not show seams
+TILE_BUFFER = 64
+
+# Source files per layer, first existing one wins (same files the map and GeoJSON endpoints use)
+LAYERS = {
+    "fires": {
+        "sources": [
+            "static/data/fires_filtered.geojson",
+            "static/data/fires_optimized.geojson",
+            "FireGeoData/California_Fire_Perimeters_(all).geojson"
+        ],
+        "properties": ["FIRE_NAME", "YEAR_", "ALARM_DATE", "UNIT_ID", "CAUSE", "ACRES", "GIS_ACRES"]
+    },
+    "ecoregions": {
+        "sources": [
+            "static/data/ecoregions_filtered.geojson",
+            "static/data/ecoregions_fixed.geojson",
+            "FireGeoData/USDA_Ecoregion_Sections_07_3__California_1181756670207107930.geojson"
+        ],
+        "properties": ["ECOREGION_SECTION", "Ecoregion_Acres"]
+    }
+}
+
+# Web Mercator (EPSG:3857)
+EARTH_RADIUS = 6378137.0
+WORLD_HALF = math.pi * EARTH_RADIUS
+MAX_LATITUDE = 85.0511287798
+
+
+def lonlat_to_mercator(coords):
+    """Vectorized EPSG:4326 -> EPSG:3857 for an (n, 2) array of lon/lat."""
+    lon = coords[:, 0]
+    lat = np.clip(coords[:, 1], -MAX_LATITUDE, MAX_LATITUDE)
+    x = np.radians(lon) * EARTH_RADIUS
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS
+    return np.column_stack([x, y])
+
+
+def tile_bounds(z, x, y):
+    """Web Mercator bounds (minx, miny, maxx, maxy) of XYZ tile z/x/y."""
+    size = 2 * WORLD_HALF / (1 << z)
+    minx = -WORLD_HALF + x * size
+    maxy = WORLD_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def polygonal(geom):
+    """Polygon parts of `geom` as a (Multi)Polygon; drops points/lines left by make_valid or clipping."""
+    if geom.geom_type in ("Polygon", "MultiPolygon") or geom.is_empty:
+        return geom
+    polygons = [part for part in shapely.get_parts(shapely.get_parts(geom)) if part.geom_type == "Polygon"]
+    return shapely.multipolygons(polygons) if polygons else shapely.Polygon()
+
+
+def resolve_source(layer):
+    """Path of the first existing source file for `layer`, or None."""
+    for path in LAYERS[layer]["sources"]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class TileLayer:
+    """
+    One GeoJSON layer projected to Web Mercator and indexed for tile cutting.
+
+    Geometries are simplified once per zoom level (tolerance = TILE_SIMPLIFY_PIXELS
+    at that zoom's resolution) and kept for reuse; an STRtree picks the features
+    touching a tile.
+    """
+
+    def __init__(self, name, path):
+        start = time.perf_counter()
+        self.name = name
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        keep = LAYERS[name]["properties"]
+        geometries, properties = [], []
+        for feature in data.get("features", []):
+            if not feature.get("geometry"):
+                continue
+            props = feature.get("properties") or {}
+            geometries.append(json.dumps(feature["geometry"]))
+            properties.append({k: props[k] for k in keep if props.get(k) is not None})
+
+        geoms = shapely.from_geojson(geometries, on_invalid="ignore")
+        # Repair once here so clipping and simplification see valid polygons
+        invalid = ~shapely.is_missing(geoms) & ~shapely.is_valid(geoms)
+        geoms[invalid] = [polygonal(geom) for geom in shapely.make_valid(geoms[invalid])]
+        valid = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms)
+        self.geometries = shapely.transform(geoms[valid], lonlat_to_mercator)
+        self.properties = [props for props, ok in zip(properties, valid) if ok]
+        self.tree = shapely.STRtree(self.geometries)
+        self._simplified = {}
+        self._lock = threading.Lock()
+
+        logger.info(f"Tile layer '{name}' loaded from {path}: {len(self.properties)} features "
+                    f"({int(invalid.sum())} repaired, {int((~valid).sum())} dropped) "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def geometries_for_zoom(self, z):
+        """Layer geometries simplified for zoom `z` (computed once per zoom)."""
+        z = min(z, TILE_MAX_ZOOM)
+        simplified = self._simplified.get(z)
+        if simplified is None:
+            with self._lock:
+                simplified = self._simplified.get(z)
+                if simplified is None:
+                    tolerance = TILE_SIMPLIFY_PIXELS * 2 * WORLD_HALF / ((1 << z) * TILE_EXTENT)
+                    simplified = shapely.simplify(self.geometries, tolerance, preserve_topology=True)
+                    self._simplified[z] = simplified
+        return simplified
+
+    def render(self, z, x, y):
+        """Encoded MVT bytes for tile z/x/y, or b"" when no feature touches it."""
+        minx, miny, maxx, maxy = tile_bounds(z, x, y)
+        pad = (maxx - minx) * TILE_BUFFER / TILE_EXTENT
+        candidates = self.tree.query(shapely.box(minx - pad, miny - pad, maxx + pad, maxy + pad))
+        if len(candidates) == 0:
+            return b""
+
+        candidates = np.sort(candidates)
+        clipped = shapely.clip_by_rect(self.geometries_for_zoom(z)[candidates],
+                                       minx - pad, miny - pad, maxx + pad, maxy + pad)
+        features = [
+            {"geometry": polygonal(geom), "properties": self.properties[i]}
+            for i, geom in zip(candidates, clipped)
+            if not geom.is_empty
+        ]
+        features = [feature for feature in features if not feature["geometry"].is_empty]
+        if not features:
+            return b""
+
+        return mapbox_vector_tile.encode(
+            [{"name": self.name, "features": features}],
+            default_options={
+                "quantize_bounds": (minx, miny, maxx, maxy),
+                "extents": TILE_EXTENT
+            }
+        )
+
+
+class MBTilesCache:
+    """
+    On-disk tile cache in the MBTiles layout (SQLite, TMS row order, gzipped tiles).
+
+    The source file's mtime is stored in the metadata table; when it changes
+    the cached tiles are dropped.
+    """
+
+    def __init__(self, path, name):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, "
+            "tile_data BLOB, PRIMARY KEY (zoom_level, tile_column, tile_row))"
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+            [("name", name), ("format", "pbf"), ("type", "overlay"), ("maxzoom", str(TILE_MAX_ZOOM))]
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_version(self, version):
+        """Drop all cached tiles if they were rendered from a different source version."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM metadata WHERE name = 'source_version'").fetchone()
+            if row is not None and row[0] == version:
+                return
+            self._conn.execute("DELETE FROM tiles")
+            self._conn.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('source_version', ?)", (version,))
+            self._conn.commit()
+        if row is not None:
+            logger.info(f"Source changed, cleared tile cache {self.path}")
+
+    def get(self, z, x, y):
+        """Gzipped tile bytes (b"" for an empty tile), or None if not cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, (1 << z) - 1 - y)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, z, x, y, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                (z, x, (1 << z) - 1 - y, data)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+        return {"tiles": count, "hits": self.hits, "misses": self.misses}
+
+
+class TileService:
+    """Loads tile layers on demand, reloads them when their source changes, and caches rendered tiles."""
+
+    def __init__(self, cache_dir=TILE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._layers = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+        self.rendered = 0
+
+    def _layer(self, name):
+        path = resolve_source(name)
+        if path is None:
+            return None
+        layer = self._layers.get(name)
+        if layer is None or layer.path != path or layer.mtime != os.path.getmtime(path):
+            with self._lock:
+                layer = self._layers.get(name)
+                if layer is None or layer.path != path or layer.mtime != os.path.getmtime(path):
+                    layer = TileLayer(name, path)
+                    self._layers[name] = layer
+                    if name not in self._caches:
+                        self._caches[name] = MBTilesCache(os.path.join(self.cache_dir, f"{name}.mbtiles"), name)
+                    self._caches[name].ensure_version(f"{path}:{layer.mtime}")
+        return layer
+
+    def version(self, name):
+        """
+        Version of the layer's current source file (path and mtime) for ETags, or
+        None if it has none. Only stats the file, so it is cheap to check before
+        a tile is loaded or rendered.
+        """
+        path = resolve_source(name)
+        if path is None:
+            return None
+        return hashlib.sha1(f"{path}:{os.path.getmtime(path)}".encode("utf-8")).hexdigest()[:12]
+
+    def get_tile(self, name, z, x, y):
+        """
+        Gzipped MVT bytes for layer/z/x/y (b"" for an empty tile), or None if the
+        layer has no source file. Blocking; run it off the event loop.
+        """
+        layer = self._layer(name)
+        if layer is None:
+            return None
+        cache = self._caches[name]
+        data = cache.get(z, x, y)
+        if data is None:
+            tile = layer.render(z, x, y)
+            data = gzip.compress(tile, mtime=0) if tile else b""
+            cache.set(z, x, y, data)
+            self.rendered += 1
+        return data
+
+    def stats(self):
+        return {
+            "available": tiles_available,
+            "rendered": self.rendered,
+            "layers": {name: cache.stats() for name, cache in self._caches.items()}
+        }
+
+
+tile_service = TileService()
@@ -0,0 +1,113 @@
+import os
+import random
+import asyncio
+import logging
+
+import httpx
+
+# Set up logging
+logger = logging.getLogger("fire_prediction.weather.client")
+
+# Connection / retry settings, overridable through environment variables
+CONNECT_TIMEOUT = float(os.getenv("OPENWEATHER_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("OPENWEATHER_READ_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.getenv("OPENWEATHER_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENCY = int(os.getenv("OPENWEATHER_MAX_CONCURRENCY", "10"))
+MAX_RETRIES = int(os.getenv("OPENWEATHER_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("OPENWEATHER_BACKOFF_BASE", "0.2"))
+
+# Upstream answers worth retrying
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncOpenWeatherClient:
+    """
+    Shared keep-alive HTTP client for the OpenWeather APIs.
+
+    One httpx.AsyncClient is reused for every call so TCP/TLS connections are
+    pooled. A semaphore caps in-flight upstream requests, and transient
+    failures (transport errors, 429, 5xx) are retried with full-jitter
+    exponential backoff.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_connections=MAX_CONNECTIONS, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, transport=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_concurrency = max_concurrency
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.requests_total = 0
+        self.retries_total = 0
+        self.failures_total = 0
+
+    @property
+    def in_flight(self):
+        return self.max_concurrency - self._semaphore._value
+
+    async def get_json(self, url, params):
+        """GET `url` and return the decoded JSON body, retrying transient failures."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.requests_total += 1
+                    response = await self._client.get(url, params=params)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    raise httpx.HTTPStatusError(
+                        f"Upstream returned {response.status_code}", request=response.request, response=response
+                    )
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    self.failures_total += 1
+                    raise
+                delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+                attempt += 1
+                self.retries_total += 1
+                logger.warning(f"Weather API call failed ({e}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self):
+        return {
+            "requests_total": self.requests_total,
+            "retries_total": self.retries_total,
+            "failures_total": self.failures_total,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency
+        }
+
+
+_client = None
+_client_loop = None
+
+
+def get_async_client():
+    """Return the process-wide client, creating it on the running event loop if needed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = AsyncOpenWeatherClient()
+        _client_loop = loop
+        logger.info(f"Async weather client created (max_concurrency={_client.max_concurrency}, "
+                    f"max_connections={MAX_CONNECTIONS})")
+    return _client
+
+
+async def close_async_client():
+    """Close the shared client (called on application shutdown)."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
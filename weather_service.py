@@ -1,8 +1,13 @@
 import os
+import re
+import time
+import asyncio
 import requests
 import logging
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from cache_utils import MISSING, SingleFlight, SQLiteCacheStore, TTLCache
+from weather_client import get_async_client
 
 # Set up logging
 logger = logging.getLogger("fire_prediction.weather")
@@ -14,48 +19,240 @@ logger.info(f"Using OpenWeather API key: {'Available' if OPENWEATHER_API_KEY els
 
 # Constants
 # DEFAULT_API_KEY = "ef2206ff5da67de63306d0b143e20872"  # Fallback API key, free tier limited usage
-BASE_URL_CURRENT = "https://api.openweathermap.org/data/2.5/weather"
-BASE_URL_FORECAST = "https://api.openweathermap.org/data/2.5/forecast"
-BASE_URL_GEOCODING = "https://api.openweathermap.org/geo/1.0/direct"
+# OPENWEATHER_BASE_URL can point at a local fake server for testing
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org").rstrip("/")
+BASE_URL_CURRENT = f"{OPENWEATHER_BASE_URL}/data/2.5/weather"
+BASE_URL_FORECAST = f"{OPENWEATHER_BASE_URL}/data/2.5/forecast"
+BASE_URL_GEOCODING = f"{OPENWEATHER_BASE_URL}/geo/1.0/direct"
+
+# Geocoding cache - city -> lat/lon never changes, so entries live for a long time
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "2048"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))  # "not found" for 1 day
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")  # optional SQLite file, e.g. cache/geocode.sqlite
+
+geocode_cache = TTLCache(maxsize=GEOCODE_CACHE_SIZE, ttl=GEOCODE_CACHE_TTL)
+geocode_store = None
+if GEOCODE_CACHE_PATH:
+    try:
+        geocode_store = SQLiteCacheStore(GEOCODE_CACHE_PATH, table="geocode")
+        logger.info(f"Persistent geocoding cache at {GEOCODE_CACHE_PATH}")
+    except Exception as e:
+        logger.error(f"Could not open geocoding cache {GEOCODE_CACHE_PATH}: {e}")
+
+# Current-conditions cache - weather barely changes within ~1 km and ~10 minutes
+WEATHER_CACHE_GRID_DEG = float(os.getenv("WEATHER_CACHE_GRID_DEG", "0.01"))  # ~1.1 km of latitude
+WEATHER_CACHE_BUCKET_SECONDS = int(os.getenv("WEATHER_CACHE_BUCKET_SECONDS", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "10000"))  # memory cap, ~1 KB per entry
+
+weather_cache = TTLCache(maxsize=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_BUCKET_SECONDS)
+weather_flights = SingleFlight()
+weather_upstream_calls = 0
+
+def _weather_cache_key(coords, now=None):
+    """(snapped lat, snapped lon, time bucket) for a coordinate pair."""
+    now = time.time() if now is None else now
+    return (
+        round(coords["lat"] / WEATHER_CACHE_GRID_DEG),
+        round(coords["lon"] / WEATHER_CACHE_GRID_DEG),
+        int(now // WEATHER_CACHE_BUCKET_SECONDS)
+    )
+
+def _bucket_ttl(now=None):
+    """Seconds until the current time bucket ends."""
+    now = time.time() if now is None else now
+    return WEATHER_CACHE_BUCKET_SECONDS - (now % WEATHER_CACHE_BUCKET_SECONDS)
+
+def get_weather_cache_stats():
+    """Hit ratio and upstream calls saved by the current-conditions cache."""
+    stats = weather_cache.stats()
+    saved = stats["hits"] + weather_flights.coalesced
+    lookups = stats["hits"] + stats["misses"]
+    stats.update({
+        "grid_deg": WEATHER_CACHE_GRID_DEG,
+        "bucket_seconds": WEATHER_CACHE_BUCKET_SECONDS,
+        "coalesced": weather_flights.coalesced,
+        "upstream_calls": weather_upstream_calls,
+        "upstream_calls_saved": saved,
+        "hit_ratio": round(saved / lookups, 4) if lookups else None
+    })
+    return stats
+
+geocode_flights = SingleFlight()
+
+# Bulk lookups: default number of locations fetched at the same time
+BULK_WEATHER_CONCURRENCY = int(os.getenv("BULK_WEATHER_CONCURRENCY", "16"))
+BULK_WEATHER_MAX_LOCATIONS = int(os.getenv("BULK_WEATHER_MAX_LOCATIONS", "1000"))
+
+# Fields returned by /api/weather and fed to the prediction model
+PREDICTION_FIELDS = [
+    'max_temp_c', 'min_temp_c', 'avg_temp_c', 'heating_deg_days_c',
+    'cooling_deg_days_c', 'precip_mm', 'avg_humidity',
+    'avg_wind_speed_knots', 'avg_dew_point_f', 'avg_visibility_km',
+    'avg_sea_level_pressure_mb'
+]
+
+def _geocode_key(location):
+    """Normalize a location name so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", location.strip().lower())
+
+def get_geocode_cache_stats():
+    """Hit/miss counters for the geocoding cache."""
+    stats = geocode_cache.stats()
+    stats["persistent_entries"] = len(geocode_store) if geocode_store is not None else None
+    return stats
+
+def _cache_coordinates(key, coords):
+    ttl = GEOCODE_CACHE_TTL if coords else GEOCODE_NEGATIVE_TTL
+    geocode_cache.set(key, coords, ttl=ttl)
+    if geocode_store is not None:
+        try:
+            geocode_store.set(key, coords, ttl)
+        except Exception as e:
+            logger.error(f"Error writing geocoding cache: {e}")
+
+def _cached_coordinates(key, location):
+    """Look up a geocoding result in memory, then in the persistent store. Returns MISSING on a miss."""
+    cached = geocode_cache.get(key)
+    if cached is not MISSING:
+        logger.info(f"Geocoding cache hit for: {location}")
+        return cached
+
+    if geocode_store is not None:
+        try:
+            stored = geocode_store.get(key)
+        except Exception as e:
+            logger.error(f"Error reading geocoding cache: {e}")
+            stored = MISSING
+        if stored is not MISSING:
+            coords, remaining = stored
+            geocode_cache.set(key, coords, ttl=remaining)
+            logger.info(f"Geocoding cache hit (persistent) for: {location}")
+            return coords
+
+    return MISSING
+
+def _geocoding_params(location):
+    return {
+        "q": location,
+        "limit": 1,
+        "appid": OPENWEATHER_API_KEY
+    }
+
+def _coordinates_from_response(key, location, data):
+    """Turn a geocoding API response into a coords dict (or None) and cache it."""
+    if data and len(data) > 0:
+        logger.info(f"Found coordinates for {location}: {data[0]['lat']}, {data[0]['lon']}")
+        coords = {
+            "lat": data[0]["lat"],
+            "lon": data[0]["lon"],
+            "name": data[0]["name"],
+            "country": data[0]["country"]
+        }
+        _cache_coordinates(key, coords)
+        return coords
+    else:
+        logger.warning(f"No location found for: {location}")
+        _cache_coordinates(key, None)
+        return None
 
 def get_coordinates(location):
-    """Get latitude and longitude from location name."""
+    """Get latitude and longitude from location name (cached, including "not found" results)."""
+    key = _geocode_key(location)
+    cached = _cached_coordinates(key, location)
+    if cached is not MISSING:
+        return cached
+
     try:
         if not OPENWEATHER_API_KEY:
             logger.error("No OpenWeather API key available")
             return None
-            
-        params = {
-            "q": location,
-            "limit": 1,
-            "appid": OPENWEATHER_API_KEY
-        }
         
         logger.info(f"Calling geocoding API for location: {location}")
-        response = requests.get(BASE_URL_GEOCODING, params=params)
+        response = requests.get(BASE_URL_GEOCODING, params=_geocoding_params(location))
         response.raise_for_status()
         
-        data = response.json()
-        if data and len(data) > 0:
-            logger.info(f"Found coordinates for {location}: {data[0]['lat']}, {data[0]['lon']}")
-            return {
-                "lat": data[0]["lat"],
-                "lon": data[0]["lon"],
-                "name": data[0]["name"],
-                "country": data[0]["country"]
-            }
-        else:
-            logger.warning(f"No location found for: {location}")
+        return _coordinates_from_response(key, location, response.json())
+    except Exception as e:
+        logger.error(f"Error getting coordinates for {location}: {e}")
+        return None
+
+async def async_get_coordinates(location):
+    """Async version of get_coordinates using the shared pooled HTTP client."""
+    key = _geocode_key(location)
+    cached = _cached_coordinates(key, location)
+    if cached is not MISSING:
+        return cached
+
+    async def fetch():
+        logger.info(f"Calling geocoding API for location: {location}")
+        data = await get_async_client().get_json(BASE_URL_GEOCODING, _geocoding_params(location))
+        return _coordinates_from_response(key, location, data)
+
+    try:
+        if not OPENWEATHER_API_KEY:
+            logger.error("No OpenWeather API key available")
             return None
+
+        # Concurrent lookups of the same name (e.g. in a bulk request) share one call
+        return await geocode_flights.run(key, fetch)
     except Exception as e:
         logger.error(f"Error getting coordinates for {location}: {e}")
         return None
 
+def _parse_coordinates(location):
+    """Return a coords dict if `location` is a "lat,lon" string, otherwise None."""
+    if "," in location and all(part.replace('.', '', 1).replace('-', '', 1).isdigit()
+                               for part in location.split(",")):
+        lat, lon = map(float, location.split(","))
+        return {"lat": lat, "lon": lon, "name": f"Coordinates {lat},{lon}"}
+    return None
+
+def _is_current(date):
+    return date is None or date == datetime.now().date()
+
+def _current_weather_params(coords):
+    return {
+        "lat": coords["lat"],
+        "lon": coords["lon"],
+        "units": "metric", # Use metric units
+        "appid": OPENWEATHER_API_KEY
+    }
+
+def _build_current_weather(data, location_name):
+    """Convert an OpenWeather current-conditions response into the prediction fields."""
+    weather = {
+        "location": location_name,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "max_temp_c": round(data["main"]["temp_max"], 1),
+        "min_temp_c": round(data["main"]["temp_min"], 1),
+        "avg_temp_c": round(data["main"]["temp"], 1),
+        "avg_humidity": round(data["main"]["humidity"], 1),
+        "avg_wind_speed_knots": round(data["wind"]["speed"] * 1.94384, 1),  # Convert m/s to knots
+        "avg_visibility_km": round(data["visibility"] / 1000, 1),  # Convert m to km
+        "avg_sea_level_pressure_mb": round(data["main"]["pressure"], 1),
+    }
+    
+    # Handle precipitation - it might not exist in the response
+    if "rain" in data and "1h" in data["rain"]:
+        weather["precip_mm"] = round(data["rain"]["1h"], 1)
+    else:
+        weather["precip_mm"] = 0.0
+        
+    # Calculate derived values
+    weather["avg_dew_point_f"] = round(calculate_dew_point(data["main"]["temp"], data["main"]["humidity"]), 1)
+    weather["heating_deg_days_c"] = round(max(0, 18 - data["main"]["temp"]), 1)  # Base temperature 18°C
+    weather["cooling_deg_days_c"] = round(max(0, data["main"]["temp"] - 18), 1)  # Base temperature 18°C
+    
+    logger.info(f"Successfully fetched current weather for {location_name}")
+    return weather
+
 def get_weather_data(location, date=None):
     """
     Get weather data for a specific location and date.
     If date is None, current weather is returned.
     """
+    global weather_upstream_calls
     try:
         # Check if API key is available
         if not OPENWEATHER_API_KEY:
@@ -63,16 +260,11 @@ def get_weather_data(location, date=None):
             return {"error": "OpenWeather API key is not configured"}
             
         # Get location coordinates if a string was provided
-        coords = None
-        location_name = ""
-        
         if isinstance(location, str):
             # Check if it's in "lat,lon" format
-            if "," in location and all(part.replace('.', '', 1).replace('-', '', 1).isdigit() 
-                                     for part in location.split(",")):
-                lat, lon = map(float, location.split(","))
-                coords = {"lat": lat, "lon": lon, "name": f"Coordinates {lat},{lon}"}
-                location_name = f"Coordinates {lat},{lon}"
+            coords = _parse_coordinates(location)
+            if coords:
+                location_name = coords["name"]
             else:
                 # It's a city name
                 coords = get_coordinates(location)
@@ -89,48 +281,19 @@ def get_weather_data(location, date=None):
         
         # Use appropriate API based on whether date is provided
         
-        if date is None or date == datetime.now().date():
-            # Get current weather
-            params = {
-                "lat": coords["lat"],
-                "lon": coords["lon"],
-                "units": "metric", # Use metric units
-                "appid": OPENWEATHER_API_KEY
-            }
-            
-            logger.info(f"Calling weather API for coordinates: {coords['lat']}, {coords['lon']}")
-            response = requests.get(BASE_URL_CURRENT, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.info(f"Weather API response received: {data}")
-            
-            # Process current weather data
-            weather = {
-                "location": location_name,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "max_temp_c": round(data["main"]["temp_max"], 1),
-                "min_temp_c": round(data["main"]["temp_min"], 1),
-                "avg_temp_c": round(data["main"]["temp"], 1),
-                "avg_humidity": round(data["main"]["humidity"], 1),
-                "avg_wind_speed_knots": round(data["wind"]["speed"] * 1.94384, 1),  # Convert m/s to knots
-                "avg_visibility_km": round(data["visibility"] / 1000, 1),  # Convert m to km
-                "avg_sea_level_pressure_mb": round(data["main"]["pressure"], 1),
-            }
-            
-            # Handle precipitation - it might not exist in the response
-            if "rain" in data and "1h" in data["rain"]:
-                weather["precip_mm"] = round(data["rain"]["1h"], 1)
-            else:
-                weather["precip_mm"] = 0.0
-                
-            # Calculate derived values
-            weather["avg_dew_point_f"] = round(calculate_dew_point(data["main"]["temp"], data["main"]["humidity"]), 1)
-            weather["heating_deg_days_c"] = round(max(0, 18 - data["main"]["temp"]), 1)  # Base temperature 18°C
-            weather["cooling_deg_days_c"] = round(max(0, data["main"]["temp"] - 18), 1)  # Base temperature 18°C
-            
-            logger.info(f"Successfully fetched current weather for {location_name}")
-            return weather
+        if _is_current(date):
+            # Get current weather (shared with nearby points in the same time bucket)
+            key = _weather_cache_key(coords)
+            data = weather_cache.get(key)
+            if data is MISSING:
+                logger.info(f"Calling weather API for coordinates: {coords['lat']}, {coords['lon']}")
+                weather_upstream_calls += 1
+                response = requests.get(BASE_URL_CURRENT, params=_current_weather_params(coords))
+                response.raise_for_status()
+                data = response.json()
+                weather_cache.set(key, data, ttl=_bucket_ttl())
+                logger.info(f"Weather API response received: {data}")
+            return _build_current_weather(data, location_name)
         else:
             # For historical data, we would normally use paid APIs
             # In this demo, we'll generate synthetic data based on seasonal averages
@@ -142,6 +305,104 @@ def get_weather_data(location, date=None):
             "error": f"Error fetching weather data: {str(e)}"
         }
 
+async def _async_fetch_current_weather(coords):
+    """
+    Raw current-conditions response for `coords`, via the grid/time-bucket cache.
+
+    Concurrent misses for the same cell share one upstream call.
+    """
+    key = _weather_cache_key(coords)
+    data = weather_cache.get(key)
+    if data is not MISSING:
+        return data
+
+    async def fetch():
+        global weather_upstream_calls
+        logger.info(f"Calling weather API for coordinates: {coords['lat']}, {coords['lon']}")
+        weather_upstream_calls += 1
+        result = await get_async_client().get_json(BASE_URL_CURRENT, _current_weather_params(coords))
+        weather_cache.set(key, result, ttl=_bucket_ttl())
+        logger.info(f"Weather API response received: {result}")
+        return result
+
+    return await weather_flights.run(key, fetch)
+
+async def async_get_weather_data(location, date=None):
+    """
+    Async version of get_weather_data for the FastAPI handlers.
+    Uses the shared connection-pooled client, so the event loop is never blocked.
+    """
+    try:
+        if not OPENWEATHER_API_KEY:
+            logger.error("No OpenWeather API key available")
+            return {"error": "OpenWeather API key is not configured"}
+
+        if isinstance(location, str):
+            coords = _parse_coordinates(location)
+            if coords:
+                location_name = coords["name"]
+            else:
+                coords = await async_get_coordinates(location)
+                if coords:
+                    location_name = f"{coords['name']}, {coords['country']}"
+                else:
+                    return {
+                        "error": f"Could not find coordinates for location: {location}"
+                    }
+        else:
+            coords = location
+            location_name = f"Coordinates {coords['lat']},{coords['lon']}"
+
+        if _is_current(date):
+            data = await _async_fetch_current_weather(coords)
+            return _build_current_weather(data, location_name)
+        else:
+            return generate_synthetic_weather_data(coords, date, location_name)
+
+    except Exception as e:
+        logger.error(f"Error fetching weather data: {e}")
+        return {
+            "error": f"Error fetching weather data: {str(e)}"
+        }
+
+async def async_get_weather_bulk(locations, date=None, concurrency=BULK_WEATHER_CONCURRENCY):
+    """
+    Fetch weather for many locations (names or "lat,lon" strings) concurrently.
+
+    Yields (index, location, weather_data) tuples as each lookup finishes, so
+    callers can stream results. At most `concurrency` lookups run at once,
+    and geocoding and weather cache hits return without an upstream call.
+    Blank locations are yielded first with weather_data None and are never
+    sent upstream.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(index, location):
+        async with semaphore:
+            return index, location, await async_get_weather_data(location, date)
+
+    blank = [i for i, location in enumerate(locations) if not (location or "").strip()]
+    tasks = [asyncio.ensure_future(fetch(i, location)) for i, location in enumerate(locations)
+             if (location or "").strip()]
+    try:
+        for index in blank:
+            yield index, locations[index], None
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Stop outstanding lookups if the consumer goes away early
+        for task in tasks:
+            task.cancel()
+
+def extract_prediction_fields(weather_data, date=None):
+    """
+    Keep only the prediction model fields (rounded to 1 decimal) plus the date.
+    Raises KeyError / ValueError if a field is missing or not numeric.
+    """
+    fields = {name: round(float(weather_data[name]), 1) for name in PREDICTION_FIELDS}
+    fields['date'] = weather_data.get('date', date if date else datetime.now().strftime("%Y-%m-%d"))
+    return fields
+
 def calculate_dew_point(temp_c, humidity):
     """Calculate dew point in Fahrenheit from temperature in Celsius and humidity percentage."""
     a = 17.27